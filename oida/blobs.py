@@ -0,0 +1,218 @@
+"""
+Linting of files as they are stored in git (in a commit or in the index)
+rather than in the working tree. Files are read through a single
+`git cat-file --batch` process, and the layout of the project (packages and
+configs) is resolved from the same revision as the files.
+
+The id of a blob is the hash its contents have in the result store, so the
+facts of blobs are kept in and shared through the same store as the files in
+the working tree, without any validation.
+"""
+
+import posixpath
+from pathlib import Path
+from typing import Mapping, Sequence
+
+from .checkers import Violation
+from .checkers.base import Checker
+from .config import ComponentConfig, ProjectConfig
+from .discovery import parse_component_config_source
+from .fingerprints import get_context_hash
+from .git import ObjectReader
+from .module import Module, Source
+from .store import ResultStore
+
+# Pathspecs matching the files that make up the layout of a project
+LAYOUT_PATHSPECS = (
+    ":(top,glob)**/__init__.py",
+    ":(top,glob)**/confcomponent.py",
+    ":(top,glob)**/pyproject.toml",
+)
+
+
+def is_lintable(path: str) -> bool:
+    """
+    Check if a file in a revision would be linted, following the same rules as
+    find_modules. Paths are relative to the repository root.
+    """
+
+    return path.endswith((".py", ".pyi")) and not any(
+        part.startswith(".") for part in path.split("/")
+    )
+
+
+class RevisionLayout:
+    """
+    The packages and configs of a revision, given the ids of the blobs of its
+    __init__.py, confcomponent.py and pyproject.toml files. Paths are relative
+    to the repository root, and follow the same rules as discovery does for
+    the working tree.
+    """
+
+    def __init__(self, blobs: Mapping[str, str]) -> None:
+        self.packages: set[str] = set()
+        self.component_configs: dict[str, str] = {}
+        self.project_configs: dict[str, str] = {}
+        for path, blob in blobs.items():
+            directory, name = posixpath.split(path)
+            if name == "__init__.py" and directory:
+                self.packages.add(directory)
+            elif name == "confcomponent.py":
+                self.component_configs[directory] = blob
+            elif name == "pyproject.toml":
+                self.project_configs[directory] = blob
+
+    def get_package(self, directory: str) -> str | None:
+        """Get the module name of a directory, if it's a package"""
+
+        names: list[str] = []
+        while directory in self.packages:
+            directory, name = posixpath.split(directory)
+            names.insert(0, name)
+        return ".".join(names) or None
+
+    def get_module(self, path: str) -> tuple[str | None, str]:
+        """Get the module and name of a file"""
+
+        module = self.get_package(posixpath.dirname(path))
+        stem = posixpath.splitext(posixpath.basename(path))[0]
+        return module, "" if module and stem == "__init__" else stem
+
+    def get_component_config(self, path: str) -> tuple[str, str]:
+        """
+        Get the package and the blob id of the component config that applies
+        to a file, or empty strings if there is none.
+        """
+
+        directory = posixpath.dirname(path)
+        while directory in self.packages:
+            if blob := self.component_configs.get(directory):
+                return self.get_package(directory) or "", blob
+            directory = posixpath.dirname(directory)
+        return "", ""
+
+    def get_project_config(self, path: str) -> str:
+        """
+        Get the blob id of the project config that applies to a file, or an
+        empty string if there is none.
+        """
+
+        directory = posixpath.dirname(path)
+        while (blob := self.project_configs.get(directory)) is None:
+            if not directory:
+                return ""
+            directory = posixpath.dirname(directory)
+        return blob
+
+
+class BlobLinter:
+    """
+    Lint blobs read from git. Configs are identified by the ids of their
+    blobs, or empty strings if there is no config, and the component config
+    also by the name of the package it belongs to.
+
+    If a result store is given, the facts of each blob are looked up in it,
+    along with the hashes of the lines around them, so that blobs in the store
+    aren't read at all.
+    """
+
+    def __init__(
+        self,
+        objects: ObjectReader,
+        checkers: Sequence[type[Checker]],
+        store: ResultStore | None = None,
+    ) -> None:
+        self.objects = objects
+        self.checkers = checkers
+        self.store = store
+        self.project_configs: dict[str, ProjectConfig] = {}
+        self.component_configs: dict[tuple[str, str], ComponentConfig] = {}
+
+    def lint(
+        self,
+        blob: str,
+        module: str | None,
+        name: str,
+        component_config: tuple[str, str],
+        project_config: str,
+    ) -> list[tuple[Violation, str]]:
+        """
+        Lint a blob, returning the violations with the hash of the lines
+        around each of them. Raises SyntaxError or ValueError if the blob can't
+        be parsed, like linting a file in the working tree does, and nothing is
+        cached for it.
+        """
+
+        # Imported here as the lint commands use this module
+        from .commands.linter import check_module, extract_facts
+
+        path = Path(*(module or "").split("."), f"{name or '__init__'}.py")
+        source_module = Module(module=module, name=name, path=path)
+        component = self.get_component_config(*component_config)
+        project = self.get_project_config(project_config)
+        if self.store is None:
+            source = Source(path, self.objects.read(blob)[1])
+            return [
+                (violation, get_context_hash(source.lines, violation.line))
+                for violation in check_module(
+                    source_module,
+                    self.checkers,
+                    component_config=component,
+                    project_config=project,
+                    source=source,
+                )
+            ]
+
+        entry = self.store.load(blob, module, name)
+        facts = entry.get_facts()
+        context_hashes = entry.get_context_hashes()
+        if facts is not None and context_hashes is not None:
+            self.store.hits += 1
+        else:
+            self.store.misses += 1
+            source = Source(path, self.objects.read(blob)[1])
+            facts = extract_facts(source_module, source=source)
+            context_hashes = {
+                line: get_context_hash(source.lines, line) for line in facts.get_lines()
+            }
+            entry.put_facts(facts)
+            entry.put_context_hashes(context_hashes)
+            self.store.save(entry)
+
+        return [
+            (violation, context_hashes[violation.line])
+            for violation in facts.get_violations(
+                self.checkers, module, name, component, project
+            )
+        ]
+
+    def get_project_config(self, blob: str) -> ProjectConfig:
+        if not blob:
+            return ProjectConfig()
+        if (config := self.project_configs.get(blob)) is None:
+            _, data = self.objects.read(blob)
+            try:
+                config = ProjectConfig.from_pyproject_toml(data.decode())
+            except (ValueError, TypeError):
+                config = ProjectConfig()
+            self.project_configs[blob] = config
+        return config
+
+    def get_component_config(self, module: str, blob: str) -> ComponentConfig | None:
+        if not blob:
+            return None
+        if (config := self.component_configs.get((module, blob))) is None:
+            _, data = self.objects.read(blob)
+            try:
+                parsed = parse_component_config_source(
+                    module, data, Path(*module.split("."), "confcomponent.py")
+                )
+            except (SyntaxError, ValueError):
+                config = ComponentConfig()
+            else:
+                config = ComponentConfig(
+                    allowed_imports=frozenset(parsed["allowed_imports"]),
+                    allowed_foreign_keys=frozenset(parsed["allowed_foreign_keys"]),
+                )
+            self.component_configs[module, blob] = config
+        return config
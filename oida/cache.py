@@ -0,0 +1,31 @@
+from pathlib import Path
+
+CACHE_DIR_NAME = ".oida"
+
+
+def get_cache_dir(project_root: Path) -> Path:
+    """
+    Get the cache directory of the project with the given root directory. The
+    directory is created if it does not exist.
+    """
+
+    cache_dir = project_root / CACHE_DIR_NAME
+    if not cache_dir.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Keep the cache out of version control without requiring changes to
+        # the project's .gitignore
+        (cache_dir / ".gitignore").write_text("*\n")
+    return cache_dir
+
+
+def get_cache_file(project_root: Path, name: str) -> Path | None:
+    """
+    Get the path of a file in the cache directory of the project, or None if
+    the directory can't be created (eg. in a read-only checkout). Callers
+    should then keep their data in memory only.
+    """
+
+    try:
+        return get_cache_dir(project_root) / name
+    except OSError:
+        return None
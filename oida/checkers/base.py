@@ -1,6 +1,6 @@
 import ast
 import enum
-from typing import ClassVar, NamedTuple
+from typing import ClassVar, NamedTuple, Sequence
 
 from ..config import ComponentConfig, ProjectConfig
 from ..utils import parse_noida_comment
@@ -32,7 +32,7 @@ class Checker(ast.NodeVisitor):
         name: str,
         component_config: ComponentConfig | None,
         project_config: ProjectConfig,
-        source_lines: list[str] | None = None,
+        source_lines: Sequence[str] | None = None,
     ) -> None:
         self.module = module
         self.name = name
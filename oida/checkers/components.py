@@ -1,11 +1,24 @@
 import ast
 from contextlib import contextmanager
 from functools import reduce
-from typing import Any, Iterator
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence
 
 from ..config import ComponentConfig, ProjectConfig
 from ..utils import path_in_glob_list
-from .base import Checker, Code
+from .base import Checker, Code, Violation
+
+
+class Reference(NamedTuple):
+    """
+    A reference to a name from another app that is too deep to be accessed
+    from outside of it. Whether it's a violation depends on the configs.
+    """
+
+    full_name: str
+    line: int
+    column: int
+    # Whether the line has a noida comment for the violation
+    ignored: bool
 
 
 class ComponentIsolationChecker(Checker):
@@ -37,7 +50,7 @@ class ComponentIsolationChecker(Checker):
         name: str,
         component_config: ComponentConfig | None,
         project_config: ProjectConfig,
-        source_lines: list[str] | None = None,
+        source_lines: Sequence[str] | None = None,
     ) -> None:
         super().__init__(module, name, component_config, project_config, source_lines)
         self.scopes: list[dict[str, str]] = [{}]
@@ -45,6 +58,8 @@ class ComponentIsolationChecker(Checker):
         # config. This is used to automatically generate component configs with
         # allowed imports based on current violations.
         self.referenced_imports: set[str] = set()
+        # All references to private names, before any config is applied
+        self.references: list[Reference] = []
 
     @property
     def current_scope(self) -> dict[str, str]:
@@ -85,32 +100,61 @@ class ComponentIsolationChecker(Checker):
 
         return path_in_glob_list(".".join(path), list(allowed_imports))
 
-    def maybe_report_violation(self, full_name: str, node: ast.AST) -> None:
+    def maybe_report_violation(self, full_name: str, node: ast.expr) -> None:
         """Check a fully qualified name"""
 
         path = full_name.split(".")
         if self.is_access_allowed(path):
             return
 
-        if self.is_violation_globally_silenced(path):
-            return
+        self.references.append(
+            Reference(
+                full_name,
+                node.lineno,
+                node.col_offset,
+                self._should_ignore_violation(node.lineno, Code.ODA005),
+            )
+        )
 
-        # If access is not allowed we should record the reference even if the
-        # violation is silenced by the component config.
-        self.referenced_imports.add(full_name)
+    def check_references(self, references: Iterable[Reference]) -> None:
+        """
+        Report violations for references to private names, applying the
+        configs. References can come from visiting a module or from facts
+        extracted from it earlier.
+        """
 
-        if self.is_violation_silenced(path):
+        if self.project_config.is_ignored(self.module, self.name):
             return
 
-        self.report_violation(
-            node, Code.ODA005, f'Private attribute "{full_name}" referenced'
-        )
+        for reference in references:
+            path = reference.full_name.split(".")
+            if self.is_violation_globally_silenced(path):
+                continue
+
+            # If access is not allowed we should record the reference even if
+            # the violation is silenced by the component config.
+            self.referenced_imports.add(reference.full_name)
+
+            if self.is_violation_silenced(path) or reference.ignored:
+                continue
+
+            self.violations.append(
+                Violation(
+                    line=reference.line,
+                    column=reference.column,
+                    code=Code.ODA005,
+                    message=f'Private attribute "{reference.full_name}" referenced',
+                )
+            )
 
     def visit_Module(self, node: ast.Module) -> None:
-        """Only check the file if the module is not ignored"""
+        """
+        Collect the references in the module, and check them if the module is
+        not ignored
+        """
 
-        if not self.project_config.is_ignored(self.module, self.name):
-            super().generic_visit(node)
+        super().generic_visit(node)
+        self.check_references(self.references)
 
     def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
         if node.level > 0 or not self.module or not node.module:
@@ -1,5 +1,5 @@
 import ast
-from typing import cast
+from typing import Sequence, cast
 
 from ..config import ComponentConfig, ProjectConfig
 from .base import Checker, Code
@@ -18,7 +18,7 @@ class ConfigChecker(Checker):
         name: str,
         component_config: ComponentConfig | None,
         project_config: ProjectConfig,
-        source_lines: list[str] | None = None,
+        source_lines: Sequence[str] | None = None,
     ) -> None:
         super().__init__(module, name, component_config, project_config, source_lines)
         self.parsed_config = ComponentConfig()
@@ -1,4 +1,5 @@
 import ast
+from typing import Sequence
 
 from oida.checkers.base import Checker, Code
 from oida.config import ComponentConfig, ProjectConfig
@@ -42,7 +43,7 @@ class KeywordOnlyChecker(Checker):
         name: str,
         component_config: ComponentConfig | None,
         project_config: ProjectConfig,
-        source_lines: list[str] | None = None,
+        source_lines: Sequence[str] | None = None,
     ) -> None:
         super().__init__(module, name, component_config, project_config, source_lines)
         self._is_service_or_selector = self._check_if_service_or_selector()
@@ -1,9 +1,50 @@
-from .componentize import componentize_app
-from .config import generate_config
-from .linter import run_linter
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .affected import find_affected
+    from .componentize import componentize_app, componentize_apps, load_manifest
+    from .config import generate_config
+    from .cycles import find_import_cycles
+    from .linter import run_linter
+    from .new_since import lint_new_since
+    from .shards import merge_results
+    from .staged import lint_staged
+    from .why import find_import_path
 
 __all__ = [
     "componentize_app",
+    "componentize_apps",
+    "find_affected",
+    "find_import_cycles",
+    "find_import_path",
     "generate_config",
+    "lint_new_since",
+    "lint_staged",
+    "load_manifest",
+    "merge_results",
     "run_linter",
 ]
+
+# Commands are imported when they're first used, so that using one of them
+# doesn't import the dependencies of all the others (eg. libcst, which takes
+# most of a second to import)
+_MODULES = {
+    "componentize_app": "componentize",
+    "componentize_apps": "componentize",
+    "find_affected": "affected",
+    "find_import_cycles": "cycles",
+    "find_import_path": "why",
+    "generate_config": "config",
+    "lint_new_since": "new_since",
+    "lint_staged": "staged",
+    "load_manifest": "componentize",
+    "merge_results": "shards",
+    "run_linter": "linter",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_MODULES[name]}", __name__), name)
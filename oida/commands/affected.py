@@ -0,0 +1,167 @@
+import json
+import os
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from ..discovery import find_apps, find_components, find_root_module, get_module
+from ..graph import ImportGraph, build_import_graph
+
+
+@dataclass
+class Affected:
+    """
+    The parts of a project that are affected by a set of changed files.
+    Files outside the project can not be traced through imports, and are
+    listed as unknown.
+    """
+
+    modules: set[str] = field(default_factory=set)
+    components: set[str] = field(default_factory=set)
+    apps: set[str] = field(default_factory=set)
+    test_files: set[Path] = field(default_factory=set)
+    unknown_files: set[Path] = field(default_factory=set)
+
+    def json(self) -> str:
+        return json.dumps(
+            {
+                "modules": sorted(self.modules),
+                "components": sorted(self.components),
+                "apps": sorted(self.apps),
+                "test_files": sorted(str(path) for path in self.test_files),
+                "unknown_files": sorted(str(path) for path in self.unknown_files),
+            },
+            indent=4,
+        )
+
+    def __str__(self) -> str:
+        lines: list[str] = []
+        for title, values in (
+            ("Components", sorted(self.components)),
+            ("Apps", sorted(self.apps)),
+            ("Test files", sorted(str(path) for path in self.test_files)),
+            ("Unknown files", sorted(str(path) for path in self.unknown_files)),
+        ):
+            lines.append(f"{title} ({len(values)}):")
+            lines.extend(f"  {value}" for value in values)
+        return "\n".join(lines)
+
+
+def is_test_module(module: str) -> bool:
+    *packages, name = module.split(".")
+    return (
+        name.startswith("test_")
+        or name in ("test", "tests")
+        or any(package in ("test", "tests") for package in packages)
+    )
+
+
+def get_importers(graph: ImportGraph) -> dict[str, set[str]]:
+    """
+    Get a mapping from module to the modules importing it. The imported names
+    are also included as is, so that imports of modules that are no longer in
+    the graph (eg. because they were deleted) can be found.
+    """
+
+    importers: dict[str, set[str]] = defaultdict(set)
+    for module in graph.modules:
+        for name, _ in graph.imports(module):
+            if (target := graph.resolve(name)) and target != module:
+                importers[target].add(module)
+            importers[name].add(module)
+    return importers
+
+
+def find_affected(path: Path, changed_files: Iterable[Path]) -> Affected:
+    """
+    Find the modules, components, apps and test files that are affected by
+    changes to the given files, by following imports in reverse from the
+    modules that were changed.
+
+    Files that aren't imported can still be used by tests, so a changed
+    non-Python file selects all tests in the app it's in (or its directory
+    outside of apps), and a changed conftest.py all tests below it.
+    """
+
+    root_module = find_root_module(path.resolve())
+    graph = build_import_graph(root_module)
+    module_paths = {module: Path(file) for module, file in graph.modules.items()}
+    importers = get_importers(graph)
+    affected = Affected()
+
+    # Modules changed directly. Non-Python files mark the package they're in
+    # as changed.
+    changed_modules: set[str] = set()
+    changed_dirs: set[Path] = set()
+    test_dirs: set[Path] = set()
+    for changed_file in changed_files:
+        changed_file = Path(os.path.abspath(changed_file))
+        if not changed_file.is_relative_to(root_module):
+            affected.unknown_files.add(changed_file)
+        elif changed_file.suffix in (".py", ".pyi"):
+            if changed_file.name == "conftest.py":
+                test_dirs.add(changed_file.parent)
+            module = get_module(changed_file.parent)
+            changed_modules.add(
+                module
+                if changed_file.stem == "__init__"
+                else f"{module}.{changed_file.stem}"
+            )
+        else:
+            changed_dirs.add(changed_file.parent)
+
+    # Follow imports in reverse. Names of deleted modules are also matched
+    # against imported names nested below them.
+    queue = deque(changed_modules)
+    while queue:
+        module = queue.popleft()
+        if module in affected.modules:
+            continue
+        affected.modules.add(module)
+        queue.extend(importers.get(module, ()))
+        if module not in module_paths:
+            queue.extend(
+                importer
+                for name, names_importers in importers.items()
+                if name.startswith(f"{module}.")
+                for importer in names_importers
+            )
+
+    affected_paths = [
+        module_paths[module] for module in affected.modules if module in module_paths
+    ] + list(changed_dirs)
+
+    def is_affected(directory: Path) -> bool:
+        return any(path.is_relative_to(directory) for path in affected_paths)
+
+    apps = list(find_apps(root_module))
+    for component in find_components(root_module):
+        if is_affected(component.path):
+            affected.components.add(get_module(component.path))
+        apps.extend(component.apps)
+    affected.apps.update(get_module(app) for app in apps if is_affected(app))
+
+    for directory in changed_dirs:
+        test_dirs.add(
+            max(
+                (app for app in apps if directory.is_relative_to(app)),
+                key=lambda app: len(app.parts),
+                default=directory,
+            )
+        )
+
+    affected.test_files = {
+        path
+        for module, path in module_paths.items()
+        if is_test_module(module)
+        and (
+            module in affected.modules
+            or (
+                path.name != "__init__.py"
+                and any(path.is_relative_to(directory) for directory in test_dirs)
+            )
+        )
+    }
+
+    return affected
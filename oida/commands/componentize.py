@@ -1,22 +1,47 @@
+import hashlib
+import json
+import os
 import shutil
 import subprocess
 import sys
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
+from typing import Any, Iterable, Mapping, Sequence
 
 import libcst as cst
 from libcst import BaseStatement, FlattenSentinel, RemovalSentinel
 from libcst import matchers as m
 from libcst.codemod import (
+    Codemod,
     CodemodContext,
     ContextAwareTransformer,
+    ContextAwareVisitor,
     parallel_exec_transform_with_prettyprint,
 )
 from libcst.codemod.commands.rename import RenameCommand as BaseRenameCommand
+from libcst.helpers import get_full_name_for_node
 from libcst.metadata import QualifiedNameProvider
 
-from ..discovery import find_root_module, get_module
-from ..utils import run_black
+from ..cache import get_cache_dir
+from ..discovery import find_project_root, find_root_module, get_module
+from ..utils import run_black, write_atomic
+
+if sys.version_info >= (3, 11):
+    from tomllib import loads as load_toml
+else:
+    from tomli import loads as load_toml
+
+Move = tuple[Path, Path]
+
+# Number of files passed to each isort/black invocation
+FORMAT_BATCH_SIZE = 100
+
+# Number of files each codemod processes between journal updates
+JOURNAL_BATCH_SIZE = 500
+
+JOURNAL_FILE_NAME = "componentize.json"
 
 
 def componentize_app(old_path: Path, new_path: Path) -> None:
@@ -25,17 +50,221 @@ def componentize_app(old_path: Path, new_path: Path) -> None:
     imports in the project.
     """
 
-    root_module = find_root_module(old_path.resolve())
-    if find_root_module(new_path.resolve()) != root_module:
-        print(f"root module of old path: {root_module}")
-        print(f"root module of new path: {find_root_module(new_path.resolve())}")
-        sys.exit("Cannot move app to a different project")
+    componentize_apps([(old_path, new_path)])
+
+
+def get_journal_path(path: Path) -> Path:
+    """
+    Get the path of the journal of the project a file or directory is in. New
+    and resumed runs both find it from the root module, so a run can be
+    resumed from anywhere in the project.
+    """
+
+    root_module = find_root_module(path.resolve())
+    return get_cache_dir(find_project_root(root_module)) / JOURNAL_FILE_NAME
+
+
+def componentize_apps(moves: Sequence[Move], *, resume: bool = False) -> None:
+    """
+    Move one or more apps. All moves are applied before the project is
+    rewritten, so imports, app configs, Celery task names and formatting are
+    each updated in a single pass regardless of the number of moves.
+
+    Progress is recorded in a journal in the project's cache directory, so an
+    interrupted run can be continued by passing resume=True. When resuming the
+    moves are read from the journal, which is found from the moves if they're
+    given, the same way as when the run was started, or else from the current
+    directory. Given moves must match the ones in the journal.
+    """
+
+    if resume:
+        journal = Journal.load(get_journal_path(moves[0][0] if moves else Path.cwd()))
+        if journal is None:
+            sys.exit("No interrupted componentize run to resume")
+        if moves and {
+            (old_path.resolve(), new_path.resolve()) for old_path, new_path in moves
+        } != set(journal.moves):
+            sys.exit(
+                "The moves don't match the interrupted componentize run in "
+                f"{journal.path}. Resume it with the same moves, or delete the "
+                "journal to start over."
+            )
+        print(f"Resuming componentize run from {journal.path}")
+    else:
+        if not moves:
+            sys.exit("No apps to move")
+        journal = start_journal(moves)
+
+    root_module = journal.root_module
+    renamed_apps = journal.renamed_apps
+
+    for i, (old_module, new_path) in enumerate(renamed_apps):
+        if journal.run_step(f"move:{old_module}"):
+            move_app(root_module, journal.moves[i][0], new_path)
+            journal.complete_step(f"move:{old_module}")
+
+    if journal.run_step("imports"):
+        print("Updating imports from moved apps (might take a while)")
+        update_imports(
+            root_module,
+            {old_module: get_module(new_path) for old_module, new_path in renamed_apps},
+            journal,
+        )
+
+    if journal.run_step("app-configs"):
+        print("Updating app configs")
+        for old_module, new_path in renamed_apps:
+            journal.changed_files.add(update_or_create_app_config(old_module, new_path))
+        journal.complete_step("app-configs")
+
+    if journal.run_step("celery"):
+        print("Updating celery task naming")
+        update_celery_task_names(root_module, renamed_apps, journal)
+
+    if journal.run_step("format"):
+        print(f"Formatting {len(journal.changed_files)} changed files")
+        format_files(journal.changed_files)
+
+    journal.delete()
+
+
+def start_journal(moves: Sequence[Move]) -> "Journal":
+    """
+    Validate the moves and create a journal for a new componentize run.
+    """
+
+    root_module = find_root_module(moves[0][0].resolve())
+    for old_path, new_path in moves:
+        if find_root_module(old_path.resolve()) != root_module:
+            print(f"root module of first app: {root_module}")
+            print(f"root module of {old_path}: {find_root_module(old_path.resolve())}")
+            sys.exit("Cannot move apps from different projects")
+        if find_root_module(new_path.resolve()) != root_module:
+            print(f"root module of old path: {root_module}")
+            print(f"root module of new path: {find_root_module(new_path.resolve())}")
+            sys.exit("Cannot move app to a different project")
+
+    journal_path = get_journal_path(root_module)
+    if journal_path.exists():
+        sys.exit(
+            "A previous componentize run was interrupted. Continue it with "
+            f"--resume, or delete {journal_path} to start over."
+        )
 
-    print("Creating target directory")
+    # Module names are resolved from the __init__.py files on disk, so the old
+    # names have to be looked up before moving
+    journal = Journal(
+        journal_path,
+        {
+            "root_module": str(root_module),
+            "moves": [
+                [str(old_path.resolve()), str(new_path.resolve()), get_module(old_path)]
+                for old_path, new_path in moves
+            ],
+            "completed_steps": [],
+            "processed_files": {},
+            "pending_files": {},
+            "changed_files": [],
+        },
+    )
+    journal.save()
+    return journal
+
+
+class Journal:
+    """
+    Records the progress of a componentize run, so that it can be resumed if
+    it's interrupted. Steps are marked as completed as they finish, and
+    codemods record the files they have processed in batches. The digests of
+    the files in a batch are recorded before it's run, so the files changed by
+    an interrupted batch are still known.
+    """
+
+    def __init__(self, path: Path, data: dict[str, Any]) -> None:
+        self.path = path
+        self.root_module = Path(data["root_module"])
+        self.moves: list[Move] = [
+            (Path(old), Path(new)) for old, new, _ in data["moves"]
+        ]
+        self.renamed_apps: list[tuple[str, Path]] = [
+            (old_module, Path(new)) for _, new, old_module in data["moves"]
+        ]
+        self.completed_steps: list[str] = data["completed_steps"]
+        self.processed_files: dict[str, set[str]] = {
+            step: set(files) for step, files in data["processed_files"].items()
+        }
+        self.changed_files = {Path(path) for path in data["changed_files"]}
+        self.changed_files.update(
+            Path(path)
+            for path, digest in data["pending_files"].items()
+            if file_digest(Path(path)) != (digest and bytes.fromhex(digest))
+        )
+        self.pending_files: dict[Path, bytes | None] = {}
+        self._data = data
+
+    @classmethod
+    def load(cls, path: Path) -> "Journal | None":
+        try:
+            return cls(path, json.loads(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+
+    def save(self) -> None:
+        self._data.update(
+            completed_steps=self.completed_steps,
+            processed_files={
+                step: sorted(files) for step, files in self.processed_files.items()
+            },
+            pending_files={
+                str(path): digest and digest.hex()
+                for path, digest in sorted(self.pending_files.items())
+            },
+            changed_files=sorted(str(path) for path in self.changed_files),
+        )
+        write_atomic(self.path, json.dumps(self._data).encode())
+
+    def delete(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def run_step(self, step: str) -> bool:
+        """Returns True if the given step has not been completed yet"""
+        return step not in self.completed_steps
+
+    def complete_step(self, step: str) -> None:
+        self.completed_steps.append(step)
+        self.save()
+
+    def run_codemod(self, step: str, codemod: Codemod, files: Iterable[Path]) -> None:
+        """
+        Run a codemod on the files that haven't already been processed in this
+        step, recording progress after each batch.
+        """
+
+        processed = self.processed_files.setdefault(step, set())
+        remaining = sorted(path for path in files if str(path) not in processed)
+
+        for i in range(0, len(remaining), JOURNAL_BATCH_SIZE):
+            batch = remaining[i : i + JOURNAL_BATCH_SIZE]
+            self.pending_files = {path: file_digest(path) for path in batch}
+            self.save()
+            self.changed_files |= run_codemod(codemod, batch, self.root_module)
+            processed.update(str(path) for path in batch)
+            self.pending_files = {}
+            self.save()
+
+        self.complete_step(step)
+
+
+def move_app(root_module: Path, old_path: Path, new_path: Path) -> None:
+    """
+    Move the files of a single app and make sure the new location is a package.
+    """
+
+    print(f"Creating target directory {new_path}")
     new_path.mkdir(parents=True, exist_ok=True)
 
-    print("Moving to new directory")
-    for path in old_path.iterdir():
+    print(f"Moving {old_path} to {new_path}")
+    for path in old_path.iterdir() if old_path.exists() else ():
         if path == new_path:
             continue
 
@@ -49,25 +278,80 @@ def componentize_app(old_path: Path, new_path: Path) -> None:
         path = path.parent
 
     # Remove the source directory if it's empty now
-    if not old_path.iterdir():
-        print("Remvoing old app directory")
-        old_path.unlink()
+    if old_path.exists() and not any(old_path.iterdir()):
+        print("Removing old app directory")
+        old_path.rmdir()
+
+
+def file_digest(path: Path) -> bytes | None:
+    try:
+        return hashlib.blake2b(path.read_bytes(), digest_size=16).digest()
+    except FileNotFoundError:
+        return None
+
+
+def run_codemod(
+    codemod: Codemod, files: Iterable[Path], root_module: Path
+) -> set[Path]:
+    """
+    Run a codemod on the given files in parallel, returning the set of files
+    that were changed by it.
+    """
+
+    digests = {path: file_digest(path) for path in files}
+
+    parallel_exec_transform_with_prettyprint(
+        codemod, files=[str(path) for path in digests], repo_root=str(root_module)
+    )
+
+    return {path for path, digest in digests.items() if file_digest(path) != digest}
+
 
-    print("Updating imports from moved app (might take a while)")
-    update_imports(root_module, old_path, new_path)
+def format_files(files: Iterable[Path]) -> None:
+    """
+    Run isort and black on the given files. The files are split into batches
+    that are formatted in parallel.
+    """
+
+    formatters = [
+        formatter for formatter in ("isort", "black") if shutil.which(formatter)
+    ]
+    paths = sorted(str(path) for path in files)
+    if not formatters or not paths:
+        return
+
+    def format_batch(batch: list[str]) -> None:
+        for formatter in formatters:
+            subprocess.check_call([formatter, "--quiet", *batch])
 
-    print("Updating app config")
-    update_or_create_app_config(old_path, new_path)
+    batches = [
+        paths[i : i + FORMAT_BATCH_SIZE]
+        for i in range(0, len(paths), FORMAT_BATCH_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        # Consume the results to propagate any errors
+        list(executor.map(format_batch, batches))
+
+
+def load_manifest(path: Path) -> list[Move]:
+    """
+    Load a list of moves from a TOML manifest. Each move is a table with an
+    old and a new path, relative to the directory of the manifest:
 
-    print("Updating celery task naming")
-    update_celery_task_names(root_module, old_path, new_path)
+        [[move]]
+        old = "project/app"
+        new = "project/component/app"
+    """
 
-    if shutil.which("isort"):
-        print("Running isort")
-        subprocess.check_call(["isort", root_module])
-    if shutil.which("black"):
-        print("Running black")
-        subprocess.check_call(["black", root_module])
+    data = load_toml(path.read_text())
+    moves: list[Move] = []
+    for entry in data.get("move", []):
+        try:
+            old, new = entry["old"], entry["new"]
+        except (TypeError, KeyError):
+            sys.exit(f"Invalid move in {path}: {entry!r}")
+        moves.append((path.parent / old, path.parent / new))
+    return moves
 
 
 class RenameCommand(BaseRenameCommand):
@@ -84,22 +368,113 @@ class RenameCommand(BaseRenameCommand):
         return updated_node
 
 
-def update_imports(root_module: Path, old_path: Path, new_path: Path) -> None:
+class RenameTable:
     """
-    Update imports in the given module
+    A table of module renames that can be checked against qualified names.
+    Lookups walk the dotted name from the longest prefix, so the most specific
+    rename wins when moves are nested.
     """
 
-    # Rewrite imports from the moved module
-    old_module = get_module(old_path)
-    new_module = get_module(new_path)
+    def __init__(self, renames: Mapping[str, str]) -> None:
+        self.renames = dict(renames)
+
+    def lookup(self, name: str) -> str | None:
+        """
+        Return the old name of the rename that applies to the given qualified
+        name, if any.
+        """
+
+        path = name.split(".")
+        while path:
+            if (prefix := ".".join(path)) in self.renames:
+                return prefix
+            path = path[:-1]
+        return None
+
+
+class RenameCollector(ContextAwareVisitor):
+    """
+    Collect the renames from a rename table that apply to a module, by
+    checking qualified names, imported names and string literals against it.
+    """
+
+    METADATA_DEPENDENCIES = (QualifiedNameProvider,)
+
+    def __init__(self, context: CodemodContext, rename_table: RenameTable) -> None:
+        super().__init__(context)
+        self.rename_table = rename_table
+        self.found: set[str] = set()
+
+    def check_name(self, name: str | None) -> None:
+        if name and (old_name := self.rename_table.lookup(name)):
+            self.found.add(old_name)
+
+    def visit_Name(self, node: cst.Name) -> None:
+        for qualname in self.get_metadata(QualifiedNameProvider, node, set()):
+            self.check_name(qualname.name)
+
+    def visit_Attribute(self, node: cst.Attribute) -> None:
+        for qualname in self.get_metadata(QualifiedNameProvider, node, set()):
+            self.check_name(qualname.name)
+
+    def visit_Import(self, node: cst.Import) -> None:
+        for alias in node.names:
+            self.check_name(get_full_name_for_node(alias.name))
+
+    def visit_ImportFrom(self, node: cst.ImportFrom) -> None:
+        if node.module is None:
+            return
+        module = get_full_name_for_node(node.module)
+        self.check_name(module)
+        if not isinstance(node.names, cst.ImportStar):
+            for alias in node.names:
+                self.check_name(f"{module}.{get_full_name_for_node(alias.name)}")
+
+    def visit_SimpleString(self, node: cst.SimpleString) -> None:
+        if isinstance(node.evaluated_value, str):
+            self.check_name(node.evaluated_value)
+
+
+class MultiRenameCommand(Codemod):
+    """
+    Apply every rename in a rename table in a single pass over a module. Each
+    file is parsed once and only the renames that apply to it are run.
+    """
+
+    METADATA_DEPENDENCIES = (QualifiedNameProvider,)
+
+    def __init__(self, context: CodemodContext, renames: Mapping[str, str]) -> None:
+        super().__init__(context)
+        self.rename_table = RenameTable(renames)
+
+    def transform_module_impl(self, tree: cst.Module) -> cst.Module:
+        collector = RenameCollector(self.context, self.rename_table)
+        tree.visit(collector)
+
+        # Apply the most specific renames first, so nested moves are handled
+        # before the moves of their parent modules
+        for old_name in sorted(collector.found, key=len, reverse=True):
+            codemod = RenameCommand(
+                replace(self.context, wrapper=None, scratch={}),
+                old_name,
+                self.rename_table.renames[old_name],
+            )
+            tree = codemod.transform_module(tree)
+
+        return tree
+
+
+def update_imports(
+    root_module: Path, renames: Mapping[str, str], journal: Journal
+) -> None:
+    """
+    Update imports of the renamed modules in the project
+    """
 
     context = CodemodContext()
-    codemod = RenameCommand(context, old_module, new_module)
-    files = [str(path) for path in root_module.rglob("*.py")]
+    codemod = MultiRenameCommand(context, renames)
 
-    parallel_exec_transform_with_prettyprint(
-        codemod, files=files, repo_root=str(root_module)
-    )
+    journal.run_codemod("imports", codemod, root_module.rglob("*.py"))
 
 
 class AppConfigUpdater(cst.CSTTransformer):
@@ -163,8 +538,7 @@ class AppConfigUpdater(cst.CSTTransformer):
         )
 
 
-def update_or_create_app_config(old_path: Path, new_path: Path) -> None:
-    old_module = get_module(old_path)
+def update_or_create_app_config(old_module: str, new_path: Path) -> Path:
     new_module = get_module(new_path)
     default_app_label = old_module.rsplit(".", 1)[-1]
     class_name = "".join(
@@ -196,6 +570,8 @@ def update_or_create_app_config(old_path: Path, new_path: Path) -> None:
         )
         apps_py_path.write_text(run_black(updated_module.code))
 
+    return apps_py_path
+
 
 class CeleryTaskNameUpdater(ContextAwareTransformer):
     """
@@ -260,13 +636,41 @@ class CeleryTaskNameUpdater(ContextAwareTransformer):
         return updated_node.with_changes(decorators=decorators)
 
 
-def update_celery_task_names(root_module: Path, old_path: Path, new_path: Path) -> None:
-    old_module = get_module(old_path)
+class CeleryTaskNamesCodemod(Codemod):
+    """
+    Run the Celery task name updater for every moved app in one pass, using the
+    old module name of the app each file was moved from. If apps are nested,
+    files are matched to the most specific app they're in.
+    """
 
-    files = [str(path) for path in new_path.rglob("*.py")]
-    context = CodemodContext()
-    codemod = CeleryTaskNameUpdater(context, old_module)
+    def __init__(
+        self, context: CodemodContext, renamed_apps: Sequence[tuple[str, Path]]
+    ) -> None:
+        super().__init__(context)
+        self.renamed_apps = sorted(
+            ((old_module, new_path.resolve()) for old_module, new_path in renamed_apps),
+            key=lambda app: len(app[1].parts),
+            reverse=True,
+        )
 
-    parallel_exec_transform_with_prettyprint(
-        codemod, files=files, repo_root=str(root_module)
+    def transform_module_impl(self, tree: cst.Module) -> cst.Module:
+        path = Path(self.context.filename or "").resolve()
+        for old_module, new_path in self.renamed_apps:
+            if path.is_relative_to(new_path):
+                updater = CeleryTaskNameUpdater(self.context, old_module)
+                return updater.transform_module(tree)
+        return tree
+
+
+def update_celery_task_names(
+    root_module: Path, renamed_apps: Sequence[tuple[str, Path]], journal: Journal
+) -> None:
+    files = list(
+        dict.fromkeys(
+            path for _, new_path in renamed_apps for path in new_path.rglob("*.py")
+        )
     )
+    context = CodemodContext()
+    codemod = CeleryTaskNamesCodemod(context, renamed_apps)
+
+    journal.run_codemod("celery", codemod, files)
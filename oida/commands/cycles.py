@@ -0,0 +1,349 @@
+import heapq
+import json
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Mapping
+
+from ..discovery import find_components, find_modules, find_root_module, get_module
+from ..graph import ImportGraph, build_import_graph, strongly_connected_components
+
+# Weighted adjacency: node -> successor -> weight
+WeightedGraph = Mapping[str, Mapping[str, int]]
+
+
+@dataclass
+class Cycle:
+    """
+    A strongly connected component in an import graph, and a minimal set of
+    edges that would have to be removed to break all cycles within it.
+    """
+
+    nodes: list[str]
+    edges: list[tuple[str, str, int]]
+    locations: dict[tuple[str, str], str]
+
+    def json_data(self) -> dict[str, object]:
+        return {
+            "nodes": self.nodes,
+            "break": [
+                {
+                    "source": source,
+                    "target": target,
+                    "weight": weight,
+                    "location": self.locations.get((source, target)),
+                }
+                for source, target, weight in self.edges
+            ],
+        }
+
+
+def find_feedback_edges(
+    graph: WeightedGraph, nodes: Iterable[str]
+) -> list[tuple[str, str, int]]:
+    """
+    Find a set of edges that breaks all cycles between the given nodes, which
+    should form a strongly connected component.
+
+    Nodes are ordered with the greedy heuristic by Eades, Lin and Smyth, which
+    prefers breaking light edges, and the edges pointing backwards in the
+    order are selected. Sinks and sources are removed first, and otherwise the
+    node with the largest weighted out-degree minus in-degree. Nodes are kept
+    in buckets by that difference, so ordering takes O(E log V) time.
+
+    The selected edges are then made minimal by restoring, heaviest first, any
+    edge that doesn't close a cycle (see restore_edges), so no edge in the
+    resulting set can be left out of it.
+    """
+
+    members = set(nodes)
+    outgoing = {
+        node: {
+            target: weight
+            for target, weight in sorted(graph.get(node, {}).items())
+            if target in members and target != node
+        }
+        for node in sorted(members)
+    }
+    incoming: dict[str, dict[str, int]] = {node: {} for node in outgoing}
+    for source, targets in outgoing.items():
+        for target, weight in targets.items():
+            incoming[target][source] = weight
+
+    out_degree = {node: sum(targets.values()) for node, targets in outgoing.items()}
+    in_degree = {node: sum(sources.values()) for node, sources in incoming.items()}
+
+    sinks: deque[str] = deque()
+    sources: deque[str] = deque()
+    # Insertion ordered sets of nodes by out-degree minus in-degree, and a heap
+    # of the (negated) differences that may have a bucket
+    buckets: dict[int, dict[str, None]] = defaultdict(dict)
+    deltas: list[int] = []
+    bucket_of: dict[str, int] = {}
+    removed: set[str] = set()
+
+    def place(node: str) -> None:
+        if node in bucket_of:
+            bucket = buckets[bucket_of.pop(node)]
+            del bucket[node]
+        if not out_degree[node]:
+            sinks.append(node)
+        elif not in_degree[node]:
+            sources.append(node)
+        else:
+            delta = out_degree[node] - in_degree[node]
+            if not buckets[delta]:
+                heapq.heappush(deltas, -delta)
+            buckets[delta][node] = None
+            bucket_of[node] = delta
+
+    def remove(node: str) -> None:
+        removed.add(node)
+        for target, weight in outgoing[node].items():
+            if target not in removed:
+                in_degree[target] -= weight
+                if target in bucket_of:
+                    place(target)
+        for source, weight in incoming[node].items():
+            if source not in removed:
+                out_degree[source] -= weight
+                if source in bucket_of:
+                    place(source)
+
+    for node in outgoing:
+        place(node)
+
+    head: list[str] = []
+    tail: list[str] = []
+    while len(removed) < len(members):
+        if sinks:
+            node = sinks.popleft()
+            tail.append(node)
+        elif sources:
+            node = sources.popleft()
+            head.append(node)
+        else:
+            while not buckets[-deltas[0]]:
+                heapq.heappop(deltas)
+            bucket = buckets[-deltas[0]]
+            node = next(iter(bucket))
+            del bucket[node]
+            del bucket_of[node]
+            head.append(node)
+        remove(node)
+
+    position = {node: i for i, node in enumerate(head + tail[::-1])}
+    feedback = [
+        (source, target, weight)
+        for source, targets in outgoing.items()
+        for target, weight in targets.items()
+        if position[source] > position[target]
+    ]
+    return sorted(restore_edges(outgoing, position, feedback))
+
+
+def restore_edges(
+    graph: WeightedGraph,
+    position: dict[str, int],
+    feedback: list[tuple[str, str, int]],
+) -> list[tuple[str, str, int]]:
+    """
+    Put back the feedback edges that don't close a cycle, heaviest first,
+    returning the edges that have to stay removed. The edges pointing forwards
+    in the given order form an acyclic graph. Its topological order is kept up
+    to date as edges are put back, with the algorithm by Pearce and Kelly, so
+    an edge only needs a search of the nodes between its ends in the order.
+    """
+
+    order = dict(position)
+    forward: dict[str, set[str]] = {node: set() for node in order}
+    backward: dict[str, set[str]] = {node: set() for node in order}
+    for source, targets in graph.items():
+        for target in targets:
+            if order[source] < order[target]:
+                forward[source].add(target)
+                backward[target].add(source)
+
+    def search(
+        start: str,
+        end: str | None,
+        edges: dict[str, set[str]],
+        within: Callable[[int], bool],
+    ) -> list[str] | None:
+        """
+        Find the nodes reachable from start among the nodes in the given range
+        of the order, or None if end is reachable
+        """
+
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for other in edges[node]:
+                if other not in seen and within(order[other]):
+                    if other == end:
+                        return None
+                    seen.add(other)
+                    stack.append(other)
+        return list(seen)
+
+    result: list[tuple[str, str, int]] = []
+    for source, target, weight in sorted(feedback, key=lambda edge: (-edge[2], edge)):
+        lower, upper = order[target], order[source]
+        if lower > upper:
+            # The order has changed so the edge points forwards
+            forward[source].add(target)
+            backward[target].add(source)
+            continue
+
+        reachable = search(target, source, forward, lambda i: i <= upper)
+        if reachable is None:
+            result.append((source, target, weight))
+            continue
+        reaching = search(source, None, backward, lambda i: i > lower) or []
+
+        # Move the nodes that reach the source in front of the nodes that are
+        # reachable from the target, using the same positions
+        nodes = sorted(reaching, key=order.__getitem__) + sorted(
+            reachable, key=order.__getitem__
+        )
+        for node, index in zip(nodes, sorted(order[node] for node in nodes)):
+            order[node] = index
+        forward[source].add(target)
+        backward[target].add(source)
+
+    return result
+
+
+def find_cycles(
+    graph: WeightedGraph, locations: Mapping[tuple[str, str], str] | None = None
+) -> list[Cycle]:
+    cycles: list[Cycle] = []
+    for nodes in strongly_connected_components(graph):
+        if len(nodes) < 2:
+            continue
+        edges = find_feedback_edges(graph, nodes)
+        cycles.append(
+            Cycle(
+                nodes=nodes,
+                edges=edges,
+                locations={
+                    (source, target): locations[source, target]
+                    for source, target, _ in edges
+                    if locations and (source, target) in locations
+                },
+            )
+        )
+    return cycles
+
+
+def get_module_graph(
+    graph: ImportGraph,
+) -> tuple[dict[str, dict[str, int]], dict[tuple[str, str], str]]:
+    """
+    Get the weighted module graph, where the weight of an edge is the number
+    of imports, and the location of the first import of each edge.
+    """
+
+    modules: dict[str, dict[str, int]] = defaultdict(dict)
+    locations: dict[tuple[str, str], str] = {}
+    for source, target, line in graph.edges():
+        modules[source][target] = modules[source].get(target, 0) + 1
+        locations.setdefault((source, target), f"{graph.modules[source]}:{line}")
+    return modules, locations
+
+
+def get_component_graph(
+    module_graph: WeightedGraph,
+    module_locations: Mapping[tuple[str, str], str],
+    components: Iterable[str],
+) -> tuple[dict[str, dict[str, int]], dict[tuple[str, str], str]]:
+    """
+    Get the weighted component graph, where the weight of an edge is the
+    number of imports between modules in the components, and the location of
+    one of the imports of each edge.
+    """
+
+    index = set(components)
+    result: dict[str, dict[str, int]] = defaultdict(dict)
+    locations: dict[tuple[str, str], str] = {}
+
+    def get_component(module: str) -> str | None:
+        component = ".".join(module.split(".", 2)[:2])
+        return component if component in index else None
+
+    for source, targets in module_graph.items():
+        if (source_component := get_component(source)) is None:
+            continue
+        for target, weight in targets.items():
+            target_component = get_component(target)
+            if target_component and target_component != source_component:
+                result[source_component][target_component] = (
+                    result[source_component].get(target_component, 0) + weight
+                )
+                locations.setdefault(
+                    (source_component, target_component),
+                    module_locations[source, target],
+                )
+    return result, locations
+
+
+@dataclass
+class CycleReport:
+    component_cycles: list[Cycle]
+    module_cycles: list[Cycle]
+
+    def json(self) -> str:
+        return json.dumps(
+            {
+                "component_cycles": [
+                    cycle.json_data() for cycle in self.component_cycles
+                ],
+                "module_cycles": [cycle.json_data() for cycle in self.module_cycles],
+            },
+            indent=4,
+        )
+
+    def __str__(self) -> str:
+        lines: list[str] = []
+        for title, cycles in (
+            ("Component cycles", self.component_cycles),
+            ("Module cycles", self.module_cycles),
+        ):
+            lines.append(f"{title}: {len(cycles)}")
+            for i, cycle in enumerate(cycles, start=1):
+                lines.append(f"  {i}. {', '.join(cycle.nodes)}")
+                lines.append("     Break by removing:")
+                for source, target, weight in cycle.edges:
+                    location = cycle.locations.get((source, target), "")
+                    lines.append(
+                        f"       {source} -> {target} ({weight} imports) {location}".rstrip()
+                    )
+        return "\n".join(lines)
+
+
+def find_import_cycles(path: Path, *, use_cache: bool = True) -> CycleReport:
+    """
+    Find import cycles between components and between modules in the project
+    at the given path. The persisted import graph index is used unless
+    use_cache is False, in which case the project is parsed from scratch.
+    """
+
+    root_module = find_root_module(path.resolve())
+    if use_cache:
+        graph = build_import_graph(root_module)
+    else:
+        graph = ImportGraph()
+        graph.update(find_modules(root_module))
+
+    module_graph, locations = get_module_graph(graph)
+    component_graph, component_locations = get_component_graph(
+        module_graph,
+        locations,
+        (get_module(component.path) for component in find_components(root_module)),
+    )
+
+    return CycleReport(
+        component_cycles=find_cycles(component_graph, component_locations),
+        module_cycles=find_cycles(module_graph, locations),
+    )
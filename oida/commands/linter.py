@@ -1,38 +1,712 @@
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Hashable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Sequence,
+    TextIO,
+    TypeVar,
+)
 
-from ..checkers import Code, get_checkers
-from ..discovery import find_modules, get_component_config, get_project_config
+from ..checkers import ALL_CHECKERS, Code, Violation, get_checkers
+from ..checkers.base import Checker
+from ..config import ComponentConfig, ProjectConfig
+from ..costs import COSTS_FILE_NAME, CostHistory
+from ..discovery import (
+    find_modules,
+    find_project_root,
+    get_component_config,
+    get_project_config,
+    get_recorded_content_hash,
+    get_snapshot,
+    get_snapshot_stats,
+    is_component,
+    record_content_hash,
+    with_content_hashes,
+)
+from ..facts import ModuleFacts
+from ..metrics import MetricsWriter
+from ..module import Module, Source
+from ..snapshot import RACY_WINDOW_NS
+from ..store import ResultStore, get_content_hash, get_store_dir
+from ..utils import write_atomic
+
+T = TypeVar("T")
+
+# The number of files read ahead of the file being checked in a serial run
+READ_AHEAD = 16
+
+# A module, its violations and the time it took to lint it
+LintResult = tuple[Module, list[Violation], float | None]
+
+
+class ResultCache:
+    """
+    Lint results by file, kept in memory by the lint server between runs. A
+    result is only used if the file (by mtime and size), its module name, the
+    checks and the configs are the same as when it was computed.
+    """
+
+    def __init__(self) -> None:
+        self.results: dict[str, tuple[Hashable, list[Violation]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(
+        self, module: Module, checks: Iterable[str], *configs: Any
+    ) -> tuple[str, Hashable] | None:
+        path = os.path.abspath(module.path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            return None
+        return path, (
+            stat.st_mtime_ns,
+            stat.st_size,
+            module.module,
+            module.name,
+            tuple(checks),
+            *(repr(config) for config in configs),
+        )
+
+    def get(self, key: tuple[str, Hashable] | None) -> list[Violation] | None:
+        if key is not None:
+            path, validator = key
+            if (entry := self.results.get(path)) and entry[0] == validator:
+                self.hits += 1
+                return entry[1]
+        self.misses += 1
+        return None
+
+    def put(
+        self, key: tuple[str, Hashable] | None, violations: list[Violation]
+    ) -> None:
+        if key is not None:
+            path, validator = key
+            self.results[path] = (validator, violations)
+
+
+class LintMetrics:
+    """
+    Counters and timings for a lint run, written as OpenMetrics
+    """
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.violations: Counter[tuple[str, str]] = Counter()
+        self.stages: dict[str, float] = defaultdict(float)
+        self.checks: dict[str, float] = defaultdict(float)
+        self.components: dict[Path, bool] = {}
+        self.started_at = time.perf_counter()
+
+    def timed(self, stage: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Iterate, adding the time spent producing each item to a stage"""
+
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stages[stage] += time.perf_counter() - start
+            yield item
+
+    def get_component(self, module: Module) -> str:
+        """
+        Get the name of the component a module belongs to, or an empty string
+        if it's not in a component. Components are top level packages, so the
+        component is given by the first two parts of the module name.
+        """
+
+        parts = (module.module or "").split(".")
+        if len(parts) < 2:
+            return ""
+
+        path = module.path.parents[len(parts) - 2]
+        if (found := self.components.get(path)) is None:
+            found = self.components[path] = is_component(path)
+        return ".".join(parts[:2]) if found else ""
+
+    def write(
+        self,
+        path: Path,
+        cache: ResultCache | None = None,
+        store: ResultStore | None = None,
+    ) -> None:
+        writer = MetricsWriter("oida_lint")
+        writer.add(
+            "files",
+            "counter",
+            "Number of files checked",
+            [({}, self.files)],
+        )
+        writer.add(
+            "violations",
+            "counter",
+            "Number of violations by code and component",
+            (
+                ({"code": code, "component": component}, count)
+                for (code, component), count in sorted(self.violations.items())
+            ),
+        )
+
+        caches = {"snapshot": get_snapshot_stats()}
+        if cache is not None:
+            caches["results"] = (cache.hits, cache.misses)
+        if store is not None:
+            caches["store"] = (store.hits, store.misses)
+        writer.add(
+            "cache_hits",
+            "counter",
+            "Number of lookups answered from a cache",
+            (({"cache": name}, hits) for name, (hits, _) in caches.items()),
+        )
+        writer.add(
+            "cache_misses",
+            "counter",
+            "Number of lookups that missed a cache",
+            (({"cache": name}, misses) for name, (_, misses) in caches.items()),
+        )
+        writer.add(
+            "cache_hit_ratio",
+            "gauge",
+            "Fraction of lookups answered from a cache",
+            (
+                ({"cache": name}, hits / (hits + misses) if hits + misses else 0.0)
+                for name, (hits, misses) in caches.items()
+            ),
+        )
+
+        writer.add(
+            "stage_duration_seconds",
+            "gauge",
+            "Time spent in each stage of the run",
+            (({"stage": stage}, duration) for stage, duration in self.stages.items()),
+            unit="seconds",
+        )
+        writer.add(
+            "check_duration_seconds",
+            "gauge",
+            "Time spent running each check",
+            (({"check": check}, duration) for check, duration in self.checks.items()),
+            unit="seconds",
+        )
+        writer.add(
+            "duration_seconds",
+            "gauge",
+            "Total duration of the run",
+            [({}, time.perf_counter() - self.started_at)],
+            unit="seconds",
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, writer.getvalue().encode())
 
 
 def print_violation(
-    file: Path, line: int, column: int, code: Code, message: str
+    file: Path,
+    line: int,
+    column: int,
+    code: Code,
+    message: str,
+    *,
+    output: TextIO | None = None,
 ) -> None:
-    print(f"{file}:{line}:{column}: {message}")
+    print(f"{file}:{line}:{column}: {message}", file=output or sys.stdout)
 
 
-def run_linter(*paths: Path, checks: list[str]) -> bool:
-    has_violations = False
-    checkers = get_checkers(checks)
-    for module in find_modules(*paths):
+def check_module(
+    module: Module,
+    checkers: Iterable[type[Checker]],
+    *,
+    component_config: ComponentConfig | None,
+    project_config: ProjectConfig,
+    metrics: LintMetrics | None = None,
+    source: Source | None = None,
+) -> list[Violation]:
+    """
+    Run the given checkers on a module, returning the violations found by all
+    of them. Time spent parsing and checking is added to the metrics, if given.
+    The module is read unless its source is given.
+    """
+
+    return [
+        violation
+        for checker in run_checkers(
+            module,
+            checkers,
+            component_config=component_config,
+            project_config=project_config,
+            metrics=metrics,
+            source=source,
+        )
+        for violation in checker.violations
+    ]
+
+
+def run_checkers(
+    module: Module,
+    checkers: Iterable[type[Checker]],
+    *,
+    component_config: ComponentConfig | None,
+    project_config: ProjectConfig,
+    metrics: LintMetrics | None = None,
+    source: Source | None = None,
+) -> list[Checker]:
+    """
+    Run the given checkers on a module, returning the checkers with their
+    violations
+    """
+
+    if source is None:
+        source = module.source
+
+    start = time.perf_counter()
+    source_lines = source.lines
+    tree = source.ast
+    parse_time = time.perf_counter() - start
+
+    finished: list[Checker] = []
+    check_times: dict[str, float] = {}
+    for checker_cls in checkers:
+        start = time.perf_counter()
+        checker = checker_cls(
+            module=module.module,
+            name=module.name,
+            component_config=component_config,
+            project_config=project_config,
+            source_lines=source_lines,
+        )
+        checker.visit(tree)
+        check_times[checker_cls.slug] = time.perf_counter() - start
+        finished.append(checker)
+
+    if metrics is not None:
+        metrics.stages["parse"] += parse_time
+        for slug, duration in check_times.items():
+            metrics.checks[slug] += duration
+            metrics.stages["check"] += duration
+
+    return finished
+
+
+def extract_facts(
+    module: Module,
+    metrics: LintMetrics | None = None,
+    source: Source | None = None,
+) -> ModuleFacts:
+    """
+    Extract the facts of a module by running all checkers on it without any
+    configs
+    """
+
+    return ModuleFacts.from_checkers(
+        run_checkers(
+            module,
+            ALL_CHECKERS,
+            component_config=None,
+            project_config=ProjectConfig(),
+            metrics=metrics,
+            source=source,
+        )
+    )
+
+
+def check_module_with_store(
+    module: Module,
+    checkers: Sequence[type[Checker]],
+    store: ResultStore,
+    *,
+    component_config: ComponentConfig | None,
+    project_config: ProjectConfig,
+    metrics: LintMetrics | None = None,
+    source: Source | None = None,
+) -> tuple[list[Violation], bool]:
+    """
+    Like check_module, but the violations are found by applying the configs to
+    the facts of the module in the store. Facts are only extracted if the
+    contents of the module are not in the store, so the module is only read if
+    its content hash isn't known or its facts are missing. Also returns whether
+    the facts came from the store.
+    """
+
+    start = time.perf_counter()
+    if module.content_hash is None:
+        if source is None:
+            source = module.source
+        module.content_hash = get_content_hash(source.data)
+    entry = store.load(module.content_hash, module.module, module.name)
+    facts = entry.get_facts()
+    if metrics is not None:
+        metrics.stages["store"] += time.perf_counter() - start
+
+    stored = facts is not None
+    if facts is not None:
+        store.hits += 1
+    else:
+        store.misses += 1
+        facts = extract_facts(module, metrics, source)
+        entry.put_facts(facts)
+        store.save(entry)
+
+    start = time.perf_counter()
+    violations = facts.get_violations(
+        checkers, module.module, module.name, component_config, project_config
+    )
+    if metrics is not None:
+        metrics.stages["rules"] += time.perf_counter() - start
+    return violations, stored
+
+
+def lint_serially(
+    modules: Iterable[Module],
+    checkers: Sequence[type[Checker]],
+    metrics: LintMetrics,
+    cache: ResultCache | None = None,
+    store: ResultStore | None = None,
+) -> Generator[LintResult, None, None]:
+    """
+    Lint modules one at a time in this process, yielding the violations of
+    each module and the time it took to lint it, or None if the result came
+    from a cache.
+
+    Modules are linted as they're discovered. Files that aren't answered by a
+    cache are read in a thread pool, up to READ_AHEAD modules ahead of the
+    module that's being checked, and each file is read once into a buffer
+    that it's hashed, parsed and split into lines from. Only the modules
+    within the read-ahead are held in memory, however many modules there are.
+    """
+
+    slugs = [checker_cls.slug for checker_cls in checkers]
+    pending: deque[Callable[[], LintResult]] = deque()
+
+    def submit(module: Module) -> Callable[[], LintResult]:
+        """
+        Look a module up in the caches, or start reading it. Returns a
+        function that gives the result of the module.
+        """
+
+        start = time.perf_counter()
         component_config = get_component_config(path=module.path.parent)
         project_config = get_project_config(path=module.path.parent)
-        source_lines = module.source_lines
-        for checker_cls in checkers:
-            checker = checker_cls(
-                module=module.module,
-                name=module.name,
-                component_config=component_config,
-                project_config=project_config,
-                source_lines=source_lines,
-            )
-            checker.visit(module.ast)
-            if checker.violations:
-                has_violations = True
-            for violation in checker.violations:
-                print_violation(module.path, *violation)
-        # Clear ast and source_lines from memory as we no longer need them
-        del module.ast
-        if hasattr(module, "_source_lines"):
-            del module._source_lines  # type: ignore
-
-    return has_violations
+        metrics.stages["config"] += time.perf_counter() - start
+
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.get_key(module, slugs, component_config, project_config)
+            if (cached := cache.get(cache_key)) is not None:
+                return lambda: (module, cached, None)
+
+        stat = None
+        if store is not None and module.content is None:
+            module.content_hash, stat = get_recorded_content_hash(module.path)
+            if module.content_hash is not None:
+                # The facts are most likely in the store, so the file is only
+                # read if they're not
+                start = time.perf_counter()
+                violations, stored = check_module_with_store(
+                    module,
+                    checkers,
+                    store,
+                    component_config=component_config,
+                    project_config=project_config,
+                    metrics=metrics,
+                )
+                if cache is not None:
+                    cache.put(cache_key, violations)
+                duration = None if stored else time.perf_counter() - start
+                return lambda: (module, violations, duration)
+
+        future = executor.submit(module.read)
+
+        def finish() -> LintResult:
+            start = time.perf_counter()
+            source = Source(module.path, future.result())
+            metrics.stages["read"] += time.perf_counter() - start
+
+            if store is not None:
+                module.content_hash = get_content_hash(source.data)
+                if stat is not None:
+                    record_content_hash(module.path, stat, module.content_hash)
+                violations, stored = check_module_with_store(
+                    module,
+                    checkers,
+                    store,
+                    component_config=component_config,
+                    project_config=project_config,
+                    metrics=metrics,
+                    source=source,
+                )
+                duration = None if stored else time.perf_counter() - start
+            else:
+                violations = check_module(
+                    module,
+                    checkers,
+                    component_config=component_config,
+                    project_config=project_config,
+                    metrics=metrics,
+                    source=source,
+                )
+                duration = time.perf_counter() - start
+
+            if cache is not None:
+                cache.put(cache_key, violations)
+            return module, violations, duration
+
+        return finish
+
+    with ThreadPoolExecutor() as executor:
+        try:
+            for module in modules:
+                pending.append(submit(module))
+                if len(pending) > READ_AHEAD:
+                    yield pending.popleft()()
+            while pending:
+                yield pending.popleft()()
+        finally:
+            # Don't wait for files that are read ahead if the run is stopped
+            executor.shutdown(cancel_futures=True)
+
+
+class LintTask(NamedTuple):
+    module_index: int
+    module: str | None
+    name: str
+    path: str
+    checks: list[str] | None
+    store_dir: str | None
+    content_hash: str | None
+
+
+def lint_file(task: LintTask) -> tuple[int, list[Violation], float | None]:
+    """
+    Lint a single file in a worker process of a parallel run
+    """
+
+    start = time.perf_counter()
+    module = Module(module=task.module, name=task.name, path=Path(task.path))
+    module.content_hash = task.content_hash
+    component_config = get_component_config(module.path.parent)
+    project_config = get_project_config(module.path.parent)
+    if task.store_dir is None:
+        violations = check_module(
+            module,
+            get_checkers(task.checks),
+            component_config=component_config,
+            project_config=project_config,
+        )
+        return task.module_index, violations, time.perf_counter() - start
+
+    violations, stored = check_module_with_store(
+        module,
+        get_checkers(task.checks),
+        ResultStore(Path(task.store_dir)),
+        component_config=component_config,
+        project_config=project_config,
+    )
+    return (
+        task.module_index,
+        violations,
+        None if stored else time.perf_counter() - start,
+    )
+
+
+def order_by_cost(
+    modules: Sequence[Module], costs: CostHistory
+) -> list[tuple[int, Module]]:
+    """
+    Order modules by their estimated cost, most expensive first, keeping the
+    index of each module
+    """
+
+    seconds_per_byte = costs.get_seconds_per_byte()
+    estimates = [
+        costs.estimate(module.path, get_size(module.path), seconds_per_byte)
+        for module in modules
+    ]
+    return sorted(enumerate(modules), key=lambda item: -estimates[item[0]])
+
+
+def lint_in_parallel(
+    modules: Sequence[Module],
+    checks: list[str] | None,
+    jobs: int,
+    costs: CostHistory,
+    *,
+    ordered: bool = True,
+    store_dir: Path | None = None,
+) -> Generator[tuple[Module, list[Violation], float | None], None, None]:
+    """
+    Lint modules in a pool of worker processes, yielding the same results as
+    lint_serially. Files are handed out one at a time from a shared queue,
+    most expensive first by their recorded cost, so workers that finish early
+    take over the remaining work and the expensive files don't end up running
+    alone at the end.
+
+    Results are yielded in the order of the modules, or as soon as they are
+    done if ordered is False. Closing the generator terminates the workers.
+    """
+
+    tasks = [
+        LintTask(
+            index,
+            module.module,
+            module.name,
+            str(module.path),
+            checks,
+            str(store_dir) if store_dir else None,
+            module.content_hash,
+        )
+        for index, module in order_by_cost(modules, costs)
+    ]
+
+    with multiprocessing.Pool(jobs) as pool:
+        results = (
+            (index, (violations, duration))
+            for index, violations, duration in pool.imap_unordered(lint_file, tasks)
+        )
+        for index, (violations, duration) in in_order(results) if ordered else results:
+            yield modules[index], violations, duration
+
+
+def in_order(results: Iterable[tuple[int, T]]) -> Iterator[tuple[int, T]]:
+    """
+    Yield results that arrive in any order by their index, holding each result
+    back until the ones before it have arrived
+    """
+
+    finished: dict[int, T] = {}
+    next_index = 0
+    for index, result in results:
+        finished[index] = result
+        while next_index in finished:
+            yield next_index, finished.pop(next_index)
+            next_index += 1
+
+
+def get_size(path: Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def run_linter(
+    *paths: Path,
+    checks: list[str] | None,
+    metrics_file: Path | None = None,
+    cache: ResultCache | None = None,
+    output: TextIO | None = None,
+    shard: tuple[int, int] | None = None,
+    result_file: Path | None = None,
+    jobs: int = 1,
+    max_violations: int | None = None,
+    coordinator: tuple[str, int] | None = None,
+    use_store: bool = True,
+) -> bool:
+    """
+    Lint the modules in the given paths and print the violations. Returns
+    whether there were violations. If max_violations is given, the run stops
+    as soon as that many violations have been reported: discovery stops and
+    files that are being linted in parallel are cancelled.
+
+    If a coordinator address is given, the modules are linted by oida worker
+    processes connecting to it instead of in this process.
+
+    Results are looked up in and added to the result store, unless use_store
+    is False or the store is turned off with result_store = false in the
+    project config.
+    """
+
+    # Imported here as sharding and distributed linting use the helpers in
+    # this module
+    from ..distributed import lint_distributed
+    from .shards import select_shard, write_results
+
+    reported = 0
+    checkers = get_checkers(checks)
+    metrics = LintMetrics()
+    results: list[tuple[Path, Violation]] = []
+
+    snapshot_path = get_snapshot(paths[0]).path if paths else None
+    store = None
+    if use_store and paths and get_project_config(paths[0]).result_store:
+        store = ResultStore(get_store_dir(find_project_root(paths[0])))
+    # Costs are only used, and recorded, to schedule parallel runs
+    parallel = jobs > 1 or coordinator is not None
+    costs = CostHistory.load(
+        snapshot_path.with_name(COSTS_FILE_NAME) if snapshot_path and parallel else None
+    )
+
+    modules: Iterable[Module] = metrics.timed("discover", find_modules(*paths))
+    if shard is not None:
+        modules = select_shard(modules, *shard)
+
+    linted: Generator[tuple[Module, list[Violation], float | None], None, None]
+    if coordinator is not None:
+        modules = list(modules)
+        linted = lint_distributed(
+            modules, checks, coordinator, costs, ordered=max_violations is None
+        )
+    elif jobs > 1:
+        # Workers read the files themselves, so only the hashes are computed
+        # here
+        modules = list(with_content_hashes(modules) if store else modules)
+        linted = lint_in_parallel(
+            modules,
+            checks,
+            jobs,
+            costs,
+            ordered=max_violations is None,
+            store_dir=store.directory if store else None,
+        )
+    else:
+        linted = lint_serially(modules, checkers, metrics, cache, store)
+
+    for module, violations, duration in linted:
+        metrics.files += 1
+        if duration is not None and parallel:
+            costs.record(module.path, duration, get_size(module.path))
+            metrics.stages["check"] += duration
+
+        start = time.perf_counter()
+        if max_violations is not None:
+            violations = violations[: max_violations - reported]
+        for violation in violations:
+            reported += 1
+            print_violation(module.path, *violation, output=output)
+            if result_file is not None:
+                results.append((module.path, violation))
+            metrics.violations[
+                f"ODA{violation.code.value:03d}", metrics.get_component(module)
+            ] += 1
+        metrics.stages["report"] += time.perf_counter() - start
+
+        if max_violations is not None and reported >= max_violations:
+            linted.close()
+            break
+
+    costs.save()
+    if store is not None:
+        store.prune_if_due()
+    if metrics_file is not None:
+        # Store lookups made by other processes are not counted
+        metrics.write(metrics_file, cache, None if parallel else store)
+    if result_file is not None:
+        write_results(result_file, shard, metrics.files, results)
+
+    return reported > 0
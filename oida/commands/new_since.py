@@ -0,0 +1,99 @@
+import os
+from collections import Counter
+from pathlib import Path
+from typing import TextIO
+
+from ..blobs import BlobLinter, RevisionLayout
+from ..checkers import get_checkers
+from ..discovery import (
+    find_modules,
+    find_project_root,
+    get_component_config,
+    get_project_config,
+)
+from ..fingerprints import get_context_hash, get_fingerprint
+from ..git import ObjectReader, get_merge_base, get_repository_root, get_tree_blobs
+from ..store import ResultStore, get_store_dir
+from .linter import check_module, print_violation
+
+
+def lint_new_since(
+    *paths: Path,
+    ref: str,
+    checks: list[str] | None,
+    output: TextIO | None = None,
+    max_violations: int | None = None,
+) -> bool:
+    """
+    Lint the given paths, but only report the violations that were not there
+    at the merge base of the given ref and HEAD. Violations are matched by
+    fingerprint, so they are not reported again if lines are added or removed
+    around them. The merge base is only linted for files with violations, and
+    those results are kept in the result store by blob. Returns whether there were new
+    violations. If max_violations is given, linting stops once that many new
+    violations have been reported.
+    """
+
+    repository_root = get_repository_root(
+        paths[0] if paths[0].is_dir() else paths[0].parent
+    )
+    old_blobs = get_tree_blobs(get_merge_base(ref, repository_root), repository_root)
+    old_layout = RevisionLayout(old_blobs)
+    checkers = get_checkers(checks)
+
+    store = ResultStore(get_store_dir(find_project_root(paths[0])))
+    reported = 0
+    with ObjectReader(repository_root) as objects:
+        linter = BlobLinter(objects, checkers, store)
+        for module in find_modules(*paths):
+            violations = check_module(
+                module,
+                checkers,
+                component_config=get_component_config(module.path.parent),
+                project_config=get_project_config(module.path.parent),
+            )
+            if not violations:
+                continue
+
+            path = Path(
+                os.path.relpath(os.path.realpath(module.path), repository_root)
+            ).as_posix()
+            old_fingerprints: Counter[str] = Counter()
+            if (old_blob := old_blobs.get(path)) is not None:
+                old_module, old_name = old_layout.get_module(path)
+                try:
+                    old_violations = linter.lint(
+                        old_blob,
+                        old_module,
+                        old_name,
+                        old_layout.get_component_config(path),
+                        old_layout.get_project_config(path),
+                    )
+                except (SyntaxError, ValueError):
+                    # All violations are new if the file couldn't be parsed
+                    old_violations = []
+                old_fingerprints.update(
+                    get_fingerprint(violation, old_module, old_name, context_hash)
+                    for violation, context_hash in old_violations
+                )
+
+            for violation in violations:
+                fingerprint = get_fingerprint(
+                    violation,
+                    module.module,
+                    module.name,
+                    get_context_hash(module.source_lines, violation.line),
+                )
+                if old_fingerprints[fingerprint] > 0:
+                    old_fingerprints[fingerprint] -= 1
+                    continue
+                reported += 1
+                print_violation(module.path, *violation, output=output)
+                if max_violations is not None and reported >= max_violations:
+                    break
+
+            if max_violations is not None and reported >= max_violations:
+                break
+
+    store.prune_if_due()
+    return reported > 0
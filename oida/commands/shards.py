@@ -0,0 +1,139 @@
+import heapq
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, Sequence, TextIO
+
+from ..checkers import Code, Violation
+from ..module import Module
+from ..utils import write_atomic
+from .linter import print_violation
+
+RESULTS_VERSION = 1
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parse a shard given as i/N, where i is the 1-indexed shard out of N
+    """
+
+    index, _, count = value.partition("/")
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard {value!r}, expected eg. 1/4") from None
+    if not 1 <= shard[0] <= shard[1]:
+        raise ValueError(f"Invalid shard {value!r}, expected eg. 1/4")
+    return shard
+
+
+def get_weight(module: Module) -> int:
+    try:
+        return os.stat(module.path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def select_shard(modules: Iterable[Module], index: int, count: int) -> list[Module]:
+    """
+    Select the modules that belong to a shard. Modules are assigned to shards
+    by weight, heaviest first, always to the shard with the least total weight
+    so far. The assignment only depends on the paths and weights of the
+    modules, so every shard computes the same assignment independently.
+    """
+
+    weighted = sorted(
+        ((get_weight(module), str(module.path), module) for module in modules),
+        key=lambda item: (-item[0], item[1]),
+    )
+
+    loads = [(0, shard) for shard in range(1, count + 1)]
+    selected = []
+    for weight, _, module in weighted:
+        load, shard = heapq.heappop(loads)
+        if shard == index:
+            selected.append(module)
+        heapq.heappush(loads, (load + weight, shard))
+    return selected
+
+
+def write_results(
+    path: Path,
+    shard: tuple[int, int] | None,
+    files: int,
+    violations: Sequence[tuple[Path, Violation]],
+) -> None:
+    """
+    Write the result of a lint run to a JSON file, which can be combined with
+    the results of other shards by merge_results
+    """
+
+    data = {
+        "version": RESULTS_VERSION,
+        "shard": list(shard) if shard else None,
+        "files": files,
+        "violations": [
+            {
+                "path": str(file),
+                "line": violation.line,
+                "column": violation.column,
+                "code": f"ODA{violation.code.value:03d}",
+                "message": violation.message,
+            }
+            for file, violation in violations
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, json.dumps(data, indent=4).encode())
+
+
+def merge_results(*paths: Path, output: TextIO | None = None) -> bool:
+    """
+    Combine the result files of the shards of a lint run into a single report.
+    Exits with an error if the result of a shard is missing. Returns whether
+    there were violations.
+    """
+
+    violations = []
+    shards: dict[int, set[int]] = {}
+    for path in paths:
+        try:
+            data = json.loads(path.read_bytes())
+        except (FileNotFoundError, ValueError) as e:
+            sys.exit(f"Could not read lint results from {path}: {e}")
+        if data.get("version") != RESULTS_VERSION:
+            sys.exit(f"Unsupported lint results version in {path}")
+
+        if data["shard"]:
+            index, count = data["shard"]
+            shards.setdefault(count, set()).add(index)
+        for violation in data["violations"]:
+            violations.append(
+                (
+                    Path(violation["path"]),
+                    Violation(
+                        line=violation["line"],
+                        column=violation["column"],
+                        code=Code(int(violation["code"][3:])),
+                        message=violation["message"],
+                    ),
+                )
+            )
+
+    if len(shards) > 1:
+        sys.exit(
+            "Results are from runs with different numbers of shards: "
+            + ", ".join(str(count) for count in sorted(shards))
+        )
+    for count, indexes in shards.items():
+        if missing := sorted(set(range(1, count + 1)) - indexes):
+            sys.exit(
+                "Missing results for shards "
+                + ", ".join(f"{index}/{count}" for index in missing)
+            )
+
+    violations.sort(key=lambda item: (str(item[0]), item[1].line, item[1].column))
+    for file, violation in violations:
+        print_violation(file, *violation, output=output)
+    return bool(violations)
@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+from typing import TextIO
+
+from ..blobs import LAYOUT_PATHSPECS, BlobLinter, RevisionLayout, is_lintable
+from ..checkers import get_checkers
+from ..discovery import find_project_root
+from ..git import ObjectReader, get_index_blobs, get_repository_root, get_staged_blobs
+from ..store import ResultStore, get_store_dir
+from .linter import print_violation
+
+
+def lint_staged(
+    *paths: Path,
+    checks: list[str] | None,
+    output: TextIO | None = None,
+    max_violations: int | None = None,
+) -> bool:
+    """
+    Lint the files that are staged to be committed, as they are in the index
+    rather than in the working tree. Packages and configs are resolved from
+    the index as well. If paths are given, only staged files below them are
+    linted. Returns whether there were violations. If max_violations is given,
+    linting stops once that many violations have been reported.
+    """
+
+    repository_root = get_repository_root(Path.cwd())
+    staged = get_staged_blobs(repository_root)
+    layout = RevisionLayout(get_index_blobs(repository_root, *LAYOUT_PATHSPECS))
+    selected = [os.path.realpath(path) for path in paths]
+    cwd = os.path.realpath(Path.cwd())
+
+    store = ResultStore(get_store_dir(find_project_root(Path.cwd())))
+    reported = 0
+    with ObjectReader(repository_root) as objects:
+        linter = BlobLinter(objects, get_checkers(checks), store)
+        for path, blob in sorted(staged.items()):
+            absolute_path = os.path.join(repository_root, path)
+            if not is_lintable(path) or (
+                selected
+                and not any(
+                    absolute_path == prefix or absolute_path.startswith(prefix + os.sep)
+                    for prefix in selected
+                )
+            ):
+                continue
+
+            violations = linter.lint(
+                blob,
+                *layout.get_module(path),
+                layout.get_component_config(path),
+                layout.get_project_config(path),
+            )
+            if max_violations is not None:
+                violations = violations[: max_violations - reported]
+            for violation, _ in violations:
+                reported += 1
+                print_violation(
+                    Path(os.path.relpath(absolute_path, cwd)), *violation, output=output
+                )
+
+            if max_violations is not None and reported >= max_violations:
+                break
+
+    store.prune_if_due()
+    return reported > 0
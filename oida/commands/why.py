@@ -0,0 +1,146 @@
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from ..discovery import find_root_module
+from ..graph import Edge, build_import_graph
+
+# Adjacency list: module -> (neighbour, line of the import)
+Adjacency = Mapping[str, list[tuple[str, int]]]
+
+
+def find_shortest_path(
+    forward: Adjacency,
+    backward: Adjacency,
+    sources: Iterable[str],
+    targets: Iterable[str],
+) -> list[tuple[str, str, int]] | None:
+    """
+    Find the shortest path from any of the sources to any of the targets,
+    using a bidirectional breadth-first search. The search expands whichever
+    side has the smaller frontier, one level at a time, so only a small part
+    of a large graph is visited when the nodes are close. Returns the edges of
+    the path, or None if there is no path.
+    """
+
+    # Node -> (previous node, line, distance) for each side of the search
+    seen_forward: dict[str, tuple[str | None, int, int]] = {
+        node: (None, 0, 0) for node in sources
+    }
+    seen_backward: dict[str, tuple[str | None, int, int]] = {
+        node: (None, 0, 0) for node in targets
+    }
+    frontier_forward = list(seen_forward)
+    frontier_backward = list(seen_backward)
+
+    while frontier_forward and frontier_backward:
+        if len(frontier_forward) <= len(frontier_backward):
+            frontier, adjacency = frontier_forward, forward
+            seen, other = seen_forward, seen_backward
+        else:
+            frontier, adjacency = frontier_backward, backward
+            seen, other = seen_backward, seen_forward
+
+        next_frontier: list[str] = []
+        meeting: str | None = None
+        for node in frontier:
+            distance = seen[node][2] + 1
+            for neighbour, line in adjacency.get(node, ()):
+                if neighbour in seen:
+                    continue
+                seen[neighbour] = (node, line, distance)
+                next_frontier.append(neighbour)
+                # Several nodes may meet the other side in the same level, but
+                # at different distances from the other end
+                if neighbour in other and (
+                    meeting is None or other[neighbour][2] < other[meeting][2]
+                ):
+                    meeting = neighbour
+
+        if meeting is not None:
+            return _build_path(meeting, seen_forward, seen_backward)
+
+        if frontier is frontier_forward:
+            frontier_forward = next_frontier
+        else:
+            frontier_backward = next_frontier
+
+    return None
+
+
+def _build_path(
+    meeting: str,
+    seen_forward: dict[str, tuple[str | None, int, int]],
+    seen_backward: dict[str, tuple[str | None, int, int]],
+) -> list[tuple[str, str, int]]:
+    path: list[tuple[str, str, int]] = []
+
+    node = meeting
+    while (previous := seen_forward[node][0]) is not None:
+        path.append((previous, node, seen_forward[node][1]))
+        node = previous
+    path.reverse()
+
+    node = meeting
+    while (following := seen_backward[node][0]) is not None:
+        path.append((node, following, seen_backward[node][1]))
+        node = following
+
+    return path
+
+
+def _matches(module: str, name: str) -> bool:
+    return module == name or module.startswith(f"{name}.")
+
+
+@dataclass
+class ImportPath:
+    """A chain of imports, and the files of the modules in it"""
+
+    edges: list[Edge]
+    files: dict[str, str]
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"{edge.source} -> {edge.target} "
+            f"({self.files[edge.source]}:{edge.line})"
+            for edge in self.edges
+        )
+
+
+def find_import_path(path: Path, source: str, target: str) -> ImportPath | None:
+    """
+    Find the shortest chain of imports from the source to the target, which
+    may be modules or packages like components and apps. Packages match all
+    the modules below them. The path may be the root module of the project or
+    the directory containing it.
+    """
+
+    path = path.resolve()
+    if (package := path / source.split(".", 1)[0]).joinpath("__init__.py").exists():
+        path = package
+    graph = build_import_graph(find_root_module(path))
+
+    forward: dict[str, list[tuple[str, int]]] = defaultdict(list)
+    backward: dict[str, list[tuple[str, int]]] = defaultdict(list)
+    for edge in graph.edges():
+        forward[edge.source].append((edge.target, edge.line))
+        backward[edge.target].append((edge.source, edge.line))
+
+    sources = [module for module in graph.modules if _matches(module, source)]
+    targets = [module for module in graph.modules if _matches(module, target)]
+    for name, modules in ((source, sources), (target, targets)):
+        if not modules:
+            sys.exit(f"No module named {name} in the project")
+    if set(sources) & set(targets):
+        sys.exit(f"{source} and {target} overlap")
+
+    if (result := find_shortest_path(forward, backward, sources, targets)) is None:
+        return None
+
+    edges = [Edge(*edge) for edge in result]
+    return ImportPath(
+        edges=edges, files={edge.source: graph.modules[edge.source] for edge in edges}
+    )
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import sys
 from dataclasses import dataclass, field
-from typing import Iterable
+from typing import Any, Iterable
 
 from .utils import path_in_glob_list
 
@@ -16,12 +18,20 @@ else:
 class ProjectConfig:
     ignored_modules: list[str] = field(default_factory=list)
     allowed_imports: list[str] = field(default_factory=list)
+    # Whether lint results are kept in the result store. It doesn't affect the
+    # results, so it's not part of the config hash.
+    result_store: bool = True
 
     @classmethod
     def from_pyproject_toml(cls, pyproject_toml: str) -> ProjectConfig:
+        return cls(**cls.parse_pyproject_toml(pyproject_toml))
+
+    @staticmethod
+    def parse_pyproject_toml(pyproject_toml: str) -> dict[str, Any]:
+        """Get the raw oida settings from a pyproject.toml file"""
         raw = load_toml(pyproject_toml)
-        data = raw.get("tool", {}).get("oida", {})
-        return cls(**data)
+        data: dict[str, Any] = raw.get("tool", {}).get("oida", {})
+        return data
 
     def is_ignored(self, module: str | None, name: str) -> bool:
         path = (module or "").split(".") + [name]
@@ -35,6 +45,29 @@ class ComponentConfig:
     allowed_foreign_keys: frozenset[str] = frozenset()
 
 
+def get_config_hash(
+    component_config: ComponentConfig | None, project_config: ProjectConfig
+) -> str:
+    """
+    Hash the configs that apply to a module. Unlike their repr, the hash is
+    the same in every process, so it can be used to check that results
+    computed elsewhere were computed with the same configs.
+    """
+
+    data = {
+        "component": component_config
+        and {
+            "allowed_imports": sorted(component_config.allowed_imports),
+            "allowed_foreign_keys": sorted(component_config.allowed_foreign_keys),
+        },
+        "project": {
+            "ignored_modules": project_config.ignored_modules,
+            "allowed_imports": project_config.allowed_imports,
+        },
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
 def get_rule_for_violation(
     allowed_imports: Iterable[str], violation: str
 ) -> str | None:
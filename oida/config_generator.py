@@ -7,8 +7,11 @@ from libcst import matchers as m
 from libcst.helpers.common import ensure_type
 
 from .checkers import ComponentIsolationChecker
+from .commands.linter import extract_facts
 from .config import get_rule_for_violation
-from .discovery import get_module, get_project_config
+from .discovery import find_project_root, get_module, get_project_config
+from .module import Module
+from .store import ResultStore, get_content_hash, get_store_dir
 
 
 def collect_violations(project_root: Path) -> dict[Path, set[str]]:
@@ -18,15 +21,16 @@ def collect_violations(project_root: Path) -> dict[Path, set[str]]:
     """
 
     violations: dict[Path, set[str]] = {}
+    store = ResultStore(get_store_dir(find_project_root(project_root)))
 
     for path in project_root.iterdir():
         if path.is_dir() and (path / "__init__.py").exists():
-            violations[path] = collect_violations_in_dir(path)
+            violations[path] = collect_violations_in_dir(path, store)
 
     return violations
 
 
-def collect_violations_in_dir(path: Path) -> set[str]:
+def collect_violations_in_dir(path: Path, store: ResultStore | None = None) -> set[str]:
     """
     Recursively collect all violations in a directory.
     """
@@ -35,26 +39,41 @@ def collect_violations_in_dir(path: Path) -> set[str]:
     for child in path.iterdir():
         if child.is_dir():
             if (child / "__init__.py").exists():
-                violations |= collect_violations_in_dir(child)
+                violations |= collect_violations_in_dir(child, store)
         elif child.suffix == ".py":
-            violations |= collect_violations_in_file(child)
+            violations |= collect_violations_in_file(child, store)
 
     return violations
 
 
-def collect_violations_in_file(path: Path) -> set[str]:
+def collect_violations_in_file(
+    path: Path, store: ResultStore | None = None
+) -> set[str]:
     """
-    Collect all violations in the given Python file.
+    Collect all violations in the given Python file. The facts extracted by
+    lint runs are used if the file is in the result store.
     """
 
     module = get_module(path)
     project_config = get_project_config(path.parent)
-    checker = ComponentIsolationChecker(
-        module, path.stem, None, project_config, source_lines=None
-    )
-    with open(path) as f:
-        checker.visit(ast.parse(f.read(), str(path)))
-    return checker.referenced_imports
+
+    if store is None:
+        checker = ComponentIsolationChecker(
+            module, path.stem, None, project_config, source_lines=None
+        )
+        with open(path) as f:
+            checker.visit(ast.parse(f.read(), str(path)))
+        return checker.referenced_imports
+
+    entry = store.load(get_content_hash(path.read_bytes()), module, path.stem)
+    if (facts := entry.get_facts()) is not None:
+        store.hits += 1
+    else:
+        store.misses += 1
+        facts = extract_facts(Module(module=module, name=path.stem, path=path))
+        entry.put_facts(facts)
+        store.save(entry)
+    return facts.get_referenced_imports(module, path.stem, project_config)
 
 
 def update_component_config(node: cst.Module, allowed_imports: set[str]) -> cst.Module:
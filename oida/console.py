@@ -1,11 +1,30 @@
 import argparse
+import os
 import sys
 from pathlib import Path
 
-from oida.statistics.statistics_generator import generate_statistics
-
 from .checkers import get_checkers
-from .commands import componentize_app, generate_config, run_linter
+
+# Command implementations are imported when they're used, as some of them are
+# slow to import (eg. libcst), and the lint client should start fast
+
+
+def shard_type(value: str) -> tuple[int, int]:
+    from .commands.shards import parse_shard
+
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def address_type(value: str) -> tuple[str, int]:
+    from .distributed import parse_address
+
+    try:
+        return parse_address(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def main() -> None:
@@ -20,9 +39,21 @@ def main() -> None:
         "paths",
         metavar="path",
         type=Path,
-        nargs="+",
+        nargs="*",
         help="One or more paths to check",
     )
+    lint_parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Lint the files staged to be committed, as they are in the git "
+        "index. If paths are given only staged files below them are linted",
+    )
+    lint_parser.add_argument(
+        "--new-since",
+        metavar="REF",
+        help="Only report violations that were not there at the merge base of "
+        "the given git ref",
+    )
     lint_parser.add_argument(
         "--check",
         dest="checks",
@@ -30,6 +61,92 @@ def main() -> None:
         help="Specify checks to run",
         choices=[checker_cls.slug for checker_cls in get_checkers()],
     )
+    lint_parser.add_argument(
+        "--no-server",
+        action="store_true",
+        help="Lint in this process, even if a lint server is running",
+    )
+    lint_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write results in the result store, which is kept in "
+        "the cache directory or in OIDA_CACHE_DIR if it's set",
+    )
+    lint_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes to lint in, 0 for one per CPU (default: 1)",
+    )
+    lint_parser.add_argument(
+        "--coordinator",
+        type=address_type,
+        metavar="[HOST:]PORT",
+        help="Listen on the given address and hand out the modules to oida "
+        "worker processes connecting to it. Listens on localhost unless a host "
+        "is given. Workers are not authenticated.",
+    )
+    lint_parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop at the first violation",
+    )
+    lint_parser.add_argument(
+        "--max-violations",
+        type=int,
+        metavar="N",
+        help="Stop after reporting N violations",
+    )
+    lint_parser.add_argument(
+        "--shard",
+        type=shard_type,
+        metavar="I/N",
+        help="Only lint the I-th of N shards of the modules, split by file size",
+    )
+    lint_parser.add_argument(
+        "--result-file",
+        type=Path,
+        help="Write the violations to a JSON file, which can be combined with the "
+        "results of other shards with oida merge-results",
+    )
+    lint_parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        help="Write violation counts and timings to a file in the OpenMetrics "
+        "text format",
+    )
+
+    merge_parser = subparsers.add_parser(
+        "merge-results",
+        help="Combine the result files of sharded lint runs into one report",
+    )
+    merge_parser.add_argument(
+        "result_files",
+        metavar="result_file",
+        type=Path,
+        nargs="+",
+        help="Result files written by oida lint --result-file",
+    )
+
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Lint modules handed out by oida lint --coordinator",
+    )
+    worker_parser.add_argument(
+        "--connect",
+        type=address_type,
+        metavar="HOST:PORT",
+        required=True,
+        help="Address of the coordinator",
+    )
+    worker_parser.add_argument(
+        "--project-root",
+        type=Path,
+        default=Path.cwd(),
+        help="Path to the project root directory of this checkout (default: "
+        "current directory)",
+    )
 
     config_parser = subparsers.add_parser(
         "config",
@@ -46,26 +163,329 @@ def main() -> None:
     config_parser.add_argument(
         "project_root", type=Path, help="Path to project root directory"
     )
+    config_parser.add_argument(
+        "--coupling",
+        action="store_true",
+        help="Include the imports between components and coupling metrics",
+    )
+    config_parser.add_argument(
+        "--import-cost",
+        action="store_true",
+        help="Include the size of the transitive imports of components, apps "
+        "and the most expensive modules",
+    )
+    config_parser.add_argument(
+        "--history",
+        metavar="REV_RANGE",
+        help="Compute component, app and violation counts for each commit in a "
+        "git revision range, eg. main~100..main",
+    )
+    config_parser.add_argument(
+        "--format",
+        choices=["json", "csv", "openmetrics"],
+        default="json",
+        help="Output format. CSV output contains the component coupling metrics, "
+        "or the statistics of each commit with --history",
+    )
+
+    index_parser = subparsers.add_parser(
+        "index",
+        help="Build or update the import graph of a project",
+    )
+    index_parser.add_argument(
+        "paths",
+        metavar="path",
+        type=Path,
+        nargs="+",
+        help="One or more paths to index",
+    )
+
+    affected_parser = subparsers.add_parser(
+        "affected",
+        help="List components, apps and test files affected by changed files",
+    )
+    affected_parser.add_argument(
+        "project_root", type=Path, help="Path to project root directory"
+    )
+    affected_parser.add_argument(
+        "changed_files",
+        metavar="file",
+        type=Path,
+        nargs="*",
+        help="Changed files",
+    )
+    affected_parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="Use files changed since the merge base of the given git ref",
+    )
+    affected_parser.add_argument(
+        "--json", action="store_true", help="Output the result as JSON"
+    )
+
+    cycles_parser = subparsers.add_parser(
+        "cycles",
+        help="Find import cycles between components and between modules",
+    )
+    cycles_parser.add_argument(
+        "project_root", type=Path, help="Path to project root directory"
+    )
+    cycles_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse all modules instead of using the import graph index",
+    )
+    cycles_parser.add_argument(
+        "--json", action="store_true", help="Output the result as JSON"
+    )
+
+    why_parser = subparsers.add_parser(
+        "why",
+        help="Show the shortest chain of imports from one module or component "
+        "to another",
+    )
+    why_parser.add_argument(
+        "source", help="Importing module, app or component, eg. project.orders"
+    )
+    why_parser.add_argument(
+        "target", help="Imported module, app or component, eg. project.users"
+    )
+    why_parser.add_argument(
+        "--project-root",
+        type=Path,
+        default=Path.cwd(),
+        help="Path to project root directory (default: current directory)",
+    )
+
+    server_parser = subparsers.add_parser(
+        "server",
+        help="Run a lint server that keeps the project state in memory, used by "
+        "oida lint to give results faster",
+    )
+    server_parser.add_argument(
+        "project_root",
+        type=Path,
+        nargs="?",
+        default=Path.cwd(),
+        help="Path to project root directory (default: current directory)",
+    )
+    server_parser.add_argument(
+        "--stop", action="store_true", help="Stop a running lint server"
+    )
+
+    lsp_parser = subparsers.add_parser(
+        "lsp",
+        help="Run a language server over stdio, to show violations in editors",
+    )
+    lsp_parser.add_argument(
+        "--check",
+        dest="checks",
+        action="append",
+        help="Specify checks to run",
+        choices=[checker_cls.slug for checker_cls in get_checkers()],
+    )
 
     componentize_parser = subparsers.add_parser(
         "componentize",
-        help=componentize_app.__doc__,
+        help="Move an app into a component and update imports in the project",
+    )
+    componentize_parser.add_argument(
+        "old_path", type=Path, nargs="?", help="Current path to app"
+    )
+    componentize_parser.add_argument(
+        "new_path", type=Path, nargs="?", help="Path to move app to"
+    )
+    componentize_parser.add_argument(
+        "--manifest",
+        type=Path,
+        help="TOML file listing several apps to move in one pass",
+    )
+    componentize_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted componentize run. The run is found from "
+        "the given paths or manifest, or else from the current directory",
     )
-    componentize_parser.add_argument("old_path", type=Path, help="Current path to app")
-    componentize_parser.add_argument("new_path", type=Path, help="Path to move app to")
 
     args = parser.parse_args()
 
     if args.command == "lint":
-        has_violations = run_linter(*args.paths, checks=args.checks)
+        if args.max_violations is not None and args.max_violations < 1:
+            parser.error("--max-violations must be at least 1")
+        limits = [args.max_violations, 1 if args.fail_fast else None]
+        max_violations = min((limit for limit in limits if limit), default=None)
+
+    if args.command == "lint" and args.staged:
+        from .commands import lint_staged
+
+        if args.metrics_file or args.shard or args.result_file or args.coordinator:
+            parser.error(
+                "--staged cannot be combined with --metrics-file, --shard, "
+                "--result-file or --coordinator"
+            )
+        if args.new_since:
+            parser.error("--staged cannot be combined with --new-since")
+        if lint_staged(*args.paths, checks=args.checks, max_violations=max_violations):
+            sys.exit(1)
+    elif args.command == "lint" and args.new_since:
+        from .commands import lint_new_since
+
+        if not args.paths:
+            parser.error("the following arguments are required: path")
+        if args.metrics_file or args.shard or args.result_file or args.coordinator:
+            parser.error(
+                "--new-since cannot be combined with --metrics-file, --shard, "
+                "--result-file or --coordinator"
+            )
+        if lint_new_since(
+            *args.paths,
+            ref=args.new_since,
+            checks=args.checks,
+            max_violations=max_violations,
+        ):
+            sys.exit(1)
+    elif args.command == "lint":
+        from .server import lint_with_server
+
+        if not args.paths:
+            parser.error("the following arguments are required: path")
+
+        result = None
+        if not (
+            args.no_server
+            or args.no_cache
+            or args.shard
+            or args.result_file
+            or args.jobs != 1
+            or args.coordinator
+        ):
+            result = lint_with_server(
+                *args.paths,
+                checks=args.checks,
+                metrics_file=args.metrics_file,
+                max_violations=max_violations,
+            )
+        if result is not None:
+            has_violations, output = result
+            print(output, end="")
+        else:
+            from .commands.linter import run_linter
+            from .distributed import CoordinatorError
+
+            try:
+                has_violations = run_linter(
+                    *args.paths,
+                    checks=args.checks,
+                    metrics_file=args.metrics_file,
+                    shard=args.shard,
+                    result_file=args.result_file,
+                    jobs=args.jobs or os.cpu_count() or 1,
+                    max_violations=max_violations,
+                    coordinator=args.coordinator,
+                    use_store=not args.no_cache,
+                )
+            except CoordinatorError as e:
+                sys.exit(str(e))
         if has_violations:
             sys.exit(1)
+    elif args.command == "worker":
+        from .distributed import CoordinatorError, run_worker
+
+        try:
+            run_worker(args.connect, args.project_root)
+        except CoordinatorError as e:
+            sys.exit(str(e))
+    elif args.command == "merge-results":
+        from .commands import merge_results
+
+        if merge_results(*args.result_files):
+            sys.exit(1)
+    elif args.command == "server":
+        from .server import serve, stop
+
+        if args.stop:
+            if not stop(args.project_root):
+                sys.exit("No lint server is running")
+        else:
+            serve(args.project_root)
+    elif args.command == "lsp":
+        from .lsp import serve as serve_lsp
+
+        sys.exit(serve_lsp(checks=args.checks))
     elif args.command == "config":
+        from .commands import generate_config
+
         generate_config(args.project_root)
+    elif args.command == "statistics" and args.history:
+        from .statistics.history import generate_history
+
+        if args.coupling or args.import_cost or args.format == "openmetrics":
+            parser.error(
+                "--history cannot be combined with --coupling, --import-cost or "
+                "--format openmetrics"
+            )
+        history = generate_history(args.project_root, args.history)
+        if args.format == "csv":
+            print(history.csv(), end="")
+        else:
+            print(history.json())
     elif args.command == "statistics":
-        statistics = generate_statistics(args.project_root)
-        print(f"{statistics.json()}")
+        from .statistics.statistics_generator import generate_statistics
+
+        statistics = generate_statistics(
+            args.project_root,
+            coupling=args.coupling or args.format == "csv",
+            import_cost=args.import_cost,
+        )
+        if args.format == "csv" and statistics.coupling:
+            print(statistics.coupling.csv(), end="")
+        elif args.format == "openmetrics":
+            print(statistics.openmetrics(), end="")
+        else:
+            print(f"{statistics.json()}")
+    elif args.command == "index":
+        from .graph import build_import_graph
+
+        graph = build_import_graph(*args.paths)
+        print(
+            f"Indexed {len(graph.modules)} modules "
+            f"with {sum(1 for _ in graph.edges())} imports"
+        )
+    elif args.command == "affected":
+        from .commands import find_affected
+        from .git import get_changed_files
+
+        changed_files = list(args.changed_files)
+        if args.since:
+            changed_files.extend(get_changed_files(args.since, args.project_root))
+        affected = find_affected(args.project_root, changed_files)
+        print(affected.json() if args.json else affected)
+    elif args.command == "cycles":
+        from .commands import find_import_cycles
+
+        cycles = find_import_cycles(args.project_root, use_cache=not args.no_cache)
+        print(cycles.json() if args.json else cycles)
+        if cycles.component_cycles or cycles.module_cycles:
+            sys.exit(1)
+    elif args.command == "why":
+        from .commands import find_import_path
+
+        import_path = find_import_path(args.project_root, args.source, args.target)
+        if import_path is None:
+            sys.exit(f"{args.source} does not import {args.target}")
+        print(import_path)
     elif args.command == "componentize":
-        componentize_app(args.old_path, args.new_path)
+        from .commands import componentize_apps, load_manifest
+
+        if args.manifest:
+            if args.old_path or args.new_path:
+                parser.error("paths cannot be combined with --manifest")
+            componentize_apps(load_manifest(args.manifest), resume=args.resume)
+        elif args.old_path and args.new_path:
+            componentize_apps([(args.old_path, args.new_path)], resume=args.resume)
+        elif args.resume:
+            componentize_apps([], resume=True)
+        else:
+            parser.error("componentize requires old_path and new_path, or --manifest")
     else:
         sys.exit(f"Unknown command: {args.command}")
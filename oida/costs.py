@@ -0,0 +1,114 @@
+"""
+The time it took to lint each file in previous runs, kept in the project's
+cache directory. Parallel runs use it to start with the most expensive files,
+so that a few large files (like generated modules or big models.py files)
+don't end up running alone at the end of a run.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from .utils import write_atomic
+
+COSTS_FILE_NAME = "costs"
+COSTS_VERSION = 1
+
+# Seconds per byte used to estimate the cost of files that have never been
+# linted, when there is no history to base the estimate on
+DEFAULT_SECONDS_PER_BYTE = 1e-6
+
+# Relative change in the cost of a file that's worth writing the history for.
+# Timings vary a bit between runs, and only need to be roughly right to order
+# files by.
+COST_TOLERANCE = 0.25
+
+
+class Cost(NamedTuple):
+    seconds: float
+    size: int
+
+
+class CostHistory:
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self.costs: dict[str, Cost] = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path | None) -> "CostHistory":
+        history = cls(path)
+        if path is None:
+            return history
+
+        try:
+            data = json.loads(path.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return history
+
+        if data.get("version") == COSTS_VERSION:
+            history.costs = {
+                key: Cost(seconds, size)
+                for key, (seconds, size) in data["costs"].items()
+            }
+        return history
+
+    def record(self, path: Path, seconds: float, size: int) -> None:
+        """
+        Record the cost of a file. The history is only written if the file is
+        new, its size changed or it took noticeably longer or shorter.
+        """
+
+        key = os.path.abspath(path)
+        previous = self.costs.get(key)
+        self.costs[key] = Cost(seconds, size)
+        if (
+            previous is None
+            or previous.size != size
+            or abs(seconds - previous.seconds) > previous.seconds * COST_TOLERANCE
+        ):
+            self.dirty = True
+
+    def get_seconds_per_byte(self) -> float:
+        total_size = sum(cost.size for cost in self.costs.values())
+        if not total_size:
+            return DEFAULT_SECONDS_PER_BYTE
+        return sum(cost.seconds for cost in self.costs.values()) / total_size
+
+    def estimate(self, path: Path, size: int, seconds_per_byte: float) -> float:
+        """
+        Estimate the cost of linting a file of the given size. Recorded costs
+        are scaled by how much the file has grown or shrunk since. Files
+        without a recorded cost are estimated by their size.
+        """
+
+        cost = self.costs.get(os.path.abspath(path))
+        if cost is None:
+            return size * seconds_per_byte
+        if cost.size and size != cost.size:
+            return cost.seconds * size / cost.size
+        return cost.seconds
+
+    def save(self) -> None:
+        """
+        Write the history to disk if there are new entries, merging in entries
+        written by other processes in the meantime.
+        """
+
+        if not self.dirty or self.path is None:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        on_disk = CostHistory.load(self.path)
+        costs = {**on_disk.costs, **self.costs}
+        write_atomic(
+            self.path,
+            json.dumps(
+                {
+                    "version": COSTS_VERSION,
+                    "costs": {key: list(cost) for key, cost in costs.items()},
+                }
+            ).encode(),
+        )
+        self.dirty = False
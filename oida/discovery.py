@@ -1,13 +1,112 @@
 import ast
+import atexit
 import functools
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable
+from typing import AbstractSet, Any, Callable, Generic, Iterable, Iterator, TypeVar
 
 from oida.component import Component
 
+from .cache import get_cache_file
 from .checkers import ConfigChecker
 from .config import ComponentConfig, ProjectConfig
 from .module import Module
+from .snapshot import ProjectSnapshot
+from .store import get_content_hash
+
+SNAPSHOT_FILE_NAME = "index"
+
+# Maximum number of modules to hash ahead of the module that's being used
+HASH_AHEAD = 64
+
+T = TypeVar("T")
+
+# Snapshots that have been loaded in this process, by project root
+_snapshots: dict[str, ProjectSnapshot] = {}
+
+# Used for paths that are not part of a project. Entries are kept in memory
+# only.
+_transient_snapshot = ProjectSnapshot(Path(os.sep), None)
+
+
+def get_snapshot(path: Path) -> ProjectSnapshot:
+    """
+    Get the snapshot of the layout of the project the given path belongs to.
+    The snapshot is loaded from the project's cache directory the first time
+    it's used, and saved when the process exits.
+    """
+
+    key = os.path.abspath(path)
+    for root, snapshot in _snapshots.items():
+        if key == root or key.startswith(root + os.sep):
+            return snapshot
+
+    if (project_root := _find_project_root(Path(key))) is None:
+        return _transient_snapshot
+
+    snapshot = ProjectSnapshot.load(
+        project_root, get_cache_file(project_root, SNAPSHOT_FILE_NAME)
+    )
+    _snapshots[snapshot.root] = snapshot
+    atexit.register(snapshot.save)
+    return snapshot
+
+
+def get_snapshot_stats() -> tuple[int, int]:
+    """
+    Get the number of hits and misses of the project snapshots loaded in this
+    process.
+    """
+
+    snapshots = [*_snapshots.values(), _transient_snapshot]
+    return (
+        sum(snapshot.hits for snapshot in snapshots),
+        sum(snapshot.misses for snapshot in snapshots),
+    )
+
+
+class PathCache(Generic[T]):
+    """
+    Caches the results of a function taking a single path, like
+    functools.lru_cache, but also allows evicting the results for all paths
+    below a directory. Long running processes use this to only resolve the
+    configs of the part of the project that changed.
+    """
+
+    def __init__(self, function: Callable[[Path], T]) -> None:
+        self.function = function
+        self.results: dict[Path, T] = {}
+        functools.update_wrapper(self, function)
+
+    def __call__(self, path: Path) -> T:
+        try:
+            return self.results[path]
+        except KeyError:
+            result = self.results[path] = self.function(path)
+            return result
+
+    def cache_clear(self) -> None:
+        self.results.clear()
+
+    def invalidate(self, path: Path) -> None:
+        """
+        Evict the results for the path and all paths below it
+        """
+
+        prefix = os.path.abspath(path)
+        self.results = {
+            key: result
+            for key, result in self.results.items()
+            if (key_path := os.path.abspath(key)) != prefix
+            and not key_path.startswith(prefix + os.sep)
+        }
+
+
+def is_package(path: Path) -> bool:
+    listing = get_snapshot(path).listing(path)
+    return listing is not None and "__init__.py" in listing.files
 
 
 def get_module(path: Path) -> str:
@@ -16,8 +115,10 @@ def get_module(path: Path) -> str:
     module name.
     """
 
-    names: list[str] = [path.stem] if path.is_dir() else []
-    while (path.parent / "__init__.py").exists():
+    names: list[str] = (
+        [path.stem] if get_snapshot(path).listing(path) is not None else []
+    )
+    while is_package(path.parent):
         names.insert(0, path.parent.stem)
         path = path.parent
 
@@ -27,10 +128,17 @@ def get_module(path: Path) -> str:
 @functools.lru_cache
 def get_project_config(path: Path) -> ProjectConfig:
 
-    pyproject_toml_path = path / "pyproject.toml"
+    snapshot = get_snapshot(path)
+    listing = snapshot.listing(path)
 
-    if pyproject_toml_path.exists():
-        return ProjectConfig.from_pyproject_toml(pyproject_toml_path.read_text())
+    if listing is not None and "pyproject.toml" in listing.files:
+        return ProjectConfig(
+            **snapshot.file_data(
+                "project-config",
+                path / "pyproject.toml",
+                lambda path: ProjectConfig.parse_pyproject_toml(path.read_text()),
+            )
+        )
 
     if path.parent != path:
         return get_project_config(path.parent)
@@ -39,36 +147,102 @@ def get_project_config(path: Path) -> ProjectConfig:
     return ProjectConfig()
 
 
-@functools.lru_cache
+def _find_project_root(path: Path) -> Path | None:
+    path = path.resolve()
+    for directory in (path, *path.parents):
+        if (directory / "pyproject.toml").exists():
+            return directory
+
+    root_module = find_root_module(path if path.is_dir() else path.parent)
+    if (root_module / "__init__.py").exists():
+        return root_module.parent
+    return None
+
+
+def find_project_root(path: Path) -> Path:
+    """
+    Find the root directory of the project, which is the closest directory
+    containing a pyproject.toml file. Falls back to the directory containing
+    the top-level module if there is no pyproject.toml file.
+    """
+
+    if project_root := _find_project_root(path):
+        return project_root
+
+    path = path.resolve()
+    return path if path.is_dir() else path.parent
+
+
+@PathCache
 def get_component_config(path: Path) -> ComponentConfig | None:
     """
     Given a path to a directory find the relevant project config.
     """
 
-    if not (path / "__init__.py").exists():
+    listing = get_snapshot(path).listing(path)
+    if listing is None or "__init__.py" not in listing.files:
         return None
 
-    if (conf_path := path / "confcomponent.py") and conf_path.exists():
-        return load_component_config(conf_path)
+    if "confcomponent.py" in listing.files:
+        return load_component_config(path / "confcomponent.py")
 
     return get_component_config(path.parent)
 
 
-@functools.lru_cache(maxsize=None)
+def invalidate_component_configs(path: Path) -> None:
+    """
+    Forget the component configs resolved for a directory and the directories
+    below it, eg. after a confcomponent.py file in it has changed. Configs
+    resolved for other parts of the project are kept.
+    """
+
+    get_component_config.invalidate(path)
+    load_component_config.invalidate(path)
+
+
+@PathCache
 def load_component_config(path: Path) -> ComponentConfig:
     """
     Load component config from a file.
     """
 
-    module = get_module(path.parent)
-    name = path.stem
+    data = get_snapshot(path).file_data(
+        "component-config", path, parse_component_config
+    )
+    return ComponentConfig(
+        allowed_imports=frozenset(data["allowed_imports"]),
+        allowed_foreign_keys=frozenset(data["allowed_foreign_keys"]),
+    )
+
+
+def parse_component_config(path: Path) -> dict[str, Any]:
+    """
+    Parse a component config file into a JSON serializable dictionary.
+    """
+
+    with open(path) as f:
+        return parse_component_config_source(get_module(path.parent), f.read(), path)
+
+
+def parse_component_config_source(
+    module: str, source: str | bytes, path: Path
+) -> dict[str, Any]:
+    """
+    Parse the source of a component config file in the given package into a
+    JSON serializable dictionary.
+    """
 
     checker = ConfigChecker(
-        module=module, name=name, component_config=None, project_config=ProjectConfig()
+        module=module,
+        name=path.stem,
+        component_config=None,
+        project_config=ProjectConfig(),
     )
-    with open(path) as f:
-        checker.visit(ast.parse(f.read(), str(path)))
-    return checker.parsed_config
+    checker.visit(ast.parse(source, str(path)))
+    return {
+        "allowed_imports": sorted(checker.parsed_config.allowed_imports),
+        "allowed_foreign_keys": sorted(checker.parsed_config.allowed_foreign_keys),
+    }
 
 
 def sort_paths(paths: Iterable[Path]) -> list[Path]:
@@ -93,7 +267,7 @@ def check_directory(path: Path, module: str | None = None) -> Iterable[Module]:
     Given a path to a directory, find and load all modules in that directory.
     """
 
-    if not (path / "__init__.py").exists():
+    if not is_package(path):
         for child in sort_paths(path.iterdir()):
             if child.is_dir():
                 yield from check_directory(child)
@@ -108,13 +282,18 @@ def check_directory(path: Path, module: str | None = None) -> Iterable[Module]:
                 yield check_file(child, module)
 
 
-def check_file(path: Path, module: str | None = None) -> Module:
+def check_file(
+    path: Path, module: str | None = None, content: str | None = None
+) -> Module:
 
     if module is None:
         module = get_module(path)
 
     return Module(
-        module=module, name="" if path.stem == "__init__" else path.stem, path=path
+        module=module,
+        name="" if path.stem == "__init__" else path.stem,
+        path=path,
+        content=content,
     )
 
 
@@ -145,9 +324,13 @@ def find_apps(path: Path) -> Iterable[Path]:
     """
     Find all apps under the specified path.
     """
-    for subpath in path.iterdir():
-        if is_app(path=subpath):
-            yield subpath
+
+    if (listing := get_snapshot(path).listing(path)) is None:
+        return
+
+    for name in sorted(listing.dirs):
+        if is_app(path=path / name):
+            yield path / name
 
 
 def get_component(path: Path) -> Component | None:
@@ -171,20 +354,32 @@ def find_components(path: Path) -> Iterable[Component]:
     """
 
     root_module = find_root_module(path=path)
-    for subpath in root_module.iterdir():
-        if subpath.is_dir() and is_component(path=subpath):
-            component = get_component(path=subpath)
-            if component is not None:
-                yield component
+    if (listing := get_snapshot(root_module).listing(root_module)) is None:
+        return
+
+    for name in sorted(listing.dirs):
+        component = get_component(path=root_module / name)
+        if component is not None:
+            yield component
 
 
 def is_app(path: Path) -> bool:
-    if not (path / "__init__.py").exists():
+    listing = get_snapshot(path).listing(path)
+    return listing is not None and is_app_listing(listing.dirs, listing.files)
+
+
+def is_app_listing(dirs: AbstractSet[str], files: AbstractSet[str]) -> bool:
+    """
+    Check if a directory with the given subdirectories and files is an app
+    """
+
+    if "__init__.py" not in files:
         # Apps should include a __init__.py file
         return False
 
-    # The existance of some of these files or directories suggests an app
-    may_exist_in_apps = [
+    # The existance of some of these files or directories suggests an app.
+    # If more than one of these subpaths exist we assume this to be an app.
+    may_exist_in_apps = {
         "apps.py",
         "admin.py",
         "models.py",
@@ -193,34 +388,85 @@ def is_app(path: Path) -> bool:
         "migrations",
         "templates",
         "static",
-    ]
-    count = 0
-    for test_path in may_exist_in_apps:
-        if (path / test_path).exists():
-            count = count + 1
-            # If more than one of these subpaths exist we assume this to be an app
-            if count > 1:
-                return True
-    return False
+    }
+    return len(may_exist_in_apps & (dirs | files)) > 1
 
 
 def _has_public_api(path: Path) -> bool:
-    for subpath in path.iterdir():
-        if subpath.suffix == ".py":
-            if "__init__" not in str(subpath):
-                # If the component contains any .py file except __init__.py,
-                # it has a public API
-                return True
-    return False
+    if (listing := get_snapshot(path).listing(path)) is None:
+        return False
+    return has_public_api_files(listing.files)
+
+
+def has_public_api_files(files: Iterable[str]) -> bool:
+    # If the component contains any .py file except __init__.py, it has a
+    # public API
+    return any(name.endswith(".py") and "__init__" not in name for name in files)
 
 
 def is_component(path: Path) -> bool:
-    if not (path / "__init__.py").exists():
+    listing = get_snapshot(path).listing(path)
+    if listing is None or "__init__.py" not in listing.files:
         # Components should include a __init__.py file
         return False
 
     # A component should contain at least one app.
-    for subpath in path.iterdir():
-        if is_app(path=subpath):
-            return True
-    return False
+    return any(is_app(path=path / name) for name in listing.dirs)
+
+
+def get_recorded_content_hash(path: Path) -> tuple[str | None, os.stat_result]:
+    """
+    Get the content hash recorded in the project snapshot for a file, or None
+    if the file's inode, mtime or size have changed since. The current stat
+    result of the file is returned as well, to record a new hash with.
+    """
+
+    stat = os.stat(path)
+    entry = get_snapshot(path).get_file_data("content-hash", path, stat)
+    return (entry.data if entry else None), stat
+
+
+def record_content_hash(path: Path, stat: os.stat_result, content_hash: str) -> None:
+    get_snapshot(path).put_file_data("content-hash", path, stat, content_hash)
+
+
+def hash_file(path: Path) -> str:
+    return get_content_hash(path.read_bytes())
+
+
+def with_content_hashes(modules: Iterable[Module]) -> Iterator[Module]:
+    """
+    Set the content hash of each module. Hashes are kept in the project
+    snapshot along with the inode, mtime and size of each file, so unchanged
+    files are not read. Other files are hashed in a thread pool (hashlib
+    releases the GIL), up to HASH_AHEAD modules ahead of the module that was
+    last yielded. Modules are yielded in the order they're given.
+    """
+
+    pending: deque[tuple[Module, Future[str], os.stat_result] | Module] = deque()
+
+    def finish(item: tuple[Module, Future[str], os.stat_result] | Module) -> Module:
+        if isinstance(item, Module):
+            return item
+        module, future, stat = item
+        module.content_hash = future.result()
+        record_content_hash(module.path, stat, module.content_hash)
+        return module
+
+    with ThreadPoolExecutor() as executor:
+        for module in modules:
+            if module.content is not None:
+                module.content_hash = get_content_hash(module.content.encode())
+                pending.append(module)
+            else:
+                module.content_hash, stat = get_recorded_content_hash(module.path)
+                if module.content_hash is not None:
+                    pending.append(module)
+                else:
+                    future = executor.submit(hash_file, module.path)
+                    pending.append((module, future, stat))
+
+            if len(pending) > HASH_AHEAD:
+                yield finish(pending.popleft())
+        while pending:
+            yield finish(pending.popleft())
@@ -0,0 +1,382 @@
+"""
+Linting spread over several machines. `oida lint --coordinator` discovers the
+modules to lint and hands them out in batches over TCP to `oida worker`
+processes, which lint them in their own checkout of the project and send back
+the violations. Batches are handed out one at a time from a shared queue, so
+fast workers take more of them, and a batch is handed to another worker if the
+one it was given to disconnects or stops responding. The coordinator gives up
+if no worker has been connected for a while.
+
+Messages are JSON documents, one per line. Modules are identified by their
+path relative to the project root, along with a hash of the configs that
+apply to them, so that a worker with a checkout where the configs differ
+refuses the work instead of returning different results.
+
+The coordinator doesn't authenticate workers: any client that can connect to
+it is handed paths and module names from the project. It only listens on
+localhost unless another host is given.
+"""
+
+import contextlib
+import io
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Generator, Iterator, Sequence
+
+from .checkers import Code, Violation, get_checkers
+from .commands.linter import check_module_with_store, in_order, order_by_cost
+from .config import get_config_hash
+from .costs import CostHistory
+from .discovery import find_project_root, get_component_config, get_project_config
+from .module import Module
+from .store import ResultStore, get_store_dir
+
+# Number of modules handed to a worker at a time. Small batches spread the
+# work more evenly and make less work redone when a worker dies.
+BATCH_SIZE = 10
+
+# Seconds to wait for a worker to return a batch before handing it to another
+WORKER_TIMEOUT = 300
+
+# Seconds a worker keeps trying to connect, as it may be started before the
+# coordinator
+CONNECT_TIMEOUT = 30
+
+# Seconds the coordinator waits without any connected workers before giving up
+IDLE_TIMEOUT = 120
+
+
+class CoordinatorError(Exception):
+    """
+    Raised when a worker reports an error to the coordinator, when no worker
+    has been connected to the coordinator for IDLE_TIMEOUT seconds, or when a
+    worker can't connect to the coordinator or lint a batch from it
+    """
+
+
+def parse_address(value: str) -> tuple[str, int]:
+    """
+    Parse a HOST:PORT address. The host defaults to localhost if only a port
+    is given.
+    """
+
+    host, _, port = value.rpartition(":")
+    if not port.isdigit() or not 0 <= int(port) <= 65535:
+        raise ValueError(f"Invalid address {value!r}, expected HOST:PORT")
+    return host or "localhost", int(port)
+
+
+def send_message(file: io.BufferedIOBase, message: dict[str, Any]) -> None:
+    file.write(json.dumps(message).encode() + b"\n")
+    file.flush()
+
+
+def receive_message(file: io.BufferedIOBase) -> dict[str, Any] | None:
+    """Read the next message, or None if the connection was closed"""
+
+    line = file.readline()
+    if not line:
+        return None
+    message: dict[str, Any] = json.loads(line)
+    return message
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    """
+    Hands out batches to workers, one connection per worker. Results are put
+    on a queue as batches are completed, and None is put on it if a worker
+    reports an error.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        batches: list[list[dict[str, Any]]],
+        checks: list[str] | None,
+    ) -> None:
+        self.batches = batches
+        self.checks = checks
+        self.pending = deque(range(len(batches)))
+        self.remaining = len(batches)
+        self.results: queue.Queue[list[dict[str, Any]] | None] = queue.Queue()
+        self.error: str | None = None
+        self.stopped = False
+        self.workers = 0
+        self.idle_since = time.monotonic()
+        self.condition = threading.Condition()
+        super().__init__(address, CoordinatorRequestHandler)
+
+    def connect(self) -> None:
+        with self.condition:
+            self.workers += 1
+
+    def disconnect(self) -> None:
+        with self.condition:
+            self.workers -= 1
+            if not self.workers:
+                self.idle_since = time.monotonic()
+
+    def get_results(self) -> list[dict[str, Any]]:
+        """
+        Wait for the results of the next completed batch. Raises
+        CoordinatorError if a worker reports an error, or if no worker has been
+        connected for IDLE_TIMEOUT seconds.
+        """
+
+        while True:
+            with self.condition:
+                timeout: float = IDLE_TIMEOUT
+                if not self.workers:
+                    timeout += self.idle_since - time.monotonic()
+                    if timeout <= 0:
+                        raise CoordinatorError(
+                            f"No workers connected in {IDLE_TIMEOUT} seconds"
+                        )
+            try:
+                results = self.results.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if results is None:
+                raise CoordinatorError(f"Worker error: {self.error}")
+            return results
+
+    def take(self) -> int | None:
+        """
+        Take the next batch to hand out. If all batches have been handed out,
+        this waits for the workers that have them, as their batches are given
+        back if they die. Returns None once there is nothing left to do.
+        """
+
+        with self.condition:
+            while not self.pending and self.remaining and not self.stopped:
+                self.condition.wait()
+            if self.stopped or not self.pending:
+                return None
+            return self.pending.popleft()
+
+    def complete(self, batch: int, results: list[dict[str, Any]]) -> None:
+        with self.condition:
+            self.remaining -= 1
+            self.condition.notify_all()
+        self.results.put(results)
+
+    def give_back(self, batch: int) -> None:
+        with self.condition:
+            self.pending.appendleft(batch)
+            self.condition.notify_all()
+
+    def fail(self, error: str) -> None:
+        with self.condition:
+            self.error = error
+            self.stopped = True
+            self.condition.notify_all()
+        self.results.put(None)
+
+    def stop(self) -> None:
+        """Tell workers that are waiting for work that the run is over"""
+
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+
+class CoordinatorRequestHandler(socketserver.StreamRequestHandler):
+    server: Coordinator
+    timeout = WORKER_TIMEOUT
+
+    def handle(self) -> None:
+        batch = None
+        self.server.connect()
+        try:
+            while (batch := self.server.take()) is not None:
+                send_message(
+                    self.wfile,
+                    {
+                        "type": "batch",
+                        "checks": self.server.checks,
+                        "modules": self.server.batches[batch],
+                    },
+                )
+                reply = receive_message(self.rfile)
+                if reply is None:
+                    return
+                if "error" in reply:
+                    self.server.fail(f"{self.client_address[0]}: {reply['error']}")
+                    return
+                self.server.complete(batch, reply["results"])
+                batch = None
+            send_message(self.wfile, {"type": "done"})
+        except (OSError, ValueError):
+            # The worker died, timed out or sent garbage
+            pass
+        finally:
+            if batch is not None:
+                self.server.give_back(batch)
+            self.server.disconnect()
+
+
+def receive_results(
+    server: Coordinator,
+) -> Iterator[tuple[int, tuple[list[Violation], float | None]]]:
+    """
+    Yield the violations and duration of each module by its index, as the
+    batches are completed
+    """
+
+    for _ in server.batches:
+        for result in server.get_results():
+            violations = [
+                Violation(line, column, Code(code), message)
+                for line, column, code, message in result["violations"]
+            ]
+            yield result["index"], (violations, result["duration"])
+
+
+def get_relative_path(module: Module, project_root: Path) -> str:
+    return Path(os.path.relpath(module.path.resolve(), project_root)).as_posix()
+
+
+def lint_distributed(
+    modules: Sequence[Module],
+    checks: list[str] | None,
+    address: tuple[str, int],
+    costs: CostHistory,
+    *,
+    ordered: bool = True,
+) -> Generator[tuple[Module, list[Violation], float | None], None, None]:
+    """
+    Lint modules in workers connecting to the given address, yielding the same
+    results as lint_in_parallel. Batches are made from the modules ordered by
+    their recorded cost, most expensive first. Closing the generator sends the
+    workers away. Raises CoordinatorError if a worker reports an error, or if
+    no worker has been connected for IDLE_TIMEOUT seconds.
+    """
+
+    project_root = find_project_root(modules[0].path) if modules else Path.cwd()
+    tasks = [
+        {
+            "index": index,
+            "path": get_relative_path(module, project_root),
+            "module": module.module,
+            "name": module.name,
+            "config": get_config_hash(
+                get_component_config(module.path.parent),
+                get_project_config(module.path.parent),
+            ),
+        }
+        for index, module in order_by_cost(modules, costs)
+    ]
+    batches = [
+        tasks[start : start + BATCH_SIZE] for start in range(0, len(tasks), BATCH_SIZE)
+    ]
+
+    with Coordinator(address, batches, checks) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host, port = server.socket.getsockname()[:2]
+        print(f"Waiting for workers on {host}:{port}", file=sys.stderr, flush=True)
+
+        try:
+            results = receive_results(server)
+            for index, (violations, duration) in (
+                in_order(results) if ordered else results
+            ):
+                yield modules[index], violations, duration
+        finally:
+            server.stop()
+            server.shutdown()
+
+
+def connect(address: tuple[str, int], timeout: float) -> socket.socket:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection(address)
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def lint_task(
+    task: dict[str, Any],
+    project_root: Path,
+    checks: list[str] | None,
+    store: ResultStore,
+) -> dict[str, Any]:
+    start = time.perf_counter()
+    module = Module(
+        module=task["module"], name=task["name"], path=project_root / task["path"]
+    )
+    component_config = get_component_config(module.path.parent)
+    project_config = get_project_config(module.path.parent)
+    if get_config_hash(component_config, project_config) != task["config"]:
+        raise ValueError(f"The configs for {task['path']} differ from the coordinator")
+
+    violations, stored = check_module_with_store(
+        module,
+        get_checkers(checks),
+        store,
+        component_config=component_config,
+        project_config=project_config,
+    )
+    return {
+        "index": task["index"],
+        "violations": [
+            [line, column, code.value, message]
+            for line, column, code, message in violations
+        ],
+        "duration": None if stored else time.perf_counter() - start,
+    }
+
+
+def run_worker(
+    address: tuple[str, int],
+    project_root: Path,
+    *,
+    connect_timeout: float = CONNECT_TIMEOUT,
+) -> int:
+    """
+    Lint batches handed out by a coordinator until it's done, returning the
+    number of modules linted. Results are looked up in and added to the result
+    store, which can be shared with other workers through OIDA_CACHE_DIR.
+    Raises CoordinatorError if the coordinator can't be reached, or if a batch
+    can't be linted for any reason, after reporting the error to the
+    coordinator.
+    """
+
+    project_root = find_project_root(project_root)
+    store = ResultStore(get_store_dir(project_root))
+    try:
+        client = connect(address, connect_timeout)
+    except OSError as e:
+        raise CoordinatorError(
+            f"Could not connect to the coordinator at {address[0]}:{address[1]}: {e}"
+        )
+
+    linted = 0
+    with client, client.makefile("rb") as rfile, client.makefile("wb") as wfile:
+        while (message := receive_message(rfile)) and message["type"] == "batch":
+            try:
+                results = [
+                    lint_task(task, project_root, message["checks"], store)
+                    for task in message["modules"]
+                ]
+            except Exception as e:
+                with contextlib.suppress(OSError):
+                    send_message(wfile, {"error": f"{type(e).__name__}: {e}"})
+                raise CoordinatorError(f"Could not lint batch: {e}") from e
+            send_message(wfile, {"results": results})
+            linted += len(results)
+    return linted
@@ -0,0 +1,134 @@
+"""
+Facts about a module that the checks are decided from, extracted in a single
+pass over the module that doesn't depend on any configs. Facts are kept in the
+result store by the contents of the module, and the config-dependent rules
+(component ALLOWED_IMPORTS, and allowed_imports and ignored_modules in the
+project config) are applied to them on every run. Changing a config therefore
+doesn't require parsing any modules again.
+
+The checks other than component isolation only depend on the contents and
+name of a module, so their facts are the violations they found.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+from .checkers import ComponentIsolationChecker, Violation
+from .checkers.base import Checker, Code
+from .checkers.components import Reference
+from .config import ComponentConfig, ProjectConfig
+
+
+def serialize_violations(violations: Iterable[Violation]) -> list[list[Any]]:
+    return [
+        [line, column, code.value, message]
+        for line, column, code, message in violations
+    ]
+
+
+def deserialize_violations(data: Iterable[list[Any]]) -> list[Violation]:
+    return [
+        Violation(line, column, Code(code), message)
+        for line, column, code, message in data
+    ]
+
+
+@dataclass
+class ModuleFacts:
+    # References to private names from other apps
+    references: list[Reference]
+    # Violations of the checks that don't depend on configs, by check
+    violations: dict[str, list[Violation]]
+
+    @classmethod
+    def from_checkers(cls, checkers: Iterable[Checker]) -> "ModuleFacts":
+        """Get the facts collected by checkers that have visited a module"""
+
+        references: list[Reference] = []
+        violations: dict[str, list[Violation]] = {}
+        for checker in checkers:
+            if isinstance(checker, ComponentIsolationChecker):
+                references = checker.references
+            else:
+                violations[checker.slug] = checker.violations
+        return cls(references, violations)
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            "references": [list(reference) for reference in self.references],
+            "violations": {
+                slug: serialize_violations(violations)
+                for slug, violations in self.violations.items()
+            },
+        }
+
+    @classmethod
+    def deserialize(cls, data: dict[str, Any]) -> "ModuleFacts":
+        return cls(
+            [Reference(*reference) for reference in data["references"]],
+            {
+                slug: deserialize_violations(violations)
+                for slug, violations in data["violations"].items()
+            },
+        )
+
+    def get_lines(self) -> set[int]:
+        """Get the lines that references or violations are on"""
+
+        return {reference.line for reference in self.references} | {
+            violation.line
+            for violations in self.violations.values()
+            for violation in violations
+        }
+
+    def get_isolation_checker(
+        self,
+        module: str | None,
+        name: str,
+        component_config: ComponentConfig | None,
+        project_config: ProjectConfig,
+    ) -> ComponentIsolationChecker:
+        """Get a component isolation checker that has checked the references"""
+
+        checker = ComponentIsolationChecker(
+            module, name, component_config, project_config
+        )
+        checker.check_references(self.references)
+        return checker
+
+    def get_violations(
+        self,
+        checkers: Sequence[type[Checker]],
+        module: str | None,
+        name: str,
+        component_config: ComponentConfig | None,
+        project_config: ProjectConfig,
+    ) -> list[Violation]:
+        """
+        Get the violations of the given checkers, in the same order as running
+        the checkers on the module would give them
+        """
+
+        violations: list[Violation] = []
+        for checker_cls in checkers:
+            if issubclass(checker_cls, ComponentIsolationChecker):
+                violations.extend(
+                    self.get_isolation_checker(
+                        module, name, component_config, project_config
+                    ).violations
+                )
+            else:
+                violations.extend(self.violations[checker_cls.slug])
+        return violations
+
+    def get_referenced_imports(
+        self, module: str | None, name: str, project_config: ProjectConfig
+    ) -> set[str]:
+        """
+        Get the imports referenced by the module, regardless of the component
+        config
+        """
+
+        return self.get_isolation_checker(
+            module, name, None, project_config
+        ).referenced_imports
@@ -0,0 +1,52 @@
+"""
+Fingerprints identify a violation independently of where exactly it is in a
+file, so that violations can be matched between two revisions even if lines
+were added or removed above them. A fingerprint is made from the code, the
+module, the message and the lines around the violation.
+"""
+
+import hashlib
+import re
+from typing import Sequence
+
+from .checkers import Violation
+
+# Number of lines before and after a violation included in its context
+CONTEXT_LINES = 1
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize whitespace and numbers in a message, which may change without
+    the violation itself changing
+    """
+
+    return re.sub(r"\d+", "#", " ".join(message.split()))
+
+
+def get_context_hash(source_lines: Sequence[str], line: int) -> str:
+    """
+    Hash the lines around a line (1-indexed), ignoring indentation and
+    trailing whitespace. Lines past the start or end of the file count as
+    blank lines.
+    """
+
+    context = "\n".join(
+        source_lines[index].strip() if 0 <= index < len(source_lines) else ""
+        for index in range(line - 1 - CONTEXT_LINES, line + CONTEXT_LINES)
+    )
+    return hashlib.sha1(context.encode()).hexdigest()[:16]
+
+
+def get_fingerprint(
+    violation: Violation, module: str | None, name: str, context_hash: str
+) -> str:
+    return "\0".join(
+        (
+            f"ODA{violation.code.value:03d}",
+            module or "",
+            name,
+            normalize_message(violation.message),
+            context_hash,
+        )
+    )
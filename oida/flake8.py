@@ -3,12 +3,22 @@ This defines a flake8 plugin, so Oida can be run through flake8.
 """
 
 import ast
+import multiprocessing.util
 from importlib.metadata import version
 from pathlib import Path
 from typing import Any, Generator, Type
 
 from .checkers import get_checkers
-from .discovery import get_component_config, get_module, get_project_config
+from .discovery import (
+    get_component_config,
+    get_module,
+    get_project_config,
+    get_snapshot,
+)
+from .snapshot import ProjectSnapshot
+
+# Snapshots that will be saved when this process exits
+_saved_on_exit: set[ProjectSnapshot] = set()
 
 
 class Plugin:
@@ -25,6 +35,14 @@ class Plugin:
         self._component_config = get_component_config(path.parent)
         self._project_config = get_project_config(path.parent)
 
+        # flake8 workers don't run atexit handlers, but do run multiprocessing
+        # finalizers when the pool is closed, so save any project layout
+        # discovered by this worker once it's done
+        snapshot = get_snapshot(path.parent)
+        if snapshot not in _saved_on_exit:
+            _saved_on_exit.add(snapshot)
+            multiprocessing.util.Finalize(snapshot, snapshot.save, exitpriority=0)
+
     def run(self) -> Generator[tuple[int, int, str, Type[Any]], None, None]:
         for checker_cls in get_checkers():
             checker = checker_cls(
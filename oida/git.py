@@ -0,0 +1,223 @@
+import subprocess
+from pathlib import Path
+from types import TracebackType
+from typing import NamedTuple
+
+
+class GitError(Exception):
+    pass
+
+
+def git(*args: str, cwd: Path) -> str:
+    """
+    Run a git command and return its output.
+    """
+
+    process = subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, encoding="utf-8"
+    )
+    if process.returncode != 0:
+        raise GitError(process.stderr.strip())
+    return process.stdout
+
+
+def get_repository_root(path: Path) -> Path:
+    return Path(git("rev-parse", "--show-toplevel", cwd=path).strip())
+
+
+def get_merge_base(ref: str, cwd: Path) -> str:
+    return git("merge-base", ref, "HEAD", cwd=cwd).strip()
+
+
+def get_changed_files(ref: str, cwd: Path) -> list[Path]:
+    """
+    Get the files that have changed in the working tree since the merge base
+    of the given ref and HEAD.
+    """
+
+    root = get_repository_root(cwd)
+    merge_base = get_merge_base(ref, root)
+    names = git("diff", "--name-only", "--no-renames", merge_base, cwd=root)
+    return [root / name for name in names.splitlines() if name]
+
+
+def get_staged_blobs(cwd: Path) -> dict[str, str]:
+    """
+    Get the files that are staged to be committed, added or modified, with the
+    ids of their blobs in the index. Paths are relative to the repository
+    root.
+    """
+
+    output = git(
+        "diff",
+        "--cached",
+        "--raw",
+        "-z",
+        "--no-abbrev",
+        "--no-renames",
+        "--diff-filter=d",
+        cwd=cwd,
+    )
+    fields = output.split("\0")
+    blobs = {}
+    for header, path in zip(fields[::2], fields[1::2]):
+        _, mode, _, sha, _ = header.split(" ")
+        if mode in ("100644", "100755") and sha.strip("0"):
+            blobs[path] = sha
+    return blobs
+
+
+def get_index_blobs(cwd: Path, *pathspecs: str) -> dict[str, str]:
+    """
+    Get the ids of the blobs in the index of the files matching the given
+    pathspecs. Paths are relative to the repository root.
+    """
+
+    output = git("ls-files", "--stage", "--full-name", "-z", "--", *pathspecs, cwd=cwd)
+    blobs = {}
+    for entry in output.split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        mode, sha, stage = info.split(" ")
+        if stage == "0" and mode in ("100644", "100755"):
+            blobs[path] = sha
+    return blobs
+
+
+def get_tree_blobs(rev: str, cwd: Path) -> dict[str, str]:
+    """
+    Get the ids of the blobs of all files in a revision. Paths are relative to
+    the repository root.
+    """
+
+    output = git("ls-tree", "-r", "-z", "--full-tree", rev, cwd=cwd)
+    blobs = {}
+    for entry in output.split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        mode, _, sha = info.split(" ")
+        if mode in ("100644", "100755"):
+            blobs[path] = sha
+    return blobs
+
+
+def get_commits(rev_range: str, cwd: Path) -> list[str]:
+    """
+    Get the commits in a revision range, oldest first.
+    """
+
+    return git("rev-list", "--reverse", rev_range, cwd=cwd).split()
+
+
+class TreeEntry(NamedTuple):
+    mode: str
+    name: str
+    sha: str
+
+    @property
+    def is_tree(self) -> bool:
+        return self.mode == "40000"
+
+    @property
+    def is_file(self) -> bool:
+        return self.mode in ("100644", "100755")
+
+
+class ObjectReader:
+    """
+    Read objects from a git repository through a single long running
+    `git cat-file --batch` process, instead of starting a process (or checking
+    out files) for every object. Trees are parsed once and kept in memory, as
+    most of them are shared between commits.
+    """
+
+    def __init__(self, cwd: Path) -> None:
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self.trees: dict[str, list[TreeEntry]] = {}
+
+    def __enter__(self) -> "ObjectReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.process.stdin:
+            self.process.stdin.close()
+        self.process.wait()
+        if self.process.stdout:
+            self.process.stdout.close()
+
+    def read(self, name: str) -> tuple[str, bytes]:
+        """
+        Read an object, returning its type and contents.
+        """
+
+        assert self.process.stdin and self.process.stdout
+        self.process.stdin.write(f"{name}\n".encode())
+        self.process.stdin.flush()
+
+        header = self.process.stdout.readline().decode().split()
+        if len(header) != 3:
+            raise GitError(f"Object not found: {name}")
+
+        _, object_type, size = header
+        data = self.process.stdout.read(int(size))
+        self.process.stdout.read(1)  # Trailing newline
+        return object_type, data
+
+    def read_tree(self, sha: str) -> list[TreeEntry]:
+        if (entries := self.trees.get(sha)) is not None:
+            return entries
+
+        object_type, data = self.read(sha)
+        if object_type != "tree":
+            raise GitError(f"Not a tree: {sha}")
+
+        entries = []
+        offset = 0
+        while offset < len(data):
+            space = data.index(b" ", offset)
+            null = data.index(b"\0", space)
+            entries.append(
+                TreeEntry(
+                    mode=data[offset:space].decode(),
+                    name=data[space + 1 : null].decode(errors="surrogateescape"),
+                    sha=data[null + 1 : null + 21].hex(),
+                )
+            )
+            offset = null + 21
+
+        self.trees[sha] = entries
+        return entries
+
+    def read_commit(self, name: str) -> tuple[str, int]:
+        """
+        Read a commit, returning its tree and commit timestamp.
+        """
+
+        object_type, data = self.read(name)
+        if object_type != "commit":
+            raise GitError(f"Not a commit: {name}")
+
+        tree = ""
+        timestamp = 0
+        for line in data.split(b"\n\n", 1)[0].decode().splitlines():
+            key, _, value = line.partition(" ")
+            if key == "tree":
+                tree = value
+            elif key == "committer":
+                timestamp = int(value.rsplit(" ", 2)[1])
+        return tree, timestamp
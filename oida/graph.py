@@ -0,0 +1,437 @@
+"""
+A persisted index of the first-party imports of every module in a project.
+
+Imported names are interned in a string table and the imports of each module
+are stored as a flat array of (name, line) pairs. The index is updated one file
+at a time, using mtime and size to detect which files have changed.
+
+Imports in `if TYPE_CHECKING:` blocks are only used by type checkers, and are
+kept apart from the imports made at runtime. They're left out of the graph
+unless asked for, so they don't show up as cycles, affect other modules or add
+to import costs.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, NamedTuple
+
+from .cache import get_cache_file
+from .checkers.base import Checker
+from .config import ProjectConfig
+from .discovery import find_modules, find_project_root
+from .module import Module
+from .snapshot import RACY_WINDOW_NS
+from .utils import write_atomic
+
+GRAPH_FILE_NAME = "imports"
+GRAPH_MAGIC = b"OIDAIG3\n"
+
+
+class Import(NamedTuple):
+    name: str
+    line: int
+
+
+class Edge(NamedTuple):
+    source: str
+    target: str
+    line: int
+
+
+class FileEntry(NamedTuple):
+    module: int
+    mtime_ns: int
+    size: int
+    nodes: int
+    imports: array[int]
+    typing_imports: array[int]
+
+
+class ImportCollector(Checker):
+    """
+    Collect the fully qualified names imported by a module. Third party
+    imports are ignored, using the same rules as ComponentIsolationChecker,
+    while relative imports are resolved to absolute names. Imports in
+    `if TYPE_CHECKING:` blocks are collected separately.
+    """
+
+    slug = "imports"
+
+    def __init__(self, module: str | None, name: str) -> None:
+        super().__init__(module, name, None, ProjectConfig())
+        self.imports: list[Import] = []
+        self.typing_imports: list[Import] = []
+        self.in_type_checking = False
+
+    def add_import(self, name: str, line: int) -> None:
+        (self.typing_imports if self.in_type_checking else self.imports).append(
+            Import(name, line)
+        )
+
+    def visit_If(self, node: ast.If) -> None:
+        test = node.test
+        if not (
+            (isinstance(test, ast.Name) and test.id == "TYPE_CHECKING")
+            or (isinstance(test, ast.Attribute) and test.attr == "TYPE_CHECKING")
+        ):
+            self.generic_visit(node)
+            return
+
+        in_type_checking = self.in_type_checking
+        self.in_type_checking = True
+        for statement in node.body:
+            self.visit(statement)
+        self.in_type_checking = in_type_checking
+        for statement in node.orelse:
+            self.visit(statement)
+
+    def is_first_party(self, name: str) -> bool:
+        return (
+            bool(self.module)
+            and name.split(".", 1)[0] == (self.module or "").split(".", 1)[0]
+        )
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.level > 0:
+            base = self.resolve_relative_import(node.module, node.level)
+        else:
+            base = node.module
+
+        if not base or not self.is_first_party(base):
+            return
+
+        for name in node.names:
+            full_name = base if name.name == "*" else f"{base}.{name.name}"
+            self.add_import(full_name, node.lineno)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for name in node.names:
+            if self.is_first_party(name.name):
+                self.add_import(name.name, node.lineno)
+
+
+def get_module_name(module: Module) -> str:
+    """Get the fully qualified name of a module"""
+
+    if module.module and module.name:
+        return f"{module.module}.{module.name}"
+    return module.module or module.name
+
+
+class ImportGraph:
+    """
+    The import graph of a project. Nodes are modules and edges are the
+    first-party imports between them.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self.names: list[str] = []
+        self.name_ids: dict[str, int] = {}
+        self.files: dict[str, FileEntry] = {}
+        self._modules: dict[str, str] | None = None
+
+    def intern(self, name: str) -> int:
+        if (name_id := self.name_ids.get(name)) is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    @classmethod
+    def load(cls, path: Path | None) -> ImportGraph:
+        graph = cls(path)
+        if path is None:
+            return graph
+
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return graph
+
+        if not data.startswith(GRAPH_MAGIC):
+            return graph
+
+        offset = len(GRAPH_MAGIC)
+        (header_size,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        header = json.loads(data[offset : offset + header_size])
+        offset += header_size
+
+        imports = array("I")
+        imports.frombytes(data[offset:])
+        if sys.byteorder != "little":
+            imports.byteswap()
+
+        graph.names = header["names"]
+        graph.name_ids = {name: i for i, name in enumerate(graph.names)}
+        for fields in header["files"]:
+            file_path, module, mtime_ns, size, nodes, start, middle, end = fields
+            graph.files[file_path] = FileEntry(
+                module,
+                mtime_ns,
+                size,
+                nodes,
+                imports[start:middle],
+                imports[middle:end],
+            )
+        return graph
+
+    def save(self) -> None:
+        """
+        Write the graph to disk. If it can't be written, it's kept in memory
+        only from then on.
+        """
+
+        if self.path is None:
+            return
+
+        self.compact()
+
+        imports = array("I")
+        files = []
+        for file_path, entry in self.files.items():
+            start = len(imports)
+            imports.extend(entry.imports)
+            middle = len(imports)
+            imports.extend(entry.typing_imports)
+            files.append(
+                [
+                    file_path,
+                    entry.module,
+                    entry.mtime_ns,
+                    entry.size,
+                    entry.nodes,
+                    start,
+                    middle,
+                    len(imports),
+                ]
+            )
+        if sys.byteorder != "little":
+            imports.byteswap()
+
+        header = json.dumps({"names": self.names, "files": files}).encode()
+        data = b"".join(
+            (GRAPH_MAGIC, struct.pack("<I", len(header)), header, imports.tobytes())
+        )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, data)
+        except OSError:
+            self.path = None
+
+    def compact(self) -> None:
+        """Remove names from the string table that are no longer referenced"""
+
+        used = {entry.module for entry in self.files.values()}
+        for entry in self.files.values():
+            used.update(entry.imports[::2])
+            used.update(entry.typing_imports[::2])
+        if len(used) == len(self.names):
+            return
+
+        remap = {old_id: new_id for new_id, old_id in enumerate(sorted(used))}
+        self.names = [self.names[old_id] for old_id in sorted(used)]
+        self.name_ids = {name: i for i, name in enumerate(self.names)}
+
+        def remap_imports(imports: array[int]) -> array[int]:
+            result = array("I", imports)
+            result[::2] = array("I", (remap[name] for name in imports[::2]))
+            return result
+
+        for file_path, entry in self.files.items():
+            self.files[file_path] = entry._replace(
+                module=remap[entry.module],
+                imports=remap_imports(entry.imports),
+                typing_imports=remap_imports(entry.typing_imports),
+            )
+
+    def update(self, modules: Iterable[Module]) -> int:
+        """
+        Update the graph with the given modules, parsing only the files that
+        have changed since they were indexed. Files that no longer exist are
+        removed. Returns the number of files that were parsed or removed.
+        """
+
+        seen: set[str] = set()
+        parsed = 0
+        now = time.time_ns()
+
+        for module in modules:
+            key = os.path.abspath(module.path)
+            seen.add(key)
+            try:
+                stat = os.stat(key)
+            except FileNotFoundError:
+                continue
+
+            entry = self.files.get(key)
+            if (
+                entry is not None
+                and entry.mtime_ns == stat.st_mtime_ns
+                and entry.size == stat.st_size
+                and now - entry.mtime_ns >= RACY_WINDOW_NS
+            ):
+                continue
+
+            self.files[key] = self.index_module(module, stat.st_mtime_ns, stat.st_size)
+            parsed += 1
+
+        for key in self.files.keys() - seen:
+            if not os.path.exists(key):
+                del self.files[key]
+                parsed += 1
+
+        self._modules = None
+        return parsed
+
+    def index_module(self, module: Module, mtime_ns: int, size: int) -> FileEntry:
+        collector = ImportCollector(module.module, module.name)
+        nodes = 0
+        try:
+            tree = module.ast
+        except SyntaxError:
+            pass
+        else:
+            collector.visit(tree)
+            nodes = sum(1 for _ in ast.walk(tree))
+
+        imports = array("I")
+        for name, line in collector.imports:
+            imports.extend((self.intern(name), line))
+        typing_imports = array("I")
+        for name, line in collector.typing_imports:
+            typing_imports.extend((self.intern(name), line))
+
+        return FileEntry(
+            self.intern(get_module_name(module)),
+            mtime_ns,
+            size,
+            nodes,
+            imports,
+            typing_imports,
+        )
+
+    @property
+    def modules(self) -> dict[str, str]:
+        """Mapping from module name to file path"""
+
+        if self._modules is None:
+            self._modules = {
+                self.names[entry.module]: file_path
+                for file_path, entry in self.files.items()
+            }
+        return self._modules
+
+    def imports(self, module: str, *, typing: bool = False) -> list[Import]:
+        """
+        Get the names imported by the given module at runtime, and also the
+        names only imported for type checking if typing is set
+        """
+
+        if (file_path := self.modules.get(module)) is None:
+            return []
+
+        entry = self.files[file_path]
+        imports = entry.imports + entry.typing_imports if typing else entry.imports
+        return [
+            Import(self.names[imports[i]], imports[i + 1])
+            for i in range(0, len(imports), 2)
+        ]
+
+    def resolve(self, name: str) -> str | None:
+        """
+        Get the module an imported name refers to, which is the longest prefix
+        of the name that is a module in the graph.
+        """
+
+        path = name.split(".")
+        while path:
+            if (module := ".".join(path)) in self.modules:
+                return module
+            path = path[:-1]
+        return None
+
+    def edges(self, *, typing: bool = False) -> Iterator[Edge]:
+        """
+        Iterate over the imports between modules in the graph, including the
+        ones only made for type checking if typing is set
+        """
+
+        for module in self.modules:
+            for name, line in self.imports(module, typing=typing):
+                if (target := self.resolve(name)) and target != module:
+                    yield Edge(module, target, line)
+
+
+def strongly_connected_components(
+    graph: Mapping[str, Iterable[str]]
+) -> list[list[str]]:
+    """
+    Find the strongly connected components in a graph using Tarjan's
+    algorithm. Runs in linear time, without recursion so that deep graphs
+    don't exhaust the stack. Components are returned in reverse topological
+    order: every component comes after the components it imports.
+    """
+
+    index: dict[str, int] = {}
+    lowlink: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    components: list[list[str]] = []
+
+    def push(node: str) -> Iterator[str]:
+        index[node] = lowlink[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+        return iter(sorted(graph.get(node, ())))
+
+    for root in sorted(graph):
+        if root in index:
+            continue
+
+        work = [(root, push(root))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    work.append((successor, push(successor)))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component: list[str] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+
+    return components
+
+
+def build_import_graph(*paths: Path) -> ImportGraph:
+    """
+    Load the import graph of the project the given paths belong to from the
+    cache, update it with any changed files and save it.
+    """
+
+    project_root = find_project_root(paths[0])
+    graph = ImportGraph.load(get_cache_file(project_root, GRAPH_FILE_NAME))
+    if graph.update(find_modules(*paths)):
+        graph.save()
+    return graph
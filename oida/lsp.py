@@ -0,0 +1,340 @@
+"""
+A language server that speaks the Language Server Protocol over stdio, so that
+editors can show violations while typing. Open documents are linted from their
+contents in memory, and component and project configs stay cached for as long
+as the server runs. Saving a confcomponent.py file only invalidates the
+configs of the directories below it.
+
+Only full document sync is supported, which is what most clients default to.
+The server is single threaded: input is polled with a timeout, so that lint
+runs can be debounced without having to lock the caches used by discovery.
+"""
+
+import json
+import os
+import select
+import sys
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Sequence
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from .checkers import Violation, get_checkers
+from .commands.linter import check_module
+from .discovery import (
+    check_file,
+    get_component_config,
+    get_project_config,
+    invalidate_component_configs,
+)
+
+# Seconds to wait after the last change to a document before linting it
+DEBOUNCE_DELAY = 0.3
+
+# See https://microsoft.github.io/language-server-protocol/specification
+TEXT_DOCUMENT_SYNC_FULL = 1
+SEVERITY_WARNING = 2
+MESSAGE_TYPE_ERROR = 1
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+
+
+def uri_to_path(uri: str) -> Path:
+    return Path(url2pathname(urlparse(uri).path))
+
+
+class MessageReader:
+    """
+    Splits input into messages, which are JSON documents preceded by a
+    Content-Length header. Reads straight from the file descriptor, so that
+    select() can be trusted to tell whether there is more input.
+
+    Messages without a valid Content-Length header or with a body that isn't
+    JSON are skipped, and described in errors for the server to log.
+    """
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+        self.buffer = b""
+        self.errors: list[str] = []
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def read(self) -> list[dict[str, Any]] | None:
+        """
+        Read the available input and return the complete messages in it.
+        Returns None at the end of the input.
+        """
+
+        data = os.read(self.fd, 65536)
+        if not data:
+            return None
+        self.buffer += data
+
+        messages = []
+        while (end := self.buffer.find(b"\r\n\r\n")) != -1:
+            headers = {}
+            for line in self.buffer[:end].split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                headers[name.strip().lower()] = value.strip()
+            start = end + 4
+            try:
+                length = int(headers[b"content-length"])
+            except (KeyError, ValueError):
+                # Without a length the body can't be found, so skip to the
+                # next header
+                self.errors.append("Skipped message without a valid Content-Length")
+                self.buffer = self.buffer[start:]
+                continue
+            if len(self.buffer) < start + length:
+                break
+            body = self.buffer[start : start + length]
+            self.buffer = self.buffer[start + length :]
+            try:
+                message = json.loads(body)
+            except ValueError as e:
+                self.errors.append(f"Skipped message that isn't valid JSON: {e}")
+                continue
+            if isinstance(message, dict):
+                messages.append(message)
+            else:
+                self.errors.append("Skipped message that isn't a JSON object")
+        return messages
+
+
+def write_message(output: BinaryIO, message: dict[str, Any]) -> None:
+    body = json.dumps({"jsonrpc": "2.0", **message}).encode()
+    output.write(f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    output.flush()
+
+
+def get_utf16_column(line: str, column: int) -> int:
+    """
+    Convert a column in UTF-8 bytes, as given by the parser, to UTF-16 code
+    units, which is what positions are counted in by LSP
+    """
+
+    prefix = line.encode()[:column].decode(errors="ignore")
+    return len(prefix.encode("utf-16-le")) // 2
+
+
+def get_diagnostic(violation: Violation, lines: Sequence[str]) -> dict[str, Any]:
+    column = violation.column
+    if 0 < violation.line <= len(lines):
+        column = get_utf16_column(lines[violation.line - 1], column)
+    position = {"line": violation.line - 1, "character": column}
+    return {
+        "range": {"start": position, "end": position},
+        "severity": SEVERITY_WARNING,
+        "code": f"ODA{violation.code.value:03d}",
+        "source": "oida",
+        "message": violation.message,
+    }
+
+
+class LanguageServer:
+    def __init__(
+        self,
+        output: BinaryIO,
+        *,
+        checks: list[str] | None = None,
+        delay: float = DEBOUNCE_DELAY,
+    ) -> None:
+        self.output = output
+        self.checkers = get_checkers(checks)
+        self.delay = delay
+        # Contents of the open documents, by URI
+        self.documents: dict[str, str] = {}
+        # Documents waiting to be linted, with the time to lint them at
+        self.pending: dict[str, float] = {}
+        self.shutting_down = False
+        self.exited = False
+
+    def handle(self, message: dict[str, Any]) -> None:
+        """
+        Handle a message from the client. Errors are logged, and sent back as
+        the response to requests, so the server keeps serving.
+        """
+
+        try:
+            self.dispatch(message)
+        except Exception as e:  # Keep serving the other messages
+            error = f"{type(e).__name__}: {e}"
+            self.log_error(f"Failed to handle {message.get('method')}: {error}")
+            if "id" in message:
+                write_message(
+                    self.output,
+                    {
+                        "id": message["id"],
+                        "error": {"code": INTERNAL_ERROR, "message": error},
+                    },
+                )
+
+    def dispatch(self, message: dict[str, Any]) -> None:
+        method = message.get("method")
+        params = message.get("params") or {}
+
+        if method is None:
+            # A response to a request from the server, we don't send any
+            return
+
+        if "id" in message:
+            self.handle_request(message["id"], method, params)
+        elif method == "textDocument/didOpen":
+            document = params["textDocument"]
+            self.documents[document["uri"]] = document["text"]
+            self.pending[document["uri"]] = time.monotonic()
+        elif method == "textDocument/didChange":
+            uri = params["textDocument"]["uri"]
+            self.documents[uri] = params["contentChanges"][-1]["text"]
+            self.pending[uri] = time.monotonic() + self.delay
+        elif method == "textDocument/didSave":
+            self.file_changed(uri_to_path(params["textDocument"]["uri"]))
+        elif method == "workspace/didChangeWatchedFiles":
+            for change in params["changes"]:
+                self.file_changed(uri_to_path(change["uri"]))
+        elif method == "textDocument/didClose":
+            uri = params["textDocument"]["uri"]
+            self.documents.pop(uri, None)
+            self.pending.pop(uri, None)
+            self.publish(uri, [])
+        elif method == "exit":
+            self.exited = True
+
+    def handle_request(self, id: int | str, method: str, params: Any) -> None:
+        result: Any = None
+        if method == "initialize":
+            result = {
+                "capabilities": {
+                    "textDocumentSync": {
+                        "openClose": True,
+                        "change": TEXT_DOCUMENT_SYNC_FULL,
+                        "save": True,
+                    }
+                },
+                "serverInfo": {"name": "oida"},
+            }
+        elif method == "shutdown":
+            self.shutting_down = True
+        else:
+            write_message(
+                self.output,
+                {
+                    "id": id,
+                    "error": {
+                        "code": METHOD_NOT_FOUND,
+                        "message": f"Unknown method: {method}",
+                    },
+                },
+            )
+            return
+        write_message(self.output, {"id": id, "result": result})
+
+    def file_changed(self, path: Path) -> None:
+        """
+        Drop the cached configs that depend on a file that was saved or
+        changed on disk, and lint the open documents affected by it again.
+        """
+
+        if path.name == "confcomponent.py":
+            invalidate_component_configs(path.parent)
+            directory = str(path.parent) + os.sep
+        elif path.name == "pyproject.toml":
+            get_project_config.cache_clear()
+            directory = str(path.parent) + os.sep
+        else:
+            return
+
+        now = time.monotonic()
+        for uri in self.documents:
+            if str(uri_to_path(uri)).startswith(directory):
+                self.pending[uri] = now
+
+    def lint(self, uri: str) -> list[dict[str, Any]]:
+        path = uri_to_path(uri)
+        if path.suffix not in (".py", ".pyi"):
+            return []
+
+        module = check_file(path, content=self.documents[uri])
+        try:
+            violations = check_module(
+                module,
+                self.checkers,
+                component_config=get_component_config(path.parent),
+                project_config=get_project_config(path.parent),
+            )
+        except SyntaxError:
+            # Expected while typing, and reported by other tools
+            return []
+        return [
+            get_diagnostic(violation, module.source_lines) for violation in violations
+        ]
+
+    def publish(self, uri: str, diagnostics: list[dict[str, Any]]) -> None:
+        write_message(
+            self.output,
+            {
+                "method": "textDocument/publishDiagnostics",
+                "params": {"uri": uri, "diagnostics": diagnostics},
+            },
+        )
+
+    def get_timeout(self) -> float | None:
+        """
+        Get the number of seconds until the next document should be linted
+        """
+
+        if not self.pending:
+            return None
+        return max(0.0, min(self.pending.values()) - time.monotonic())
+
+    def lint_pending(self) -> None:
+        """
+        Lint the documents that haven't been changed for the debounce delay
+        """
+
+        now = time.monotonic()
+        for uri, lint_at in list(self.pending.items()):
+            if lint_at > now:
+                continue
+            del self.pending[uri]
+            try:
+                diagnostics = self.lint(uri)
+            except Exception as e:  # Keep serving the other documents
+                self.log_error(f"Failed to lint {uri}: {type(e).__name__}: {e}")
+            else:
+                self.publish(uri, diagnostics)
+
+    def log_error(self, message: str) -> None:
+        write_message(
+            self.output,
+            {
+                "method": "window/logMessage",
+                "params": {"type": MESSAGE_TYPE_ERROR, "message": message},
+            },
+        )
+
+
+def serve(checks: list[str] | None = None) -> int:
+    """
+    Run the language server on stdin and stdout until the client exits.
+    Returns the exit code, which is 0 only if the client asked the server to
+    shut down first.
+    """
+
+    reader = MessageReader(sys.stdin.fileno())
+    server = LanguageServer(sys.stdout.buffer, checks=checks)
+    while not server.exited:
+        ready, _, _ = select.select([reader], [], [], server.get_timeout())
+        if ready:
+            if (messages := reader.read()) is None:
+                break
+            for error in reader.errors:
+                server.log_error(error)
+            reader.errors.clear()
+            for message in messages:
+                server.handle(message)
+        server.lint_pending()
+    return 0 if server.shutting_down else 1
@@ -0,0 +1,67 @@
+"""
+Output of metrics in the OpenMetrics text format, used by CI to push numbers
+to Prometheus.
+"""
+
+from typing import Iterable, Mapping
+
+Labels = Mapping[str, str]
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsWriter:
+    """
+    Collects metric families in memory, so that they can be written in a
+    single pass once the run is done.
+    """
+
+    def __init__(self, prefix: str = "oida") -> None:
+        self.prefix = prefix
+        self.lines: list[str] = []
+
+    def add(
+        self,
+        name: str,
+        metric_type: str,
+        help: str,
+        samples: Iterable[tuple[Labels, float]],
+        *,
+        unit: str | None = None,
+    ) -> None:
+        """
+        Add a metric family. Counters get the _total suffix on their samples.
+        """
+
+        name = f"{self.prefix}_{name}"
+        self.lines.append(f"# TYPE {name} {metric_type}")
+        if unit:
+            self.lines.append(f"# UNIT {name} {unit}")
+        self.lines.append(f"# HELP {name} {help}")
+
+        sample_name = f"{name}_total" if metric_type == "counter" else name
+        for labels, value in samples:
+            if labels:
+                label_string = ",".join(
+                    f'{key}="{escape_label_value(label)}"'
+                    for key, label in labels.items()
+                )
+                self.lines.append(
+                    f"{sample_name}{{{label_string}}} {format_value(value)}"
+                )
+            else:
+                self.lines.append(f"{sample_name} {format_value(value)}")
+
+    def gauge(self, name: str, help: str, value: float) -> None:
+        self.add(name, "gauge", help, [({}, value)])
+
+    def getvalue(self) -> str:
+        return "\n".join([*self.lines, "# EOF"]) + "\n"
@@ -1,6 +1,68 @@
 import ast
+import re
 from functools import cached_property
 from pathlib import Path
+from typing import Sequence, overload
+
+# Line endings as counted by the parser
+LINE_END = re.compile(rb"\r\n|\r|\n")
+
+
+class SourceLines(Sequence[str]):
+    """
+    The lines of a source file, split the way the parser numbers them. Lines
+    are located the first time they're used, and decoded one at a time.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    @cached_property
+    def spans(self) -> list[tuple[int, int]]:
+        spans = []
+        start = 0
+        for match in LINE_END.finditer(self.data):
+            spans.append((start, match.start()))
+            start = match.end()
+        if start < len(self.data):
+            spans.append((start, len(self.data)))
+        return spans
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        start, end = self.spans[index]
+        return self.data[start:end].decode(errors="replace")
+
+
+class Source:
+    """
+    The contents of a module, read into a single buffer that the syntax tree
+    and the lines are derived from when they're first used
+    """
+
+    def __init__(self, path: Path, data: bytes) -> None:
+        self.path = path
+        self.data = data
+
+    @cached_property
+    def ast(self) -> ast.AST:
+        return ast.parse(self.data, filename=str(self.path))
+
+    @cached_property
+    def lines(self) -> SourceLines:
+        return SourceLines(self.data)
 
 
 class Module:
@@ -11,16 +73,23 @@ class Module:
         self.name = name
         self.path = path
         self.content = content
+        # The hash of the contents of the file, if it has been computed
+        self.content_hash: str | None = None
 
-    @cached_property
-    def ast(self) -> ast.AST:
+    def read(self) -> bytes:
         if self.content is not None:
-            return ast.parse(self.content, filename=str(self.path))
-        return ast.parse(self.path.read_bytes(), filename=str(self.path))
+            return self.content.encode()
+        return self.path.read_bytes()
 
     @cached_property
-    def source_lines(self) -> list[str]:
+    def source(self) -> Source:
+        return Source(self.path, self.read())
+
+    @property
+    def ast(self) -> ast.AST:
+        return self.source.ast
+
+    @property
+    def source_lines(self) -> SourceLines:
         """Get the source code lines for this module."""
-        if self.content is not None:
-            return self.content.splitlines()
-        return self.path.read_text().splitlines()
+        return self.source.lines
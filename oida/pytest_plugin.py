@@ -0,0 +1,89 @@
+"""
+This defines a pytest plugin that only runs the test files affected by a set of
+changed files, based on the imports in the project.
+"""
+
+import functools
+from pathlib import Path
+from typing import Sequence
+
+import pytest
+
+from .commands.affected import Affected, find_affected, is_test_module
+from .discovery import find_root_module, get_module, is_package
+from .git import get_changed_files
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("oida")
+    group.addoption(
+        "--oida-affected-since",
+        metavar="REF",
+        help="Only run tests affected by changes since the merge base of REF",
+    )
+    group.addoption(
+        "--oida-changed-files",
+        metavar="PATH",
+        type=Path,
+        help="Only run tests affected by the files listed (one per line) in PATH",
+    )
+
+
+def get_changed_files_from_options(config: pytest.Config) -> list[Path] | None:
+    if ref := config.getoption("oida_affected_since"):
+        return get_changed_files(ref, config.rootpath)
+    if path := config.getoption("oida_changed_files"):
+        return [
+            config.rootpath / line.strip()
+            for line in path.read_text().splitlines()
+            if line.strip()
+        ]
+    return None
+
+
+def select_affected_items(
+    items: Sequence[pytest.Item], changed_files: Sequence[Path]
+) -> tuple[list[pytest.Item], list[pytest.Item]]:
+    """
+    Split test items into the ones to run and the ones to deselect. Only tests
+    in test modules of a project that are not affected by the changes are
+    deselected. If any changed file can't be traced through imports, all
+    tests are kept.
+    """
+
+    @functools.lru_cache(maxsize=None)
+    def get_affected(root_module: Path) -> Affected:
+        return find_affected(root_module, changed_files)
+
+    selected: list[pytest.Item] = []
+    deselected: list[pytest.Item] = []
+    for item in items:
+        path = item.path.resolve()
+        if not is_package(path.parent):
+            selected.append(item)
+            continue
+
+        affected = get_affected(find_root_module(path.parent))
+        module = get_module(path.parent)
+        if (
+            affected.unknown_files
+            or not is_test_module(f"{module}.{path.stem}")
+            or path in affected.test_files
+        ):
+            selected.append(item)
+        else:
+            deselected.append(item)
+
+    return selected, deselected
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    if (changed_files := get_changed_files_from_options(config)) is None:
+        return
+
+    selected, deselected = select_affected_items(items, changed_files)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
@@ -0,0 +1,261 @@
+"""
+A lint server that keeps the state of a project warm between runs: the project
+snapshot, parsed configs and the lint results of unchanged files. `oida lint`
+forwards requests to the server when it's running, which avoids paying for
+interpreter startup, imports and discovery on every run.
+
+Requests and responses are single JSON documents sent over a Unix domain
+socket in the project's cache directory. This module must stay cheap to
+import, as it's used by the client before deciding whether to lint locally.
+"""
+
+import hashlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+from pathlib import Path
+from stat import S_ISDIR
+from typing import Any, Literal, overload
+
+from .cache import get_cache_dir
+from .discovery import find_project_root
+
+SOCKET_FILE_NAME = "server.sock"
+
+# Records the private directory the socket is placed in when the path in the
+# cache directory is too long and there's no XDG_RUNTIME_DIR
+SOCKET_DIR_FILE_NAME = "server-dir"
+
+# The maximum length of a Unix socket path is around 100 bytes on most
+# platforms
+MAX_SOCKET_PATH_LENGTH = 100
+
+
+def is_private_dir(path: Path) -> bool:
+    """Check that a directory is only accessible by the current user"""
+
+    try:
+        stat = path.lstat()
+    except OSError:
+        return False
+    return (
+        S_ISDIR(stat.st_mode)
+        and stat.st_uid == os.getuid()
+        and not stat.st_mode & 0o077
+    )
+
+
+@overload
+def get_socket_path(project_root: Path, *, create: Literal[True]) -> Path:
+    ...
+
+
+@overload
+def get_socket_path(project_root: Path, *, create: bool = False) -> Path | None:
+    ...
+
+
+def get_socket_path(project_root: Path, *, create: bool = False) -> Path | None:
+    """
+    Get the path of the lint server socket for a project. Sockets are placed in
+    the cache directory, unless the path would be too long. They're then placed
+    in XDG_RUNTIME_DIR, or else in a private temporary directory that's
+    recorded in the cache directory. That directory is only created if create
+    is set, and None is returned if it doesn't exist.
+    """
+
+    cache_dir = get_cache_dir(project_root)
+    path = cache_dir / SOCKET_FILE_NAME
+    if len(os.fsencode(path)) <= MAX_SOCKET_PATH_LENGTH:
+        return path
+
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        digest = hashlib.sha1(os.fsencode(project_root.resolve())).hexdigest()[:16]
+        return Path(runtime_dir) / f"oida-{digest}.sock"
+
+    record = cache_dir / SOCKET_DIR_FILE_NAME
+    try:
+        directory = Path(record.read_text())
+    except FileNotFoundError:
+        directory = None
+    if directory is None or not is_private_dir(directory):
+        if not create:
+            return None
+        # Created only accessible by the current user
+        directory = Path(tempfile.mkdtemp(prefix="oida-"))
+        record.write_text(os.fspath(directory))
+    return directory / SOCKET_FILE_NAME
+
+
+def send_request(socket_path: Path, request: dict[str, Any]) -> dict[str, Any] | None:
+    """
+    Send a request to the server listening on the given socket. Returns None if
+    no server is running, or if it doesn't send back a valid response.
+    """
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(os.fspath(socket_path))
+            client.sendall(json.dumps(request).encode() + b"\n")
+            client.shutdown(socket.SHUT_WR)
+            with client.makefile("rb") as response:
+                data = response.read()
+    except OSError:
+        return None
+
+    try:
+        result = json.loads(data)
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def lint_with_server(
+    *paths: Path,
+    checks: list[str] | None,
+    metrics_file: Path | None = None,
+    max_violations: int | None = None,
+) -> tuple[bool, str] | None:
+    """
+    Run the linter in a running lint server, returning whether there were
+    violations and the output. Returns None if there's no server running for
+    the project the paths belong to.
+    """
+
+    socket_path = get_socket_path(find_project_root(paths[0]))
+    if socket_path is None or not socket_path.exists():
+        return None
+
+    response = send_request(
+        socket_path,
+        {
+            "command": "lint",
+            "cwd": os.getcwd(),
+            "paths": [os.fspath(path) for path in paths],
+            "checks": checks,
+            "metrics_file": os.fspath(metrics_file) if metrics_file else None,
+            "max_violations": max_violations,
+        },
+    )
+    if response is None:
+        return None
+    if "error" in response:
+        sys.exit(f"Lint server error: {response['error']}")
+    return response["has_violations"], response["output"]
+
+
+class LintServer(socketserver.UnixStreamServer):
+    """
+    Handles one request at a time, as discovery and the caches it uses are not
+    thread safe.
+    """
+
+    def __init__(self, socket_path: Path) -> None:
+        from .commands.linter import ResultCache
+
+        self.socket_path = socket_path
+        self.cache = ResultCache()
+        self.stopping = False
+        super().__init__(os.fspath(socket_path), LintRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def lint(self, request: dict[str, Any]) -> dict[str, Any]:
+        from .commands.linter import run_linter
+        from .discovery import (
+            get_component_config,
+            get_project_config,
+            get_snapshot,
+            load_component_config,
+        )
+
+        # Configs are resolved again for every run, as they may have changed.
+        # This is cheap, as the snapshot only parses the files that did.
+        get_component_config.cache_clear()
+        load_component_config.cache_clear()
+        get_project_config.cache_clear()
+
+        # Run in the working directory of the client, so that relative paths
+        # are resolved and reported the same way as when linting locally
+        cwd = os.getcwd()
+        os.chdir(request["cwd"])
+        try:
+            paths = [Path(path) for path in request["paths"]]
+            output = io.StringIO()
+            has_violations = run_linter(
+                *paths,
+                checks=request.get("checks"),
+                metrics_file=Path(request["metrics_file"])
+                if request.get("metrics_file")
+                else None,
+                cache=self.cache,
+                output=output,
+                max_violations=request.get("max_violations"),
+            )
+            get_snapshot(paths[0]).save(force=False)
+        finally:
+            os.chdir(cwd)
+        return {"has_violations": has_violations, "output": output.getvalue()}
+
+
+class LintRequestHandler(socketserver.StreamRequestHandler):
+    server: LintServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.read())
+            command = request.get("command")
+            if command == "lint":
+                response = self.server.lint(request)
+            elif command == "status":
+                response = {"pid": os.getpid(), "files": len(self.server.cache.results)}
+            elif command == "stop":
+                response = {"stopping": True}
+                self.server.stopping = True
+            else:
+                response = {"error": f"Unknown command: {command}"}
+        except Exception as e:  # Report errors to the client instead of dying
+            response = {"error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response).encode())
+
+
+def serve(project_root: Path) -> None:
+    """
+    Run a lint server for the project until it's stopped.
+    """
+
+    socket_path = get_socket_path(find_project_root(project_root), create=True)
+    if send_request(socket_path, {"command": "status"}) is not None:
+        sys.exit(f"A lint server is already running on {socket_path}")
+    if socket_path.exists():
+        # Left behind by a server that didn't shut down cleanly
+        socket_path.unlink()
+
+    with LintServer(socket_path) as server:
+        print(f"Listening on {socket_path}", flush=True)
+        try:
+            while not server.stopping:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+
+
+def stop(project_root: Path) -> bool:
+    """
+    Stop the lint server for the project. Returns False if it wasn't running.
+    """
+
+    socket_path = get_socket_path(find_project_root(project_root))
+    return (
+        socket_path is not None
+        and send_request(socket_path, {"command": "stop"}) is not None
+    )
@@ -0,0 +1,215 @@
+"""
+A persisted snapshot of the project layout. Discovering the project structure
+(packages, apps, components and their configs) requires a lot of filesystem
+access and parsing. The snapshot stores the results in the project's cache
+directory, so that separate processes (like flake8 workers) can share them.
+
+Each entry carries a validator (mtime, and inode and size for files) that is
+checked every time the entry is used, so the snapshot never needs to be
+rebuilt as a whole. This also makes it a manifest of the content hashes of
+files, which lets unchanged files be matched to stored results without
+reading them.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+from .utils import write_atomic
+
+SNAPSHOT_VERSION = 2
+
+# Entries modified this recently are not persisted, as further changes within
+# the timestamp resolution of the filesystem would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+# Minimum time between writing the snapshot when new entries are added
+SAVE_INTERVAL_NS = 1_000_000_000
+
+
+class Listing(NamedTuple):
+    mtime_ns: int
+    dirs: frozenset[str]
+    files: frozenset[str]
+
+
+class FileData(NamedTuple):
+    inode: int
+    mtime_ns: int
+    size: int
+    data: Any
+
+    def is_valid(self, stat: os.stat_result) -> bool:
+        return (self.inode, self.mtime_ns, self.size) == (
+            stat.st_ino,
+            stat.st_mtime_ns,
+            stat.st_size,
+        )
+
+
+class ProjectSnapshot:
+    """
+    Directory listings and parsed files for a project. Only paths below the
+    project root are cached, anything else is read from the filesystem.
+    """
+
+    def __init__(self, root: Path, path: Path | None) -> None:
+        self.root = os.path.abspath(root)
+        self.path = path
+        self.listings: dict[str, Listing] = {}
+        self.files: dict[str, dict[str, FileData]] = {}
+        self.dirty = False
+        self.saved_at = time.monotonic_ns()
+        # Number of lookups answered from the snapshot, and lookups that had
+        # to go to the filesystem
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, root: Path, path: Path | None) -> "ProjectSnapshot":
+        snapshot = cls(root, path)
+        if path is None:
+            return snapshot
+
+        try:
+            data = json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            return snapshot
+
+        if data.get("version") != SNAPSHOT_VERSION:
+            return snapshot
+
+        snapshot.update(data)
+        return snapshot
+
+    def update(self, data: dict[str, Any]) -> None:
+        """Add entries from serialized snapshot data"""
+
+        for key, (mtime_ns, dirs, files) in data["listings"].items():
+            self.listings.setdefault(
+                key, Listing(mtime_ns, frozenset(dirs), frozenset(files))
+            )
+        for kind, entries in data["files"].items():
+            kind_entries = self.files.setdefault(kind, {})
+            for key, entry in entries.items():
+                kind_entries.setdefault(key, FileData(*entry))
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "listings": {
+                key: [listing.mtime_ns, sorted(listing.dirs), sorted(listing.files)]
+                for key, listing in self.listings.items()
+            },
+            "files": {
+                kind: {key: list(entry) for key, entry in entries.items()}
+                for kind, entries in self.files.items()
+            },
+        }
+
+    def save(self, *, force: bool = True) -> None:
+        """
+        Write the snapshot to disk if there are new entries. Entries written by
+        other processes in the meantime are merged in. Unless force is set,
+        writes are throttled. If the snapshot can't be written, it's kept in
+        memory only from then on.
+        """
+
+        if not self.dirty or self.path is None:
+            return
+
+        now = time.monotonic_ns()
+        if not force and now - self.saved_at < SAVE_INTERVAL_NS:
+            return
+
+        on_disk = ProjectSnapshot.load(Path(self.root), self.path)
+        self.update(on_disk.serialize())
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, json.dumps(self.serialize()).encode())
+        except OSError:
+            self.path = None
+            return
+        self.dirty = False
+        self.saved_at = now
+
+    def is_cached(self, key: str) -> bool:
+        return key == self.root or key.startswith(self.root + os.sep)
+
+    def is_racy(self, mtime_ns: int) -> bool:
+        return time.time_ns() - mtime_ns < RACY_WINDOW_NS
+
+    def listing(self, path: Path) -> Listing | None:
+        """
+        List the subdirectories and files in a directory. Returns None if the
+        path is not a directory.
+        """
+
+        key = os.path.abspath(path)
+        try:
+            mtime_ns = os.stat(key).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+        if (listing := self.listings.get(key)) and listing.mtime_ns == mtime_ns:
+            self.hits += 1
+            return listing
+
+        dirs: set[str] = set()
+        files: set[str] = set()
+        try:
+            with os.scandir(key) as entries:
+                for entry in entries:
+                    (dirs if entry.is_dir() else files).add(entry.name)
+        except NotADirectoryError:
+            return None
+
+        self.misses += 1
+        listing = Listing(mtime_ns, frozenset(dirs), frozenset(files))
+        if self.is_cached(key) and not self.is_racy(mtime_ns):
+            self.listings[key] = listing
+            self.dirty = True
+        return listing
+
+    def file_data(self, kind: str, path: Path, loader: Callable[[Path], Any]) -> Any:
+        """
+        Get data parsed from a file. The loader is only called if the file has
+        changed since it was last parsed, and must return JSON serializable
+        data.
+        """
+
+        stat = os.stat(path)
+        if (entry := self.get_file_data(kind, path, stat)) is not None:
+            return entry.data
+
+        data = loader(path)
+        self.put_file_data(kind, path, stat, data)
+        return data
+
+    def get_file_data(
+        self, kind: str, path: Path, stat: os.stat_result
+    ) -> FileData | None:
+        """
+        Get the entry for a file if it's still valid for the given stat result
+        of the file. The entry can be added with put_file_data if not.
+        """
+
+        entry = self.files.get(kind, {}).get(os.path.abspath(path))
+        if entry is not None and entry.is_valid(stat):
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    def put_file_data(
+        self, kind: str, path: Path, stat: os.stat_result, data: Any
+    ) -> None:
+        key = os.path.abspath(path)
+        if self.is_cached(key) and not self.is_racy(stat.st_mtime_ns):
+            self.files.setdefault(kind, {})[key] = FileData(
+                stat.st_ino, stat.st_mtime_ns, stat.st_size, data
+            )
+            self.dirty = True
@@ -0,0 +1,138 @@
+import csv
+import io
+from array import array
+from typing import Any, Sequence
+
+from oida.component import Component
+from oida.discovery import get_module
+from oida.graph import ImportGraph
+
+
+class CouplingMatrix:
+    """
+    A matrix counting the imports between components. The counts are stored
+    in a flat array, where the number of imports from component i to
+    component j is at index i * n + j.
+    """
+
+    def __init__(self, components: Sequence[str]) -> None:
+        self.components = list(components)
+        self.size = len(self.components)
+        self.counts = array("I", bytes(4 * self.size * self.size))
+
+    def add(self, source: int, target: int) -> None:
+        self.counts[source * self.size + target] += 1
+
+    def count(self, source: int, target: int) -> int:
+        """
+        Returns the number of imports from the source component to the target
+        component.
+        """
+        return self.counts[source * self.size + target]
+
+    def get_afferent_coupling(self, component: int) -> int:
+        """
+        Returns the number of other components that import from the component.
+        """
+        return sum(
+            1
+            for source in range(self.size)
+            if source != component and self.count(source, component)
+        )
+
+    def get_efferent_coupling(self, component: int) -> int:
+        """
+        Returns the number of other components the component imports from.
+        """
+        return sum(
+            1
+            for target in range(self.size)
+            if target != component and self.count(component, target)
+        )
+
+    def get_instability(self, component: int) -> float:
+        """
+        Returns the instability of the component, which is the efferent
+        coupling divided by the total coupling. A component that no other
+        component depends on has an instability of 1, while a component that
+        does not depend on any other components has an instability of 0.
+        """
+        afferent = self.get_afferent_coupling(component)
+        efferent = self.get_efferent_coupling(component)
+        return efferent / (afferent + efferent) if afferent + efferent else 0.0
+
+    def rows(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "component": name,
+                "afferent_coupling": self.get_afferent_coupling(i),
+                "efferent_coupling": self.get_efferent_coupling(i),
+                "instability": self.get_instability(i),
+                "imports": {
+                    target: self.count(i, j)
+                    for j, target in enumerate(self.components)
+                    if i != j and self.count(i, j)
+                },
+            }
+            for i, name in enumerate(self.components)
+        ]
+
+    def csv(self) -> str:
+        """
+        Returns a CSV representation of the coupling metrics, followed by the
+        number of imports to each of the other components.
+        """
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(
+            [
+                "component",
+                "afferent_coupling",
+                "efferent_coupling",
+                "instability",
+                *self.components,
+            ]
+        )
+        for i, name in enumerate(self.components):
+            writer.writerow(
+                [
+                    name,
+                    self.get_afferent_coupling(i),
+                    self.get_efferent_coupling(i),
+                    f"{self.get_instability(i):.3f}",
+                    *(self.count(i, j) for j in range(self.size)),
+                ]
+            )
+        return output.getvalue()
+
+
+def compute_coupling(
+    components: Sequence[Component], graph: ImportGraph
+) -> CouplingMatrix:
+    """
+    Count the imports between components, using the import graph of the
+    project.
+    """
+
+    component_modules = [get_module(component.path) for component in components]
+    matrix = CouplingMatrix(component_modules)
+
+    # Components are top level packages, so the component of a module is given
+    # by the first two parts of its name
+    index = {module: i for i, module in enumerate(component_modules)}
+
+    def get_component_index(module: str) -> int | None:
+        return index.get(".".join(module.split(".", 2)[:2]))
+
+    # Imports for type checking couple components as well
+    for source, target, _ in graph.edges(typing=True):
+        source_index = get_component_index(source)
+        target_index = get_component_index(target)
+        if (
+            source_index is not None
+            and target_index is not None
+            and source_index != target_index
+        ):
+            matrix.add(source_index, target_index)
+
+    return matrix
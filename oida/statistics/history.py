@@ -0,0 +1,232 @@
+import csv
+import io
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple, Sequence
+
+from oida.blobs import BlobLinter
+from oida.checkers import ALL_CHECKERS
+from oida.discovery import find_root_module, has_public_api_files, is_app_listing
+from oida.git import ObjectReader, TreeEntry, get_commits, get_repository_root
+
+
+class CommitStatistics(NamedTuple):
+    commit: str
+    timestamp: int
+    components: int
+    components_with_public_api: int
+    apps: int
+    apps_in_components: int
+    violations: int
+
+
+class Structure(NamedTuple):
+    components: int
+    components_with_public_api: int
+    apps: int
+    apps_in_components: int
+
+
+class History:
+    def __init__(self, commits: list[CommitStatistics]) -> None:
+        self.commits = commits
+
+    def json(self) -> str:
+        return json.dumps([commit._asdict() for commit in self.commits], indent=4)
+
+    def csv(self) -> str:
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(CommitStatistics._fields)
+        writer.writerows(self.commits)
+        return output.getvalue()
+
+
+class HistoryAnalyzer:
+    """
+    Compute statistics for commits straight from the git object database. All
+    results are memoized by object id: a file is only linted once for a given
+    module name and configuration, and a directory whose tree is unchanged
+    between commits is not visited again.
+    """
+
+    def __init__(self, objects: ObjectReader, path: Sequence[str]) -> None:
+        self.objects = objects
+        # Path to the root module, relative to the repository root
+        self.path = path
+        self.structures: dict[str, Structure] = {}
+        self.tree_violations: dict[tuple[str, str | None, str, str, str], int] = {}
+        self.blob_violations: dict[tuple[str, str | None, str, str, str, str], int] = {}
+        self.linter = BlobLinter(objects, ALL_CHECKERS)
+
+    def analyze(self, commit: str) -> CommitStatistics:
+        tree, timestamp = self.objects.read_commit(commit)
+
+        # Find the root module, and the closest pyproject.toml above it
+        project_config = ""
+        entries = self.objects.read_tree(tree)
+        for name in self.path:
+            project_config = self._find_blob(entries, "pyproject.toml") or (
+                project_config
+            )
+            entry = next((e for e in entries if e.name == name and e.is_tree), None)
+            if entry is None:
+                return CommitStatistics(commit, timestamp, 0, 0, 0, 0, 0)
+            tree = entry.sha
+            entries = self.objects.read_tree(tree)
+
+        structure = self.get_structure(tree)
+        _, files = self._listing(tree)
+        module = self.path[-1] if "__init__.py" in files and self.path else None
+        return CommitStatistics(
+            commit,
+            timestamp,
+            components=structure.components,
+            components_with_public_api=structure.components_with_public_api,
+            apps=structure.apps,
+            apps_in_components=structure.apps_in_components,
+            violations=self.count_violations(tree, module, ("", ""), project_config),
+        )
+
+    def _find_blob(self, entries: list[TreeEntry], name: str) -> str | None:
+        for entry in entries:
+            if entry.name == name and not entry.is_tree:
+                return entry.sha
+        return None
+
+    def _listing(self, tree: str) -> tuple[set[str], set[str]]:
+        entries = self.objects.read_tree(tree)
+        return (
+            {entry.name for entry in entries if entry.is_tree},
+            {entry.name for entry in entries if not entry.is_tree},
+        )
+
+    def _is_app(self, tree: str) -> bool:
+        return is_app_listing(*self._listing(tree))
+
+    def get_structure(self, tree: str) -> Structure:
+        """
+        Count the components and apps in the root module, following the same
+        rules as find_components and find_apps.
+        """
+
+        if (structure := self.structures.get(tree)) is not None:
+            return structure
+
+        components = with_public_api = apps = apps_in_components = 0
+        for entry in self.objects.read_tree(tree):
+            if not entry.is_tree:
+                continue
+            _, files = self._listing(entry.sha)
+            if self._is_app(entry.sha):
+                apps += 1
+            if "__init__.py" not in files:
+                continue
+            component_apps = sum(
+                1
+                for child in self.objects.read_tree(entry.sha)
+                if child.is_tree and self._is_app(child.sha)
+            )
+            if component_apps:
+                components += 1
+                apps_in_components += component_apps
+                with_public_api += has_public_api_files(files)
+
+        structure = self.structures[tree] = Structure(
+            components, with_public_api, apps + apps_in_components, apps_in_components
+        )
+        return structure
+
+    def count_violations(
+        self,
+        tree: str,
+        module: str | None,
+        component_config: tuple[str, str],
+        project_config: str,
+    ) -> int:
+        """
+        Count the violations in a directory, following the same rules as
+        find_modules and the linter. module is the name of the directory if it
+        is a package. Configs are identified by the ids of their blobs, or
+        empty strings if there is no config, and the component config also by
+        the name of the package it belongs to.
+        """
+
+        key = (tree, module, *component_config, project_config)
+        if (count := self.tree_violations.get(key)) is not None:
+            return count
+
+        entries = self.objects.read_tree(tree)
+        project_config = self._find_blob(entries, "pyproject.toml") or project_config
+        if module is None:
+            component_config = ("", "")
+        elif blob := self._find_blob(entries, "confcomponent.py"):
+            component_config = (module, blob)
+
+        count = 0
+        for entry in entries:
+            stem, extension = os.path.splitext(entry.name)
+            if stem.startswith("."):
+                continue
+            if entry.is_tree:
+                _, files = self._listing(entry.sha)
+                child_module = None
+                if "__init__.py" in files:
+                    child_module = f"{module}.{entry.name}" if module else entry.name
+                count += self.count_violations(
+                    entry.sha, child_module, component_config, project_config
+                )
+            elif entry.is_file and extension in (".py", ".pyi"):
+                count += self.lint_blob(
+                    entry.sha,
+                    module,
+                    "" if module is not None and stem == "__init__" else stem,
+                    component_config,
+                    project_config,
+                )
+
+        self.tree_violations[key] = count
+        return count
+
+    def lint_blob(
+        self,
+        blob: str,
+        module: str | None,
+        name: str,
+        component_config: tuple[str, str],
+        project_config: str,
+    ) -> int:
+        key = (blob, module, name, *component_config, project_config)
+        if (count := self.blob_violations.get(key)) is not None:
+            return count
+
+        try:
+            count = len(
+                self.linter.lint(blob, module, name, component_config, project_config)
+            )
+        except (SyntaxError, ValueError):
+            # Files that couldn't be parsed in a commit don't count
+            count = 0
+        self.blob_violations[key] = count
+        return count
+
+
+def generate_history(path: Path, rev_range: str) -> History:
+    """
+    Compute statistics for each commit in a revision range, reading files
+    from git without checking them out.
+    """
+
+    root_module = find_root_module(path.resolve())
+    repository_root = get_repository_root(root_module)
+    relative_path = root_module.relative_to(repository_root).parts
+
+    with ObjectReader(repository_root) as objects:
+        analyzer = HistoryAnalyzer(objects, relative_path)
+        return History(
+            [
+                analyzer.analyze(commit)
+                for commit in get_commits(rev_range, repository_root)
+            ]
+        )
@@ -0,0 +1,188 @@
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence
+
+from oida.discovery import get_module
+from oida.graph import ImportGraph, strongly_connected_components
+
+# Number of modules ranked by the size of their import closure
+TOP_MODULES = 20
+
+
+class ClosureSize(NamedTuple):
+    modules: int
+    bytes: int
+    ast_nodes: int
+
+
+def get_prefixes(module: str) -> Iterator[str]:
+    """Yield the module and the names of its parent packages"""
+
+    while module:
+        yield module
+        module = module.rpartition(".")[0]
+
+
+class ImportCost:
+    def __init__(self, graph: ImportGraph, packages: Iterable[str] = ()) -> None:
+        """
+        The size of the transitive first-party import closure of each module,
+        and of all modules in each of the given packages: the number of modules
+        loaded by importing it, their total size in bytes and their total
+        number of AST nodes.
+
+        Closures are represented as bitsets (Python integers) over the
+        modules, computed once per strongly connected component in reverse
+        topological order. The closure of a component is only kept until the
+        components importing it have used it, and its size is computed right
+        away, so only the closures on the frontier of the walk and of the
+        packages are held in memory. Sizes are summed a byte of the bitset at a
+        time, using a table of the sums of every combination of 8 modules.
+        """
+
+        self.modules = sorted(graph.modules)
+        index = {module: i for i, module in enumerate(self.modules)}
+        self.sizes = [
+            (
+                graph.files[graph.modules[module]].size,
+                graph.files[graph.modules[module]].nodes,
+            )
+            for module in self.modules
+        ]
+
+        # Importing a module also imports its parent packages
+        successors: dict[str, set[str]] = {module: set() for module in self.modules}
+        for module in self.modules:
+            if (parent := module.rpartition(".")[0]) in index:
+                successors[module].add(parent)
+        for source, target, _ in graph.edges():
+            successors[source].add(target)
+
+        components = strongly_connected_components(successors)
+        # The component of each module, by module index
+        self.component_of = [0] * len(self.modules)
+        for i, component in enumerate(components):
+            for module in component:
+                self.component_of[index[module]] = i
+        component_successors = [
+            {
+                self.component_of[index[target]]
+                for module in component
+                for target in successors[module]
+            }
+            - {i}
+            for i, component in enumerate(components)
+        ]
+        importers = [0] * len(components)
+        for imported in component_successors:
+            for successor in imported:
+                importers[successor] += 1
+
+        self.tables: list[list[tuple[int, int]]] = []
+        for start in range(0, len(self.modules), 8):
+            chunk = self.sizes[start : start + 8]
+            table = [(0, 0)] * 256
+            for bits in range(1, 256):
+                low = bits & -bits
+                position = low.bit_length() - 1
+                size, nodes = table[bits ^ low]
+                if position < len(chunk):
+                    size += chunk[position][0]
+                    nodes += chunk[position][1]
+                table[bits] = (size, nodes)
+            self.tables.append(table)
+
+        package_closures = dict.fromkeys(packages, 0)
+        # Closure sizes by component
+        self.component_sizes: list[ClosureSize] = []
+        closures: dict[int, int] = {}
+        for i, component in enumerate(components):
+            closure = 0
+            for module in component:
+                closure |= 1 << index[module]
+            for successor in component_successors[i]:
+                closure |= closures[successor]
+                importers[successor] -= 1
+                if not importers[successor]:
+                    del closures[successor]
+            if importers[i]:
+                closures[i] = closure
+            self.component_sizes.append(self.size(closure))
+
+            for package in {
+                prefix
+                for module in component
+                for prefix in get_prefixes(module)
+                if prefix in package_closures
+            }:
+                package_closures[package] |= closure
+
+        self.package_sizes = {
+            package: self.size(closure) for package, closure in package_closures.items()
+        }
+
+    def size(self, closure: int) -> ClosureSize:
+        total_size = total_nodes = 0
+        data = closure.to_bytes(len(self.tables), "little")
+        for table, bits in zip(self.tables, data):
+            if bits:
+                size, nodes = table[bits]
+                total_size += size
+                total_nodes += nodes
+        return ClosureSize(closure.bit_count(), total_size, total_nodes)
+
+    def get_closure_size(self, package: str) -> ClosureSize:
+        """
+        Returns the size of the import closure of all modules in a package,
+        which must be one of the packages given when this was created
+        """
+
+        return self.package_sizes[package]
+
+    def get_module_closure_sizes(self) -> list[tuple[str, ClosureSize]]:
+        """
+        Returns the import closure size of each module, largest first
+        """
+
+        return sorted(
+            (
+                (module, self.component_sizes[component])
+                for module, component in zip(self.modules, self.component_of)
+            ),
+            key=lambda item: (-item[1].bytes, item[0]),
+        )
+
+    def rows(
+        self, components: Iterable[str], apps: Iterable[str]
+    ) -> dict[str, list[dict[str, Any]]]:
+        def row(name: str, size: ClosureSize) -> dict[str, Any]:
+            return {"name": name, **size._asdict()}
+
+        def ranked(packages: Iterable[str]) -> list[dict[str, Any]]:
+            sizes = [(package, self.get_closure_size(package)) for package in packages]
+            sizes.sort(key=lambda item: (-item[1].bytes, item[0]))
+            return [row(name, size) for name, size in sizes]
+
+        return {
+            "components": ranked(components),
+            "apps": ranked(apps),
+            "modules": [
+                row(name, size)
+                for name, size in self.get_module_closure_sizes()[:TOP_MODULES]
+            ],
+        }
+
+
+def compute_import_cost(
+    components: Sequence[Path], apps: Sequence[Path], graph: ImportGraph
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    Compute the size of the import closure of each component and app, and of
+    the modules with the largest closures, from the import graph of the
+    project.
+    """
+
+    component_modules = [get_module(component) for component in components]
+    app_modules = [get_module(app) for app in apps]
+    return ImportCost(graph, [*component_modules, *app_modules]).rows(
+        component_modules, app_modules
+    )
@@ -1,47 +1,66 @@
 import json
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Mapping
 
 from oida.component import Component
-from oida.discovery import find_apps, find_components
+from oida.discovery import find_root_module
+from oida.graph import build_import_graph
+from oida.metrics import MetricsWriter
+
+from .coupling import CouplingMatrix, compute_coupling
+from .import_cost import compute_import_cost
+from .summary import SourceSize, StatisticsSummary, scan_project
 
 
 class Statistics:
     def __init__(
-        self, components: List[Component], uncomponentized_apps: List[Path]
+        self,
+        components: List[Component],
+        uncomponentized_apps: List[Path],
+        coupling: CouplingMatrix | None = None,
+        import_cost: Dict[str, List[Dict[str, Any]]] | None = None,
+        sizes: Mapping[Path, SourceSize] | None = None,
     ) -> None:
         """
         Creates a new Statistics object containing statistics information about the
         componentization and modularization process for the project Oida was run on.
         It takes a list of components and a list of the apps that are not part of a
-        component as input.
+        component as input, and optionally the coupling between the components,
+        the import closure sizes of components, apps and modules and the source
+        size of each component. All numbers are computed up front into a
+        summary, which the renderers read.
         """
 
         self.components = components
         self.uncomponentized_apps = uncomponentized_apps
+        self.coupling = coupling
+        self.import_cost = import_cost
         self.componentized_apps: list[Path] = []
         for component in self.components:
             self.componentized_apps.extend(component.apps)
+        self.summary = StatisticsSummary.from_components(
+            components, uncomponentized_apps, sizes or {}
+        )
 
     def get_number_of_components(self) -> int:
         """
         Returns the number of components in the project.
         """
 
-        return len(self.components)
+        return self.summary.number_of_components
 
     def get_total_number_of_apps(self) -> int:
         """
         Returns the total number of apss in the project.
         """
 
-        return len(self.componentized_apps) + len(self.uncomponentized_apps)
+        return self.summary.number_of_apps
 
     def get_number_of_componentized_apps(self) -> int:
         """
         Returns the number of apps that are contained in components.
         """
-        return len(self.componentized_apps)
+        return self.summary.number_of_componentized_apps
 
     def get_componentized_apps_fraction(self) -> float:
         """
@@ -49,21 +68,21 @@ class Statistics:
         This is equal to the number of componentized apps divided by the
         total number of apps in the project.
         """
-        return self.get_number_of_componentized_apps() / self.get_total_number_of_apps()
+        return self.summary.componentized_apps_fraction
 
     def get_components_with_public_api(self) -> list[Component]:
         """
         Returns the components that have a public API defined (in selectors.py
         and services.py).
         """
-        return list(filter(lambda component: component.has_public_api, self.components))
+        return [component for component in self.components if component.has_public_api]
 
     def get_number_of_components_with_public_api(self) -> int:
         """
         Returns the number of components that have a public API defined
         (in selectors.py and services.py).
         """
-        return len(self.get_components_with_public_api())
+        return self.summary.number_of_components_with_public_api
 
     def get_components_with_public_api_fraction(self) -> float:
         """
@@ -71,78 +90,204 @@ class Statistics:
         (in selectors.py and services.py). This is equal to the number of
         components with a public API divided by the total number of components.
         """
-        return (
-            self.get_number_of_components_with_public_api()
-            / self.get_number_of_components()
-        )
+        return self.summary.components_with_public_api_fraction
 
     def list_componentized_apps(self) -> list[str]:
         """
         Returns a list containing the names of componentized apps.
         """
-        return list(map(lambda app_path: str(app_path.name), self.componentized_apps))
+        return list(self.summary.componentized_apps)
 
     def list_uncomponentized_apps(self) -> list[str]:
         """
         Returns a list containing the names of apps that are not part of a component.
         """
-        return list(map(lambda app_path: app_path.name, self.uncomponentized_apps))
+        return list(self.summary.uncomponentized_apps)
 
     def json(self) -> str:
         """
         Returns a json representation of the Statistics object.
         """
-        percentage_of_components_with_public_api = (
-            self.get_components_with_public_api_fraction() * 100.0
-        )
-        percentage_of_apps_in_components = (
-            self.get_componentized_apps_fraction() * 100.0
-        )
-        dict = {
+        summary = self.summary
+        dict: Dict[str, Any] = {
             "components": {
-                "number_of_components": self.get_number_of_components(),
-                "number_of_components_with_public_api": self.get_number_of_components_with_public_api(),
-                "percentage_of_components_with_public_api": percentage_of_components_with_public_api,
-                "components": list(
-                    map(lambda component: component.name, self.components)
-                ),
-                "components_with_public_api": list(
-                    map(
-                        lambda component: component.name,
-                        self.get_components_with_public_api(),
-                    )
-                ),
+                "number_of_components": summary.number_of_components,
+                "number_of_components_with_public_api": summary.number_of_components_with_public_api,
+                "percentage_of_components_with_public_api": summary.components_with_public_api_fraction
+                * 100.0,
+                "components": [component.name for component in summary.components],
+                "components_with_public_api": list(summary.components_with_public_api),
+                "component_sizes": {
+                    component.name: component.size._asdict()
+                    for component in summary.components
+                },
             },
             "apps": {
-                "number_of_apps": self.get_total_number_of_apps(),
-                "number_of_apps_in_components": self.get_number_of_componentized_apps(),
-                "percentage_of_apps_in_components": percentage_of_apps_in_components,
-                "componentized_apps": self.list_componentized_apps(),
-                "uncomponentized_apps": self.list_uncomponentized_apps(),
+                "number_of_apps": summary.number_of_apps,
+                "number_of_apps_in_components": summary.number_of_componentized_apps,
+                "percentage_of_apps_in_components": summary.componentized_apps_fraction
+                * 100.0,
+                "componentized_apps": list(summary.componentized_apps),
+                "uncomponentized_apps": list(summary.uncomponentized_apps),
             },
         }
+        if self.coupling is not None:
+            dict["coupling"] = self.coupling.rows()
+        if self.import_cost is not None:
+            dict["import_cost"] = self.import_cost
         return json.dumps(dict, indent=4)
 
+    def openmetrics(self) -> str:
+        """
+        Returns the statistics in the OpenMetrics text format.
+        """
+        summary = self.summary
+        components_with_public_api = set(summary.components_with_public_api)
+
+        writer = MetricsWriter()
+        writer.gauge("components", "Number of components", summary.number_of_components)
+        writer.gauge(
+            "components_with_public_api",
+            "Number of components with a public API",
+            summary.number_of_components_with_public_api,
+        )
+        writer.gauge(
+            "components_with_public_api_ratio",
+            "Fraction of components with a public API",
+            summary.components_with_public_api_fraction,
+        )
+        writer.gauge("apps", "Number of apps", summary.number_of_apps)
+        writer.gauge(
+            "apps_in_components",
+            "Number of apps in components",
+            summary.number_of_componentized_apps,
+        )
+        writer.gauge(
+            "apps_in_components_ratio",
+            "Fraction of apps that are in a component",
+            summary.componentized_apps_fraction,
+        )
+        writer.add(
+            "component_public_api",
+            "gauge",
+            "Whether a component has a public API",
+            (
+                (
+                    {"component": component.name},
+                    component.name in components_with_public_api,
+                )
+                for component in summary.components
+            ),
+        )
+        writer.add(
+            "app_in_component",
+            "gauge",
+            "Whether an app is in a component",
+            [
+                *(({"app": app}, 1) for app in summary.componentized_apps),
+                *(({"app": app}, 0) for app in summary.uncomponentized_apps),
+            ],
+        )
+        for field, help in (
+            ("files", "Number of Python files in a component"),
+            ("lines", "Number of lines of Python code in a component"),
+            ("bytes", "Total size of the Python files in a component"),
+        ):
+            writer.add(
+                f"component_{field}",
+                "gauge",
+                help,
+                (
+                    ({"component": component.name}, getattr(component.size, field))
+                    for component in summary.components
+                ),
+                unit="bytes" if field == "bytes" else None,
+            )
+
+        if self.coupling is not None:
+            rows = self.coupling.rows()
+            for name, help in (
+                ("afferent_coupling", "Number of components depending on a component"),
+                ("efferent_coupling", "Number of components a component depends on"),
+                ("instability", "Efferent coupling divided by total coupling"),
+            ):
+                writer.add(
+                    f"component_{name}",
+                    "gauge",
+                    help,
+                    (({"component": row["component"]}, row[name]) for row in rows),
+                )
+            writer.add(
+                "component_imports",
+                "gauge",
+                "Number of imports from one component to another",
+                (
+                    ({"component": row["component"], "target": target}, count)
+                    for row in rows
+                    for target, count in row["imports"].items()
+                ),
+            )
+
+        if self.import_cost is not None:
+            for field, help in (
+                ("modules", "Number of modules in the import closure"),
+                ("bytes", "Total size of the modules in the import closure"),
+                ("ast_nodes", "Total number of AST nodes in the import closure"),
+            ):
+                writer.add(
+                    f"import_closure_{field}",
+                    "gauge",
+                    help,
+                    (
+                        ({"kind": kind.rstrip("s"), "name": row["name"]}, row[field])
+                        for kind, rows in self.import_cost.items()
+                        for row in rows
+                    ),
+                    unit="bytes" if field == "bytes" else None,
+                )
+
+        return writer.getvalue()
+
     def __str__(self) -> str:
+        summary = self.summary
         return f"""
             Statistics
             ==================================================
-            Number of Components:                    {"{:>4}".format(self.get_number_of_components())}
-            Number of Components with Public API:    {"{:>4}".format(self.get_number_of_components_with_public_api())}
-            % of Components with Public API:         {"{:>4.0f}".format(self.get_components_with_public_api_fraction()*100)} %
+            Number of Components:                    {"{:>4}".format(summary.number_of_components)}
+            Number of Components with Public API:    {"{:>4}".format(summary.number_of_components_with_public_api)}
+            % of Components with Public API:         {"{:>4.0f}".format(summary.components_with_public_api_fraction*100)} %
             --------------------------------------------------
-            Number of Apps:                          {"{:>4}".format(self.get_total_number_of_apps())}
-            Number of Apps in Components:            {"{:>4}".format(self.get_number_of_componentized_apps())}
-            % of Apps in Compoments:                 {"{:>4.0f}".format(self.get_componentized_apps_fraction()*100) } %
+            Number of Apps:                          {"{:>4}".format(summary.number_of_apps)}
+            Number of Apps in Components:            {"{:>4}".format(summary.number_of_componentized_apps)}
+            % of Apps in Compoments:                 {"{:>4.0f}".format(summary.componentized_apps_fraction*100) } %
             --------------------------------------------------
             """
 
 
-def generate_statistics(path: Path) -> Statistics:
+def generate_statistics(
+    path: Path, *, coupling: bool = False, import_cost: bool = False
+) -> Statistics:
     """
     Generates a Statistics object containing information about the modularization
-    and componentization of the project at the specified path.
+    and componentization of the project at the specified path. If coupling is
+    set the imports between components are counted as well, and if import_cost
+    is set the sizes of the import closures are computed, using the import
+    graph of the project.
     """
-    components = list(find_components(path=path))
-    uncomponentized_apps = list(find_apps(path=path))
-    return Statistics(components=components, uncomponentized_apps=uncomponentized_apps)
+    root_module = find_root_module(path.resolve())
+    components, uncomponentized_apps, sizes = scan_project(root_module)
+    graph = build_import_graph(root_module) if coupling or import_cost else None
+    return Statistics(
+        components=components,
+        uncomponentized_apps=uncomponentized_apps,
+        sizes=sizes,
+        coupling=compute_coupling(components, graph) if coupling and graph else None,
+        import_cost=compute_import_cost(
+            [component.path for component in components],
+            [app for component in components for app in component.apps]
+            + uncomponentized_apps,
+            graph,
+        )
+        if import_cost and graph
+        else None,
+    )
@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, NamedTuple, Sequence
+
+from oida.component import Component
+from oida.discovery import get_snapshot, has_public_api_files, is_app_listing
+
+
+class SourceSize(NamedTuple):
+    files: int = 0
+    lines: int = 0
+    bytes: int = 0
+
+
+@dataclass(frozen=True)
+class ComponentSummary:
+    name: str
+    has_public_api: bool
+    apps: tuple[str, ...]
+    size: SourceSize
+
+
+@dataclass(frozen=True)
+class StatisticsSummary:
+    """
+    All the numbers reported by Statistics, computed once so that the
+    renderers only need to read them.
+    """
+
+    components: tuple[ComponentSummary, ...]
+    components_with_public_api: tuple[str, ...]
+    componentized_apps: tuple[str, ...]
+    uncomponentized_apps: tuple[str, ...]
+    number_of_components: int
+    number_of_components_with_public_api: int
+    components_with_public_api_fraction: float
+    number_of_apps: int
+    number_of_componentized_apps: int
+    componentized_apps_fraction: float
+
+    @classmethod
+    def from_components(
+        cls,
+        components: Sequence[Component],
+        uncomponentized_apps: Sequence[Path],
+        sizes: Mapping[Path, SourceSize],
+    ) -> "StatisticsSummary":
+        component_summaries = tuple(
+            ComponentSummary(
+                name=component.name,
+                has_public_api=component.has_public_api,
+                apps=tuple(app.name for app in component.apps),
+                size=sizes.get(component.path, SourceSize()),
+            )
+            for component in components
+        )
+        with_public_api = tuple(
+            component.name
+            for component in component_summaries
+            if component.has_public_api
+        )
+        componentized_apps = tuple(
+            app for component in component_summaries for app in component.apps
+        )
+        number_of_apps = len(componentized_apps) + len(uncomponentized_apps)
+
+        return cls(
+            components=component_summaries,
+            components_with_public_api=with_public_api,
+            componentized_apps=componentized_apps,
+            uncomponentized_apps=tuple(app.name for app in uncomponentized_apps),
+            number_of_components=len(component_summaries),
+            number_of_components_with_public_api=len(with_public_api),
+            components_with_public_api_fraction=(
+                len(with_public_api) / len(component_summaries)
+                if component_summaries
+                else 0.0
+            ),
+            number_of_apps=number_of_apps,
+            number_of_componentized_apps=len(componentized_apps),
+            componentized_apps_fraction=(
+                len(componentized_apps) / number_of_apps if number_of_apps else 0.0
+            ),
+        )
+
+
+def count_lines(path: Path) -> list[int]:
+    data = path.read_bytes()
+    lines = data.count(b"\n")
+    if data and not data.endswith(b"\n"):
+        lines += 1
+    return [lines, len(data)]
+
+
+def get_source_size(path: Path) -> SourceSize:
+    """
+    Count the Python files below a directory, and their lines and bytes. The
+    counts of each file are kept in the project snapshot, so files are only
+    read again when they have changed.
+    """
+
+    snapshot = get_snapshot(path)
+    files = lines = size = 0
+    pending = [path]
+    while pending:
+        directory = pending.pop()
+        if (listing := snapshot.listing(directory)) is None:
+            continue
+        pending.extend(
+            directory / name for name in listing.dirs if not name.startswith(".")
+        )
+        for name in listing.files:
+            if name.startswith(".") or not name.endswith((".py", ".pyi")):
+                continue
+            file_lines, file_size = snapshot.file_data(
+                "source-size", directory / name, count_lines
+            )
+            files += 1
+            lines += file_lines
+            size += file_size
+    return SourceSize(files, lines, size)
+
+
+def scan_project(
+    root_module: Path,
+) -> tuple[list[Component], list[Path], dict[Path, SourceSize]]:
+    """
+    Find the components, the apps that are not in a component and the source
+    size of each component in a single walk of the root module. Follows the
+    same rules as find_components and find_apps.
+    """
+
+    components: list[Component] = []
+    apps: list[Path] = []
+    sizes: dict[Path, SourceSize] = {}
+
+    snapshot = get_snapshot(root_module)
+    if (listing := snapshot.listing(root_module)) is None:
+        return components, apps, sizes
+
+    for name in sorted(listing.dirs):
+        path = root_module / name
+        if (child := snapshot.listing(path)) is None:
+            continue
+        if is_app_listing(child.dirs, child.files):
+            apps.append(path)
+        if "__init__.py" not in child.files:
+            continue
+
+        component_apps = []
+        for app in sorted(child.dirs):
+            app_listing = snapshot.listing(path / app)
+            if app_listing and is_app_listing(app_listing.dirs, app_listing.files):
+                component_apps.append(path / app)
+        if component_apps:
+            components.append(
+                Component(
+                    name=name,
+                    path=path,
+                    apps=component_apps,
+                    has_public_api=has_public_api_files(child.files),
+                )
+            )
+            sizes[path] = get_source_size(path)
+
+    return components, apps, sizes
@@ -0,0 +1,196 @@
+"""
+A content-addressed store of lint results on disk. Entries are keyed by the
+hash of a file's contents and its module name, not by its path, so separate
+worktrees, branches and CI runners can share a store by pointing
+OIDA_CACHE_DIR at the same directory.
+
+Entries hold the facts extracted from a module, which don't depend on any
+configs or on the checks that are run, so runs with different configs or a
+different set of checks use the same entries.
+
+Entries that haven't been used for MAX_AGE are pruned, at most once every
+PRUNE_INTERVAL. The mtime of an entry is refreshed when it's used, at most
+once every REFRESH_INTERVAL, so that entries in use aren't pruned.
+
+A store that can't be written to (eg. in a read-only checkout) is only read
+from, and pruning it is skipped.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import time
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from .cache import CACHE_DIR_NAME, get_cache_dir
+from .facts import ModuleFacts
+from .utils import write_atomic
+
+CACHE_DIR_ENV = "OIDA_CACHE_DIR"
+STORE_DIR_NAME = "results"
+STORE_VERSION = 2
+PRUNED_FILE_NAME = "last-pruned"
+
+DAY = 24 * 60 * 60
+MAX_AGE = 30 * DAY
+PRUNE_INTERVAL = DAY
+REFRESH_INTERVAL = DAY
+
+
+def get_store_dir(project_root: Path) -> Path:
+    """
+    Get the directory of the result store, which is set by OIDA_CACHE_DIR or
+    is in the project's cache directory
+    """
+
+    if directory := os.environ.get(CACHE_DIR_ENV):
+        return Path(directory)
+    try:
+        return get_cache_dir(project_root) / STORE_DIR_NAME
+    except OSError:
+        # Nothing can be written to the store, but it can still be read
+        return project_root / CACHE_DIR_NAME / STORE_DIR_NAME
+
+
+def get_content_hash(data: bytes) -> str:
+    """
+    Hash the contents of a file the way git hashes blobs, so that a file has
+    the same hash as its blob in a git index or tree
+    """
+
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+@cache
+def get_oida_version() -> str:
+    try:
+        return importlib.metadata.version("oida")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class StoreEntry:
+    """
+    The stored results for one file. Results are added with put_facts and
+    written with ResultStore.save.
+    """
+
+    def __init__(self, path: Path, data: dict[str, Any]) -> None:
+        self.path = path
+        self.data = data
+        self.dirty = False
+
+    def get_facts(self) -> ModuleFacts | None:
+        facts = self.data.get("facts")
+        return None if facts is None else ModuleFacts.deserialize(facts)
+
+    def put_facts(self, facts: ModuleFacts) -> None:
+        self.data["facts"] = facts.serialize()
+        self.dirty = True
+
+    def get_context_hashes(self) -> dict[int, str] | None:
+        """
+        Get the hashes of the lines around each line that has facts, which are
+        used to fingerprint violations without reading the file
+        """
+
+        context_hashes = self.data.get("context_hashes")
+        return None if context_hashes is None else dict(context_hashes)
+
+    def put_context_hashes(self, context_hashes: dict[int, str]) -> None:
+        self.data["context_hashes"] = sorted(context_hashes.items())
+        self.dirty = True
+
+
+class ResultStore:
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        # Cleared when writing to the store fails, so it's only read from
+        self.writable = True
+        self.hits = 0
+        self.misses = 0
+
+    def get_path(self, content_hash: str, module: str | None, name: str) -> Path:
+        key = hashlib.sha1(
+            json.dumps(
+                [STORE_VERSION, get_oida_version(), content_hash, module, name]
+            ).encode()
+        ).hexdigest()
+        return self.directory / key[:2] / key
+
+    def load(self, content_hash: str, module: str | None, name: str) -> StoreEntry:
+        path = self.get_path(content_hash, module, name)
+        try:
+            with open(path, "rb") as file:
+                data = json.loads(file.read())
+                mtime = os.fstat(file.fileno()).st_mtime
+        except (OSError, ValueError):
+            return StoreEntry(path, {})
+
+        if time.time() - mtime > REFRESH_INTERVAL:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return StoreEntry(path, data)
+
+    def save(self, entry: StoreEntry) -> None:
+        """
+        Write an entry if results have been added to it. Results written by
+        other processes in the meantime are merged in, and entries are written
+        atomically, so processes sharing a store never see partial entries.
+        If the entry can't be written, no more entries are written to the store.
+        """
+
+        if not entry.dirty or not self.writable:
+            return
+
+        try:
+            on_disk = json.loads(entry.path.read_bytes())
+        except (OSError, ValueError):
+            on_disk = {}
+        try:
+            entry.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(entry.path, json.dumps({**on_disk, **entry.data}).encode())
+        except OSError:
+            self.writable = False
+            return
+        entry.dirty = False
+
+    def prune(self, max_age: float = MAX_AGE) -> int:
+        """
+        Remove the entries that haven't been used for max_age seconds, returning
+        the number of entries removed
+        """
+
+        removed = 0
+        cutoff = time.time() - max_age
+        for path in self.directory.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                # Removed by another process, or not ours to remove
+                pass
+        return removed
+
+    def prune_if_due(self) -> None:
+        """Prune the store if it hasn't been pruned for PRUNE_INTERVAL"""
+
+        marker = self.directory / PRUNED_FILE_NAME
+        try:
+            if time.time() - marker.stat().st_mtime < PRUNE_INTERVAL:
+                return
+        except OSError:
+            if not self.directory.exists():
+                return
+        try:
+            marker.touch()
+        except OSError:
+            self.writable = False
+            return
+        self.prune()
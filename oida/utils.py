@@ -1,5 +1,7 @@
+import os
 import re
 import subprocess
+import tempfile
 from itertools import zip_longest
 from pathlib import Path
 
@@ -70,3 +72,22 @@ def parse_noida_comment(line: str) -> set[str] | None:
     # Parse the comma-separated list of codes
     codes = {code.strip() for code in codes_str.split(",") if code.strip()}
     return codes
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Write data to a file atomically, by writing to a temporary file in the
+    same directory and moving it into place. Concurrent readers will either
+    see the old or the new contents, never a partial write.
+    """
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        # mkstemp creates files only readable by the owner
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,135 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from oida.commands.affected import find_affected, is_test_module
+from oida.pytest_plugin import select_affected_items
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/component/__init__.py": "",
+        "project/component/services.py": "from .app.models import Model",
+        "project/component/app/__init__.py": "",
+        "project/component/app/apps.py": "",
+        "project/component/app/models.py": "",
+        "project/component/app/templates/index.html": "",
+        "project/component/app/tests/__init__.py": "",
+        "project/component/app/tests/test_models.py": """\
+            from project.component.app.models import Model
+            """,
+        "project/other/__init__.py": "",
+        "project/other/apps.py": "",
+        "project/other/models.py": "from project.component.services import x",
+        "project/other/tests.py": "from project.other.models import y",
+        "project/unrelated/__init__.py": "",
+        "project/unrelated/apps.py": "",
+        "project/unrelated/models.py": "",
+        "project/unrelated/test_models.py": "",
+    }
+)
+
+
+@pytest.mark.parametrize(
+    "module,expected",
+    [
+        ("project.app.tests", True),
+        ("project.app.tests.test_models", True),
+        ("project.app.test_models", True),
+        ("project.app.models", False),
+        ("project.app.testing", False),
+    ],
+)
+def test_is_test_module(module: str, expected: bool) -> None:
+    assert is_test_module(module) == expected
+
+
+def test_find_affected(project_path: Path) -> None:
+    project = project_path / "project"
+
+    affected = find_affected(project, [project / "component/app/models.py"])
+
+    assert affected.modules == {
+        "project.component.app.models",
+        "project.component.app.tests.test_models",
+        "project.component.services",
+        "project.other.models",
+        "project.other.tests",
+    }
+    assert affected.components == {"project.component"}
+    assert affected.apps == {"project.component.app", "project.other"}
+    assert affected.test_files == {
+        project / "component/app/tests/test_models.py",
+        project / "other/tests.py",
+    }
+    assert not affected.unknown_files
+
+
+def test_find_affected_non_python_file(project_path: Path) -> None:
+    project = project_path / "project"
+
+    affected = find_affected(project, [project / "component/app/templates/index.html"])
+
+    assert affected.components == {"project.component"}
+    assert affected.apps == {"project.component.app"}
+    assert affected.test_files == {project / "component/app/tests/test_models.py"}
+
+
+def test_find_affected_conftest(project_path: Path) -> None:
+    project = project_path / "project"
+
+    affected = find_affected(project, [project / "other/conftest.py"])
+
+    assert affected.test_files == {project / "other/tests.py"}
+
+
+def test_find_affected_deleted_module(project_path: Path) -> None:
+    project = project_path / "project"
+    (project / "component/app/models.py").unlink()
+
+    affected = find_affected(project, [project / "component/app/models.py"])
+
+    assert "project.component.app.tests.test_models" in affected.modules
+
+
+def test_find_affected_unknown_file(project_path: Path) -> None:
+    affected = find_affected(
+        project_path / "project", [project_path / "requirements.txt"]
+    )
+
+    assert affected.unknown_files == {project_path / "requirements.txt"}
+
+
+def make_item(path: Path) -> Any:
+    return SimpleNamespace(path=path)
+
+
+def test_select_affected_items(project_path: Path) -> None:
+    project = project_path / "project"
+    items = [
+        make_item(project / "component/app/tests/test_models.py"),
+        make_item(project / "unrelated/test_models.py"),
+        make_item(project / "unrelated/models.py"),
+        make_item(project_path / "test_outside_project.py"),
+    ]
+
+    selected, deselected = select_affected_items(
+        items, [project / "component/app/models.py"]
+    )
+
+    assert selected == [items[0], items[2], items[3]]
+    assert deselected == [items[1]]
+
+
+def test_select_affected_items_unknown_changes(project_path: Path) -> None:
+    project = project_path / "project"
+    items = [make_item(project / "unrelated/test_models.py")]
+
+    selected, deselected = select_affected_items(
+        items, [project_path / "requirements.txt"]
+    )
+
+    assert selected == items
+    assert not deselected
@@ -1,10 +1,22 @@
+import json
 import textwrap
+from pathlib import Path
 
 import libcst as cst
 import pytest
 from libcst.codemod import CodemodContext
 
-from oida.commands.componentize import AppConfigUpdater, CeleryTaskNameUpdater
+from oida.commands import componentize
+from oida.commands.componentize import (
+    AppConfigUpdater,
+    CeleryTaskNamesCodemod,
+    CeleryTaskNameUpdater,
+    MultiRenameCommand,
+    RenameTable,
+    componentize_apps,
+    load_manifest,
+    run_codemod,
+)
 from oida.utils import run_black
 
 
@@ -168,3 +180,246 @@ def testapp_celery_task_name_updater(module: str, expected_output: str) -> None:
         cst.parse_module(textwrap.dedent(expected_output)).code
     )
     assert updated_module_code == expected_module_code
+
+
+def test_celery_task_names_codemod_nested_apps(tmp_path: Path) -> None:
+    module = textwrap.dedent(
+        """\
+        @app.task()
+        def task():
+            pass
+        """
+    )
+    codemod = CeleryTaskNamesCodemod(
+        CodemodContext(),
+        [
+            ("project.app", tmp_path / "component/app"),
+            ("project.app.sub", tmp_path / "component/app/sub"),
+        ],
+    )
+
+    def transform(path: Path) -> str:
+        codemod.context = CodemodContext(filename=str(path))
+        return codemod.transform_module(cst.parse_module(module)).code
+
+    assert '"project.app.sub.task"' in transform(
+        tmp_path / "component/app/sub/tasks.py"
+    )
+    assert '"project.app.task"' in transform(tmp_path / "component/app/tasks.py")
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("project.app", "project.app"),
+        ("project.app.models.Model", "project.app"),
+        ("project.app.sub.models", "project.app.sub"),
+        ("project.application", None),
+        ("other.app", None),
+    ],
+)
+def test_rename_table_lookup(name: str, expected: str | None) -> None:
+    table = RenameTable(
+        {
+            "project.app": "project.component.app",
+            "project.app.sub": "project.component.sub",
+        }
+    )
+    assert table.lookup(name) == expected
+
+
+def test_multi_rename_command() -> None:
+    module = cst.parse_module(
+        textwrap.dedent(
+            """\
+            from project.first.models import First
+            from project.second import services
+            from project.untouched.models import Untouched
+
+            TASK = "project.first.tasks.some_task"
+            """
+        )
+    )
+    codemod = MultiRenameCommand(
+        CodemodContext(),
+        {
+            "project.first": "project.component.first",
+            "project.second": "project.component.second",
+        },
+    )
+
+    assert codemod.transform_module(module).code == textwrap.dedent(
+        """\
+        from project.component.first.models import First
+        from project.component.second import services
+        from project.untouched.models import Untouched
+
+        TASK = "project.component.first.tasks.some_task"
+        """
+    )
+
+
+def test_load_manifest(tmp_path: Path) -> None:
+    manifest = tmp_path / "moves.toml"
+    manifest.write_text(
+        textwrap.dedent(
+            """\
+            [[move]]
+            old = "project/first"
+            new = "project/component/first"
+
+            [[move]]
+            old = "project/second"
+            new = "project/component/second"
+            """
+        )
+    )
+
+    assert load_manifest(manifest) == [
+        (tmp_path / "project/first", tmp_path / "project/component/first"),
+        (tmp_path / "project/second", tmp_path / "project/component/second"),
+    ]
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/component/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/models.py": "class First: ...",
+        "project/second/__init__.py": "",
+        "project/second/services.py": """\
+            from project.first.models import First
+            """,
+        "project/third/__init__.py": "",
+        "project/third/views.py": """\
+            from project.second.services import First
+            """,
+    }
+)
+def test_componentize_apps(project_path: Path) -> None:
+    project = project_path / "project"
+    componentize_apps(
+        [
+            (project / "first", project / "component" / "first"),
+            (project / "second", project / "component" / "second"),
+        ]
+    )
+
+    assert not (project / "first").exists()
+    assert (project / "component" / "first" / "apps.py").exists()
+    assert (
+        project / "component" / "second" / "services.py"
+    ).read_text() == "from project.component.first.models import First\n"
+    assert (
+        project / "third" / "views.py"
+    ).read_text() == "from project.component.second.services import First\n"
+    assert not (project_path / ".oida" / "componentize.json").exists()
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/component/__init__.py": "",
+        "project/app/__init__.py": "",
+        "project/app/models.py": "class Model: ...",
+        "project/other/__init__.py": "",
+        "project/other/views.py": "from project.app.models import Model\n",
+    }
+)
+def test_componentize_apps_resume(
+    project_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    project = project_path / "project"
+    journal_path = project_path / ".oida" / "componentize.json"
+
+    def interrupt(*args: object) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(componentize, "update_celery_task_names", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        componentize_apps([(project / "app", project / "component" / "app")])
+
+    journal = json.loads(journal_path.read_text())
+    assert journal["completed_steps"] == ["move:project.app", "imports", "app-configs"]
+    assert journal["changed_files"] == [
+        str(project / "component" / "app" / "apps.py"),
+        str(project / "other" / "views.py"),
+    ]
+
+    # Starting a new run is not allowed while there's an interrupted one
+    with pytest.raises(SystemExit):
+        componentize_apps([(project / "other", project / "component" / "other")])
+
+    monkeypatch.undo()
+    # The run is found from the moves, wherever it's resumed from
+    outside = project_path / "outside"
+    outside.mkdir()
+    monkeypatch.chdir(outside)
+    with pytest.raises(SystemExit, match="No interrupted componentize run"):
+        componentize_apps([], resume=True)
+    # Resuming with other moves than the run was started with is not allowed
+    with pytest.raises(SystemExit, match="The moves don't match"):
+        componentize_apps(
+            [(project / "app", project / "component" / "other")], resume=True
+        )
+    componentize_apps([(project / "app", project / "component" / "app")], resume=True)
+
+    assert not journal_path.exists()
+    assert (
+        project / "other" / "views.py"
+    ).read_text() == "from project.component.app.models import Model\n"
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/component/__init__.py": "",
+        "project/app/__init__.py": "",
+        "project/app/models.py": "class Model: ...",
+        "project/other/__init__.py": "",
+        "project/other/views.py": "from project.app.models import Model\n",
+    }
+)
+def test_componentize_apps_interrupted_codemod(
+    project_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    project = project_path / "project"
+    journal_path = project_path / ".oida" / "componentize.json"
+
+    def interrupt(codemod: object, files: object, root_module: Path) -> set[Path]:
+        # Rewrite a file before the batch is finished
+        (project / "other" / "views.py").write_text(
+            "from project.component.app.models import Model\n"
+        )
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(componentize, "run_codemod", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        componentize_apps([(project / "app", project / "component" / "app")])
+
+    journal = componentize.Journal.load(journal_path)
+    assert journal is not None
+    assert project / "other" / "views.py" in journal.changed_files
+    assert project / "component" / "app" / "models.py" not in journal.changed_files
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/second/__init__.py": "",
+        "project/second/services.py": "from project.first.models import First\n",
+        "project/third/__init__.py": "",
+        "project/third/services.py": "from project.second.models import Second\n",
+    }
+)
+def test_run_codemod_returns_changed_files(project_path: Path) -> None:
+    project = project_path / "project"
+    codemod = MultiRenameCommand(
+        CodemodContext(), {"project.first": "project.component.first"}
+    )
+
+    changed_files = run_codemod(codemod, project.rglob("*.py"), project)
+
+    assert changed_files == {project / "second" / "services.py"}
@@ -0,0 +1,96 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from oida.commands.linter import order_by_cost, run_linter
+from oida.costs import COSTS_FILE_NAME, CostHistory
+from oida.discovery import find_modules
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            """,
+        "project/first/app/services.py": """\
+            from project.second.app.models import Model
+
+            def get_model(pk):
+                return Model.objects.get(pk=pk)
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+
+def test_estimate(tmp_path: Path) -> None:
+    history = CostHistory(tmp_path / COSTS_FILE_NAME)
+    history.record(tmp_path / "a.py", 2.0, 1000)
+    history.record(tmp_path / "b.py", 1.0, 1000)
+
+    assert history.get_seconds_per_byte() == 1.5 / 1000
+    assert history.estimate(tmp_path / "a.py", 1000, 0.0) == 2.0
+    # Costs are scaled by the change in size
+    assert history.estimate(tmp_path / "a.py", 500, 0.0) == 1.0
+    assert history.estimate(tmp_path / "c.py", 100, 0.01) == 1.0
+
+    history.save()
+    other = CostHistory(tmp_path / COSTS_FILE_NAME)
+    other.record(tmp_path / "c.py", 3.0, 100)
+    other.save()
+    assert CostHistory.load(tmp_path / COSTS_FILE_NAME).costs.keys() == {
+        str(tmp_path / "a.py"),
+        str(tmp_path / "b.py"),
+        str(tmp_path / "c.py"),
+    }
+
+
+def test_order_by_cost(project_path: Path) -> None:
+    modules = list(find_modules(project_path / "project"))
+    history = CostHistory(None)
+    history.record(project_path / "project/second/app/apps.py", 10.0, 0)
+
+    ordered = [module.path for _, module in order_by_cost(modules, history)]
+    assert ordered[:3] == [
+        # Recorded cost
+        project_path / "project/second/app/apps.py",
+        # Estimated by size
+        project_path / "project/first/app/services.py",
+        project_path / "project/first/app/models.py",
+    ]
+
+
+def test_record_only_changed_costs(tmp_path: Path) -> None:
+    history = CostHistory(tmp_path / COSTS_FILE_NAME)
+    history.record(tmp_path / "a.py", 1.0, 1000)
+    history.save()
+
+    history.record(tmp_path / "a.py", 1.1, 1000)
+    assert not history.dirty
+    history.record(tmp_path / "a.py", 2.0, 1000)
+    assert history.dirty
+
+
+def test_run_linter_in_parallel(project_path: Path) -> None:
+    expected = io.StringIO()
+    assert run_linter(
+        project_path / "project", checks=None, output=expected, use_store=False
+    )
+    # Serial runs don't record costs
+    assert not (project_path / ".oida" / COSTS_FILE_NAME).exists()
+
+    output = io.StringIO()
+    assert run_linter(project_path / "project", checks=None, output=output, jobs=2)
+    assert output.getvalue() == expected.getvalue()
+
+    history = CostHistory.load(project_path / ".oida" / COSTS_FILE_NAME)
+    assert str(project_path / "project/first/app/models.py") in history.costs
@@ -0,0 +1,172 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from oida.commands.cycles import find_feedback_edges, find_import_cycles
+from oida.graph import strongly_connected_components
+
+
+def test_strongly_connected_components() -> None:
+    graph = {
+        "a": {"b": 1},
+        "b": {"c": 1},
+        "c": {"a": 1, "d": 1},
+        "d": {"e": 1},
+        "e": {"d": 1},
+        "f": {"a": 1},
+    }
+
+    components = sorted(strongly_connected_components(graph))
+
+    assert components == [["a", "b", "c"], ["d", "e"], ["f"]]
+
+
+def test_strongly_connected_components_deep_graph() -> None:
+    size = 10000
+    graph = {str(i): {str(i + 1): 1} for i in range(size)}
+    graph[str(size)] = {"0": 1}
+
+    components = strongly_connected_components(graph)
+
+    assert len(components) == 1
+    assert len(components[0]) == size + 1
+
+
+def test_find_feedback_edges_prefers_light_edges() -> None:
+    graph = {"a": {"b": 10}, "b": {"a": 1}}
+
+    assert find_feedback_edges(graph, ["a", "b"]) == [("b", "a", 1)]
+
+
+def is_acyclic(graph: dict[str, dict[str, int]], removed: set[tuple[str, str]]) -> bool:
+    remaining = {
+        source: {
+            target: weight
+            for target, weight in targets.items()
+            if (source, target) not in removed
+        }
+        for source, targets in graph.items()
+    }
+    return all(
+        len(component) == 1 for component in strongly_connected_components(remaining)
+    )
+
+
+def test_find_feedback_edges_breaks_all_cycles() -> None:
+    graph = {
+        "a": {"b": 1, "c": 1},
+        "b": {"c": 1, "a": 1},
+        "c": {"a": 1, "b": 1},
+    }
+
+    edges = find_feedback_edges(graph, graph)
+
+    removed = {(source, target) for source, target, _ in edges}
+    assert is_acyclic(graph, removed)
+    # One edge of each pair of nodes importing each other
+    assert len(removed) == 3
+
+
+def test_find_feedback_edges_large_component() -> None:
+    size = 5000
+    graph = {
+        str(i): {str((i + 1) % size): 1, str((i * 7 + 3) % size): 2}
+        for i in range(size)
+    }
+
+    start = time.perf_counter()
+    edges = find_feedback_edges(graph, graph)
+    # Ordering is close to linear and restoring edges only searches between
+    # their ends, so this takes well under a second
+    assert time.perf_counter() - start < 10
+
+    assert is_acyclic(graph, {(source, target) for source, target, _ in edges})
+    assert len(edges) < size
+
+
+def test_find_feedback_edges_minimal() -> None:
+    # The ordering puts b before c, so c -> b points backwards as well, but
+    # removing a -> c alone breaks both cycles
+    graph = {"a": {"c": 2}, "b": {"a": 3}, "c": {"a": 3, "b": 1}}
+
+    edges = find_feedback_edges(graph, graph)
+
+    assert edges == [("a", "c", 2)]
+    removed = {(source, target) for source, target, _ in edges}
+    assert is_acyclic(graph, removed)
+    assert not any(is_acyclic(graph, removed - {edge}) for edge in removed)
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/services.py": """\
+            from project.second.services import y
+            from project.second.selectors import z
+            """,
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": "",
+        "project/second/__init__.py": "",
+        "project/second/services.py": "x = 1",
+        "project/second/selectors.py": "from project.first.services import w",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+        "project/third/__init__.py": "",
+        "project/third/app/__init__.py": "",
+        "project/third/app/apps.py": "",
+        "project/third/app/models.py": "from . import views",
+        "project/third/app/views.py": "\nfrom .models import Model",
+    }
+)
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_find_import_cycles(project_path: Path, use_cache: bool) -> None:
+    project = project_path / "project"
+
+    report = find_import_cycles(project, use_cache=use_cache)
+
+    assert len(report.component_cycles) == 1
+    component_cycle = report.component_cycles[0]
+    assert component_cycle.nodes == ["project.first", "project.second"]
+    assert component_cycle.edges == [("project.second", "project.first", 1)]
+    assert component_cycle.locations == {
+        ("project.second", "project.first"): f"{project}/second/selectors.py:1"
+    }
+
+    assert [cycle.nodes for cycle in report.module_cycles] == [
+        ["project.first.services", "project.second.selectors"],
+        ["project.third.app.models", "project.third.app.views"],
+    ]
+    assert len(report.module_cycles[1].edges) == 1
+
+    data = json.loads(report.json())
+    assert data["component_cycles"][0]["break"] == [
+        {
+            "source": "project.second",
+            "target": "project.first",
+            "weight": 1,
+            "location": f"{project}/second/selectors.py:1",
+        }
+    ]
+    assert "Component cycles: 1" in str(report)
+    assert "Module cycles: 2" in str(report)
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/services.py": "from project.second.services import y",
+        "project/second/__init__.py": "",
+        "project/second/services.py": "x = 1",
+    }
+)
+def test_find_import_cycles_without_cycles(project_path: Path) -> None:
+    report = find_import_cycles(project_path / "project")
+
+    assert not report.component_cycles
+    assert not report.module_cycles
@@ -0,0 +1,170 @@
+import io
+import shutil
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from oida import distributed
+from oida.commands.linter import run_linter
+from oida.distributed import (
+    CoordinatorError,
+    connect,
+    parse_address,
+    receive_message,
+    run_worker,
+)
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            """,
+        "project/first/app/services.py": """\
+            from project.second.app.models import Model
+
+            def get_model(pk):
+                return Model.objects.get(pk=pk)
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+
+def get_free_address() -> tuple[str, int]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        address: tuple[str, int] = sock.getsockname()
+        return address
+
+
+def start_coordinator(
+    project_path: Path,
+    address: tuple[str, int],
+    output: io.StringIO,
+    errors: list[Exception] | None = None,
+) -> threading.Thread:
+    def run() -> None:
+        try:
+            run_linter(
+                project_path / "project",
+                checks=None,
+                output=output,
+                coordinator=address,
+            )
+        except CoordinatorError as e:
+            if errors is None:
+                raise
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_parse_address() -> None:
+    assert parse_address("example.com:7000") == ("example.com", 7000)
+    assert parse_address("7000") == ("localhost", 7000)
+    with pytest.raises(ValueError):
+        parse_address("example.com")
+    with pytest.raises(ValueError):
+        parse_address("example.com:70000")
+
+
+def test_lint_with_workers(project_path: Path) -> None:
+    expected = io.StringIO()
+    run_linter(project_path / "project", checks=None, output=expected)
+
+    address = get_free_address()
+    output = io.StringIO()
+    coordinator = start_coordinator(project_path, address, output)
+
+    # A worker that dies after taking the first batch
+    with connect(address, timeout=10) as client, client.makefile("rb") as rfile:
+        message = receive_message(rfile)
+        assert message and message["type"] == "batch"
+
+    # The batch is handed out again
+    assert run_worker(address, project_path) == 10
+    coordinator.join(timeout=10)
+
+    assert not coordinator.is_alive()
+    assert output.getvalue() == expected.getvalue()
+
+
+def test_worker_with_different_configs(project_path: Path, tmp_path: Path) -> None:
+    # Another checkout of the project, where the configs have been changed
+    checkout = tmp_path / "checkout"
+    shutil.copytree(project_path / "project", checkout / "project")
+    (checkout / "pyproject.toml").write_text(
+        '[tool.oida]\nignored_modules = ["project.first"]\n'
+    )
+
+    address = get_free_address()
+    output = io.StringIO()
+    errors: list[Exception] = []
+    coordinator = start_coordinator(project_path, address, output, errors)
+
+    with pytest.raises(CoordinatorError, match="The configs for project/.* differ"):
+        run_worker(address, checkout)
+    coordinator.join(timeout=10)
+
+    assert not coordinator.is_alive()
+    assert output.getvalue() == ""
+    assert len(errors) == 1
+    assert isinstance(errors[0], CoordinatorError)
+    assert "The configs for project/" in str(errors[0])
+
+
+def test_worker_reports_any_error(
+    project_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def lint_task(*args: object) -> None:
+        raise RuntimeError("Unexpected")
+
+    monkeypatch.setattr(distributed, "lint_task", lint_task)
+    address = get_free_address()
+    errors: list[Exception] = []
+    coordinator = start_coordinator(project_path, address, io.StringIO(), errors)
+
+    with pytest.raises(CoordinatorError, match="Could not lint batch: Unexpected"):
+        run_worker(address, project_path)
+    coordinator.join(timeout=10)
+
+    assert not coordinator.is_alive()
+    assert len(errors) == 1
+    assert "RuntimeError: Unexpected" in str(errors[0])
+
+
+def test_coordinator_without_workers(
+    project_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(distributed, "IDLE_TIMEOUT", 2)
+    address = get_free_address()
+    errors: list[Exception] = []
+    coordinator = start_coordinator(project_path, address, io.StringIO(), errors)
+
+    # A worker that dies after taking the first batch, and no other worker
+    with connect(address, timeout=10) as client, client.makefile("rb") as rfile:
+        message = receive_message(rfile)
+        assert message and message["type"] == "batch"
+    coordinator.join(timeout=10)
+
+    assert not coordinator.is_alive()
+    assert len(errors) == 1
+    assert "No workers connected" in str(errors[0])
+
+
+def test_worker_without_coordinator() -> None:
+    with pytest.raises(CoordinatorError, match="Could not connect"):
+        run_worker(get_free_address(), Path.cwd(), connect_timeout=0)
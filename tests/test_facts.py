@@ -0,0 +1,88 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from oida.checkers import ALL_CHECKERS
+from oida.commands.linter import check_module, extract_facts, run_linter
+from oida.config import ComponentConfig, ProjectConfig
+from oida.discovery import check_file, get_component_config
+from oida.facts import ModuleFacts
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/services.py": """\
+            from project.second.app.models import Model
+            from project.second.app import selectors
+
+            def get_model(pk):
+                Model.objects.select_for_update()
+                selectors.get_other()  # noida: ODA005
+                return Model.objects.get(pk=pk)
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+
+@pytest.mark.parametrize(
+    "component_config,project_config",
+    [
+        (None, ProjectConfig()),
+        (
+            ComponentConfig(allowed_imports=frozenset({"project.second.app.*"})),
+            ProjectConfig(),
+        ),
+        (None, ProjectConfig(allowed_imports=["project.second.app.models.Model"])),
+        (None, ProjectConfig(ignored_modules=["project.first.*"])),
+    ],
+)
+def test_facts_give_the_same_violations(
+    project_path: Path,
+    component_config: ComponentConfig | None,
+    project_config: ProjectConfig,
+) -> None:
+    module = check_file(project_path / "project/first/app/services.py")
+    facts = ModuleFacts.deserialize(extract_facts(module).serialize())
+
+    assert facts.get_violations(
+        ALL_CHECKERS, module.module, module.name, component_config, project_config
+    ) == check_module(
+        module,
+        ALL_CHECKERS,
+        component_config=component_config,
+        project_config=project_config,
+    )
+
+
+def test_config_changes_use_stored_facts(project_path: Path) -> None:
+    metrics_file = project_path / "metrics.txt"
+    output = io.StringIO()
+    run_linter(project_path / "project", checks=None, output=output)
+    assert 'Private attribute "project.second.app.models.Model"' in output.getvalue()
+
+    (project_path / "project/first/confcomponent.py").write_text(
+        'ALLOWED_IMPORTS = {"project.second.app.models.Model"}\n'
+    )
+    get_component_config.cache_clear()
+    output = io.StringIO()
+    run_linter(
+        project_path / "project",
+        checks=None,
+        output=output,
+        metrics_file=metrics_file,
+    )
+    assert 'Private attribute "project.second.app.models.Model"' not in (
+        output.getvalue()
+    )
+    assert "select_for_update() must specify" in output.getvalue()
+
+    # Only the new config file was parsed
+    assert 'oida_lint_cache_misses_total{cache="store"} 1' in metrics_file.read_text()
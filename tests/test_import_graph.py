@@ -0,0 +1,153 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from oida.discovery import find_modules
+from oida.graph import Edge, Import, ImportGraph, build_import_graph
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/component/__init__.py": "",
+        "project/component/services.py": """\
+            from .app.services import create
+
+            def service() -> None:
+                from project.other.selectors import lazy
+            """,
+        "project/component/app/__init__.py": "",
+        "project/component/app/services.py": """\
+            import os
+            import project.other
+            from django.db import models
+            from project.other.models import Model
+            from .. import services
+            """,
+        "project/other/__init__.py": "",
+        "project/other/models.py": "",
+        "project/other/selectors.py": "",
+    }
+)
+
+
+def age_files(path: Path) -> None:
+    timestamp = time.time() - 60
+    for child in path.rglob("*.py"):
+        os.utime(child, (timestamp, timestamp))
+
+
+def test_imports(project_path: Path) -> None:
+    graph = ImportGraph()
+    graph.update(find_modules(project_path / "project"))
+
+    assert graph.imports("project.component.app.services") == [
+        Import("project.other", 2),
+        Import("project.other.models.Model", 4),
+        Import("project.component.services", 5),
+    ]
+    assert graph.imports("project.component.services") == [
+        Import("project.component.app.services.create", 1),
+        Import("project.other.selectors.lazy", 4),
+    ]
+
+
+def test_edges(project_path: Path) -> None:
+    graph = ImportGraph()
+    graph.update(find_modules(project_path / "project"))
+
+    assert sorted(graph.edges()) == [
+        Edge("project.component.app.services", "project.component.services", 5),
+        Edge("project.component.app.services", "project.other", 2),
+        Edge("project.component.app.services", "project.other.models", 4),
+        Edge("project.component.services", "project.component.app.services", 1),
+        Edge("project.component.services", "project.other.selectors", 4),
+    ]
+
+
+def test_save_and_load(project_path: Path) -> None:
+    graph_path = project_path / "graph"
+    graph = ImportGraph(graph_path)
+    graph.update(find_modules(project_path / "project"))
+    graph.save()
+
+    loaded = ImportGraph.load(graph_path)
+    assert loaded.modules == graph.modules
+    assert sorted(loaded.edges()) == sorted(graph.edges())
+
+
+def test_typing_imports(project_path: Path) -> None:
+    (project_path / "project/other/models.py").write_text(
+        """\
+from typing import TYPE_CHECKING
+import typing
+
+if TYPE_CHECKING:
+    from project.component.app.services import Service
+else:
+    from project.other.selectors import select
+if typing.TYPE_CHECKING:
+    import project.component.services
+"""
+    )
+    graph = ImportGraph(project_path / "graph")
+    graph.update(find_modules(project_path / "project"))
+    graph.save()
+    graph = ImportGraph.load(project_path / "graph")
+
+    # Imports for type checking are left out unless asked for
+    assert graph.imports("project.other.models") == [
+        Import("project.other.selectors.select", 7)
+    ]
+    assert graph.imports("project.other.models", typing=True) == [
+        Import("project.other.selectors.select", 7),
+        Import("project.component.app.services.Service", 5),
+        Import("project.component.services", 9),
+    ]
+    assert {
+        edge.target for edge in graph.edges() if edge.source == "project.other.models"
+    } == {"project.other.selectors"}
+    assert {
+        edge.target
+        for edge in graph.edges(typing=True)
+        if edge.source == "project.other.models"
+    } == {
+        "project.other.selectors",
+        "project.component.app.services",
+        "project.component.services",
+    }
+
+
+def test_update_only_parses_changed_files(project_path: Path) -> None:
+    age_files(project_path)
+    graph = ImportGraph()
+    modules = list(find_modules(project_path / "project"))
+    assert graph.update(modules) == len(modules)
+    assert graph.update(modules) == 0
+
+    services_path = project_path / "project" / "other" / "selectors.py"
+    services_path.write_text("from project.other.models import Model\n")
+    modules = list(find_modules(project_path / "project"))
+
+    assert graph.update(modules) == 1
+    assert graph.imports("project.other.selectors") == [
+        Import("project.other.models.Model", 1)
+    ]
+
+
+def test_update_removes_deleted_files(project_path: Path) -> None:
+    graph = ImportGraph()
+    graph.update(find_modules(project_path / "project"))
+
+    (project_path / "project" / "other" / "models.py").unlink()
+    graph.update(find_modules(project_path / "project"))
+
+    assert "project.other.models" not in graph.modules
+
+
+def test_build_import_graph(project_path: Path) -> None:
+    graph = build_import_graph(project_path / "project")
+
+    assert (project_path / ".oida" / "imports").exists()
+    assert len(graph.modules) == 8
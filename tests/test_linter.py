@@ -0,0 +1,105 @@
+import io
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from oida.commands.linter import run_linter
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            Model.objects.filter()
+            """,
+        "project/first/app/services.py": """\
+            from project.second.app.models import Model
+
+            def get_model(pk):
+                return Model.objects.get(pk=pk)
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_max_violations(project_path: Path, jobs: int) -> None:
+    output = io.StringIO()
+    assert run_linter(
+        project_path / "project",
+        checks=None,
+        output=output,
+        jobs=jobs,
+        max_violations=3,
+    )
+    assert len(output.getvalue().splitlines()) == 3
+
+
+def test_fail_fast_stops_discovery(project_path: Path) -> None:
+    metrics_file = project_path / "metrics.txt"
+    output = io.StringIO()
+    assert run_linter(
+        project_path / "project",
+        checks=None,
+        output=output,
+        metrics_file=metrics_file,
+        max_violations=1,
+    )
+
+    assert output.getvalue() == (
+        f"{project_path}/project/first/app/models.py:3:0: "
+        'Private attribute "project.second.app.models.Model" referenced\n'
+    )
+    # Discovery stopped at the first file with a violation
+    assert "oida_lint_files_total 3\n" in metrics_file.read_text()
+
+
+def age_files(path: Path) -> None:
+    """Set the mtime of everything in the project to a minute ago"""
+
+    timestamp = time.time() - 60
+    for child in path.rglob("*"):
+        os.utime(child, (timestamp, timestamp))
+    os.utime(path, (timestamp, timestamp))
+
+
+def test_files_are_read_once(
+    project_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    reads: list[Path] = []
+    read_bytes = Path.read_bytes
+
+    def counting_read_bytes(path: Path) -> bytes:
+        if path.suffix == ".py":
+            reads.append(path)
+        return read_bytes(path)
+
+    monkeypatch.setattr(Path, "read_bytes", counting_read_bytes)
+    age_files(project_path)
+
+    output = io.StringIO()
+    run_linter(project_path / "project", checks=None, output=output)
+    assert len(reads) == len(set(reads)) == 10
+
+    # The same violations are found without the result store
+    uncached = io.StringIO()
+    run_linter(project_path / "project", checks=None, output=uncached, use_store=False)
+    assert uncached.getvalue() == output.getvalue()
+
+    # Unchanged files are answered by the store without being read
+    reads.clear()
+    cached = io.StringIO()
+    run_linter(project_path / "project", checks=None, output=cached)
+    assert cached.getvalue() == output.getvalue()
+    assert reads == []
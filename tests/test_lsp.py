@@ -0,0 +1,251 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from oida.discovery import get_component_config
+from oida.lsp import LanguageServer, MessageReader
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": "",
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+VIOLATING_CONTENT = """\
+from project.second.app.models import Model
+
+Model.objects.get()
+"""
+
+
+def read_messages(data: bytes) -> list[dict[str, Any]]:
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, data)
+    os.close(write_fd)
+    reader = MessageReader(read_fd)
+    messages = []
+    while (batch := reader.read()) is not None:
+        messages.extend(batch)
+    os.close(read_fd)
+    return messages
+
+
+def encode_messages(*messages: dict[str, Any]) -> bytes:
+    data = b""
+    for message in messages:
+        body = json.dumps({"jsonrpc": "2.0", **message}).encode()
+        data += f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    return data
+
+
+def get_diagnostics(output: io.BytesIO) -> dict[str, list[str]]:
+    """Get the codes of the last diagnostics published for each document"""
+
+    diagnostics = {}
+    for message in read_messages(output.getvalue()):
+        if message.get("method") == "textDocument/publishDiagnostics":
+            diagnostics[message["params"]["uri"]] = [
+                diagnostic["code"] for diagnostic in message["params"]["diagnostics"]
+            ]
+    output.seek(0)
+    output.truncate()
+    return diagnostics
+
+
+def open_document(server: LanguageServer, uri: str, text: str) -> None:
+    server.handle(
+        {
+            "method": "textDocument/didOpen",
+            "params": {
+                "textDocument": {
+                    "uri": uri,
+                    "languageId": "python",
+                    "version": 1,
+                    "text": text,
+                }
+            },
+        }
+    )
+
+
+def change_document(server: LanguageServer, uri: str, text: str) -> None:
+    server.handle(
+        {
+            "method": "textDocument/didChange",
+            "params": {
+                "textDocument": {"uri": uri, "version": 2},
+                "contentChanges": [{"text": text}],
+            },
+        }
+    )
+
+
+def test_lint_unsaved_changes(project_path: Path) -> None:
+    output = io.BytesIO()
+    server = LanguageServer(output, delay=60)
+    uri = (project_path / "project/first/app/models.py").as_uri()
+
+    open_document(server, uri, VIOLATING_CONTENT)
+    server.lint_pending()
+    assert get_diagnostics(output) == {uri: ["ODA005"]}
+
+    # Changes are only linted after the debounce delay
+    change_document(server, uri, "")
+    server.lint_pending()
+    assert get_diagnostics(output) == {}
+    assert server.get_timeout() == pytest.approx(60, abs=1)
+
+    server.pending[uri] = 0
+    server.lint_pending()
+    assert get_diagnostics(output) == {uri: []}
+
+
+def test_skip_invalid_messages() -> None:
+    read_fd, write_fd = os.pipe()
+    os.write(
+        write_fd,
+        b"Content-Type: text/plain\r\n\r\n"
+        + b"Content-Length: 3\r\n\r\n{{{"
+        + b"Content-Length: 2\r\n\r\n[]"
+        + encode_messages({"method": "exit"}),
+    )
+    os.close(write_fd)
+    reader = MessageReader(read_fd)
+
+    assert reader.read() == [{"jsonrpc": "2.0", "method": "exit"}]
+    assert len(reader.errors) == 3
+    os.close(read_fd)
+
+
+def test_handle_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    output = io.BytesIO()
+    server = LanguageServer(output, checks=None)
+
+    def handle_request(*args: object) -> None:
+        raise RuntimeError("Unexpected")
+
+    # A notification without the params it needs is only logged, and a request
+    # that fails gets an error response
+    server.handle({"method": "textDocument/didOpen"})
+    monkeypatch.setattr(server, "handle_request", handle_request)
+    server.handle({"id": 1, "method": "initialize"})
+
+    log, request_log, response = read_messages(output.getvalue())
+    assert log["method"] == request_log["method"] == "window/logMessage"
+    assert "Failed to handle textDocument/didOpen: KeyError" in log["params"]["message"]
+    assert response["id"] == 1
+    assert response["error"] == {"code": -32603, "message": "RuntimeError: Unexpected"}
+    assert not server.exited
+
+
+def test_diagnostic_columns_in_utf16(project_path: Path) -> None:
+    output = io.BytesIO()
+    server = LanguageServer(output)
+    uri = (project_path / "project/first/app/models.py").as_uri()
+
+    open_document(
+        server,
+        uri,
+        'from project.second.app.models import Model\n\n_ = "æ🎉"; Model.objects.get()\n',
+    )
+    server.lint_pending()
+
+    (message,) = read_messages(output.getvalue())
+    (diagnostic,) = message["params"]["diagnostics"]
+    # Two UTF-16 code units for the emoji, but four UTF-8 bytes
+    assert diagnostic["range"]["start"] == {"line": 2, "character": 11}
+
+
+def test_lint_syntax_error(project_path: Path) -> None:
+    output = io.BytesIO()
+    server = LanguageServer(output)
+    uri = (project_path / "project/first/app/models.py").as_uri()
+
+    open_document(server, uri, "def incomplete(")
+    server.lint_pending()
+    assert get_diagnostics(output) == {uri: []}
+
+
+def test_confcomponent_save_invalidates_subtree(project_path: Path) -> None:
+    output = io.BytesIO()
+    server = LanguageServer(output)
+    first_uri = (project_path / "project/first/app/models.py").as_uri()
+    second_uri = (project_path / "project/second/app/models.py").as_uri()
+
+    open_document(server, first_uri, VIOLATING_CONTENT)
+    open_document(server, second_uri, "")
+    server.lint_pending()
+    assert get_diagnostics(output) == {first_uri: ["ODA005"], second_uri: []}
+
+    config_path = project_path / "project/first/confcomponent.py"
+    config_path.write_text('ALLOWED_IMPORTS = {"project.second.app.models.Model"}')
+
+    # Configs are cached until the file is saved
+    open_document(server, first_uri, VIOLATING_CONTENT)
+    server.lint_pending()
+    assert get_diagnostics(output) == {first_uri: ["ODA005"]}
+
+    server.handle(
+        {
+            "method": "textDocument/didSave",
+            "params": {"textDocument": {"uri": config_path.as_uri()}},
+        }
+    )
+    assert (project_path / "project/second/app") in get_component_config.results
+    assert (project_path / "project/first/app") not in get_component_config.results
+
+    # Only the documents below the component are linted again
+    server.lint_pending()
+    assert get_diagnostics(output) == {first_uri: []}
+
+
+def test_serve(project_path: Path) -> None:
+    uri = (project_path / "project/first/app/models.py").as_uri()
+    process = subprocess.run(
+        [sys.executable, "-m", "oida", "lsp"],
+        input=encode_messages(
+            {"id": 1, "method": "initialize", "params": {}},
+            {"method": "initialized", "params": {}},
+            {
+                "method": "textDocument/didOpen",
+                "params": {
+                    "textDocument": {
+                        "uri": uri,
+                        "languageId": "python",
+                        "version": 1,
+                        "text": VIOLATING_CONTENT,
+                    }
+                },
+            },
+            {"id": 2, "method": "shutdown"},
+            {"method": "exit"},
+        ),
+        capture_output=True,
+        timeout=30,
+    )
+
+    assert process.returncode == 0, process.stderr.decode()
+    messages = read_messages(process.stdout)
+    assert messages[0]["id"] == 1
+    assert messages[0]["result"]["capabilities"]["textDocumentSync"]["change"] == 1
+    assert {"jsonrpc": "2.0", "id": 2, "result": None} in messages
+    assert [
+        diagnostic["code"]
+        for message in messages
+        if message.get("method") == "textDocument/publishDiagnostics"
+        for diagnostic in message["params"]["diagnostics"]
+    ] == ["ODA005"]
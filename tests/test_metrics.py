@@ -0,0 +1,111 @@
+from pathlib import Path
+
+import pytest
+
+from oida.commands.linter import run_linter
+from oida.metrics import MetricsWriter
+from oida.statistics.statistics_generator import generate_statistics
+
+
+def test_metrics_writer() -> None:
+    writer = MetricsWriter()
+    writer.gauge("components", "Number of components", 3)
+    writer.add(
+        "violations",
+        "counter",
+        "Violations",
+        [({"code": "ODA005", "component": 'a"b'}, 2)],
+    )
+    writer.add("duration_seconds", "gauge", "Duration", [({}, 0.5)], unit="seconds")
+
+    assert writer.getvalue().splitlines() == [
+        "# TYPE oida_components gauge",
+        "# HELP oida_components Number of components",
+        "oida_components 3",
+        "# TYPE oida_violations counter",
+        "# HELP oida_violations Violations",
+        'oida_violations_total{code="ODA005",component="a\\"b"} 2',
+        "# TYPE oida_duration_seconds gauge",
+        "# UNIT oida_duration_seconds seconds",
+        "# HELP oida_duration_seconds Duration",
+        "oida_duration_seconds 0.5",
+        "# EOF",
+    ]
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/services.py": "x = 1",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            Model.objects.filter()
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+        "project/other/__init__.py": "",
+        "project/other/apps.py": "",
+        "project/other/models.py": "from .. import models",
+    }
+)
+def test_lint_metrics_file(project_path: Path) -> None:
+    metrics_file = project_path / "metrics/lint.txt"
+
+    assert run_linter(project_path / "project", checks=[], metrics_file=metrics_file)
+
+    lines = metrics_file.read_text().splitlines()
+    assert "oida_lint_files_total 13" in lines
+    assert (
+        'oida_lint_violations_total{code="ODA005",component="project.first"} 2' in lines
+    )
+    assert 'oida_lint_violations_total{code="ODA001",component=""} 1' in lines
+    assert any(
+        line.startswith('oida_lint_cache_hit_ratio{cache="snapshot"}') for line in lines
+    )
+    for stage in ("discover", "config", "parse", "check", "report"):
+        assert any(
+            line.startswith(f'oida_lint_stage_duration_seconds{{stage="{stage}"}}')
+            for line in lines
+        )
+    assert lines[-1] == "# EOF"
+
+
+@pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/services.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": "",
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+        "project/other/__init__.py": "",
+        "project/other/apps.py": "",
+        "project/other/models.py": "",
+    }
+)
+def test_statistics_openmetrics(project_path: Path) -> None:
+    statistics = generate_statistics(project_path / "project", coupling=True)
+
+    lines = statistics.openmetrics().splitlines()
+
+    assert "oida_components 2" in lines
+    assert "oida_components_with_public_api 1" in lines
+    assert "oida_components_with_public_api_ratio 0.5" in lines
+    assert "oida_apps 3" in lines
+    assert "oida_apps_in_components 2" in lines
+    assert 'oida_component_public_api{component="first"} 1' in lines
+    assert 'oida_component_public_api{component="second"} 0' in lines
+    assert 'oida_app_in_component{app="other"} 0' in lines
+    assert 'oida_component_instability{component="project.first"} 0' in lines
+    assert lines[-1] == "# EOF"
@@ -0,0 +1,26 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+from oida.module import Source
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"a = 1\nb = 2\n",
+        b"a = 1\nb = 2",
+        b"a = 1\r\nb = 2\r\n",
+        b"a = 1\rb = 2\r",
+        b"a = 1\n\r\nb = '\xc3\xa6'\n\n",
+    ],
+)
+def test_source_lines(data: bytes) -> None:
+    source = Source(Path("module.py"), data)
+
+    assert list(source.lines) == data.decode().splitlines()
+    for node in ast.walk(source.ast):
+        if isinstance(node, ast.Name):
+            assert source.lines[node.lineno - 1].startswith(node.id)
@@ -0,0 +1,106 @@
+import io
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from oida.checkers import Code, Violation
+from oida.commands import lint_new_since
+from oida.fingerprints import get_context_hash, get_fingerprint
+from oida.store import ResultStore, get_content_hash, get_store_dir
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            """,
+        "project/first/app/services.py": "",
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+
+def git(path: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=path, check=True, capture_output=True, text=True
+    ).stdout
+
+
+@pytest.fixture
+def repository(project_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    git(project_path, "init", "-q", "-b", "main")
+    git(project_path, "config", "user.email", "oida@example.com")
+    git(project_path, "config", "user.name", "Oida")
+    git(project_path, "add", ".")
+    git(project_path, "commit", "-q", "-m", "First")
+    git(project_path, "checkout", "-q", "-b", "feature")
+    monkeypatch.chdir(project_path)
+    return project_path
+
+
+def test_fingerprint_ignores_position() -> None:
+    old = Violation(3, 0, Code.ODA005, 'Private attribute "a.b" referenced')
+    new = Violation(5, 4, Code.ODA005, 'Private  attribute "a.b" referenced')
+
+    assert get_fingerprint(
+        old, "project.app", "models", get_context_hash(["", "", "a.b()", ""], 3)
+    ) == get_fingerprint(
+        new,
+        "project.app",
+        "models",
+        get_context_hash(["", "", "", "", "    a.b()  ", ""], 5),
+    )
+
+
+def test_lint_new_since(repository: Path) -> None:
+    (repository / "project/first/app/models.py").write_text(
+        """\
+from project.second.app.models import Model, Other
+
+# Lines added above an existing violation
+
+
+Model.objects.get()
+
+
+def get_other():
+    return Other.objects.get()
+"""
+    )
+    (repository / "project/first/app/services.py").write_text(
+        """\
+from project.second.app.models import Model
+
+Model.objects.get()
+"""
+    )
+
+    output = io.StringIO()
+    assert lint_new_since(Path("project"), ref="main", checks=None, output=output)
+    assert output.getvalue().splitlines() == [
+        'project/first/app/models.py:10:11: Private attribute "project.second.app.models.Other" referenced',  # noqa: E501
+        'project/first/app/services.py:3:0: Private attribute "project.second.app.models.Model" referenced',  # noqa: E501
+    ]
+
+    # Results for the merge base are stored by blob, for the files that have
+    # violations now
+    store = ResultStore(get_store_dir(repository))
+    for name in ["models", "services"]:
+        blob = git(repository, "show", f"main:project/first/app/{name}.py")
+        entry = store.load(get_content_hash(blob.encode()), "project.first.app", name)
+        assert entry.get_context_hashes() is not None
+
+
+def test_lint_new_since_without_changes(repository: Path) -> None:
+    output = io.StringIO()
+    assert not lint_new_since(Path("project"), ref="main", checks=None, output=output)
+    assert output.getvalue() == ""
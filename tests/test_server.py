@@ -0,0 +1,137 @@
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from oida import server as server_module
+from oida.commands.linter import run_linter
+from oida.server import LintServer, get_socket_path, lint_with_server, send_request
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+
+@pytest.fixture
+def server(project_path: Path) -> Iterator[LintServer]:
+    lint_server = LintServer(get_socket_path(project_path, create=True))
+
+    def serve() -> None:
+        while not lint_server.stopping:
+            lint_server.handle_request()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    try:
+        yield lint_server
+    finally:
+        send_request(lint_server.socket_path, {"command": "stop"})
+        thread.join()
+        lint_server.server_close()
+
+
+def age(path: Path) -> None:
+    """Make files old enough for their lint results to be cached"""
+
+    for file in path.glob("**/*.py"):
+        stat = file.stat()
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+
+
+def test_lint_without_server(project_path: Path) -> None:
+    assert lint_with_server(project_path / "project", checks=None) is None
+
+
+def test_lint_with_server(
+    project_path: Path,
+    server: LintServer,
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(project_path)
+    age(project_path)
+
+    run_linter(Path("project"), checks=None)
+    expected = capsys.readouterr().out
+    assert "project/first/app/models.py:3:0:" in expected
+
+    result = lint_with_server(Path("project"), checks=None)
+
+    assert result == (True, expected)
+    assert server.cache.misses == 9
+    assert server.cache.hits == 0
+
+    # Unchanged files are not linted again
+    assert lint_with_server(Path("project"), checks=None) == (True, expected)
+    assert server.cache.hits == 9
+
+    # Config changes are picked up
+    (project_path / "project/first/confcomponent.py").write_text(
+        'ALLOWED_IMPORTS = {"project.second.app.models.Model"}'
+    )
+    assert lint_with_server(Path("project"), checks=None) == (False, "")
+
+
+def test_server_status(project_path: Path, server: LintServer) -> None:
+    response = send_request(server.socket_path, {"command": "status"})
+
+    assert response == {"pid": os.getpid(), "files": 0}
+
+
+def test_socket_path_fallback(
+    project_path: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(server_module, "MAX_SOCKET_PATH_LENGTH", 0)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "runtime"))
+    socket_path = get_socket_path(project_path)
+    assert socket_path is not None
+    assert socket_path.parent == tmp_path / "runtime"
+
+    # Otherwise the socket is in a private directory, which clients find from
+    # the cache directory
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert get_socket_path(project_path) is None
+    socket_path = get_socket_path(project_path, create=True)
+    try:
+        assert socket_path.parent.stat().st_mode & 0o777 == 0o700
+        assert get_socket_path(project_path) == socket_path
+    finally:
+        socket_path.parent.rmdir()
+    assert get_socket_path(project_path) is None
+
+
+def test_invalid_response(project_path: Path) -> None:
+    socket_path = get_socket_path(project_path)
+    assert socket_path is not None
+
+    # Something listening on the socket that closes connections without
+    # responding
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(os.fspath(socket_path))
+        listener.listen()
+
+        def respond() -> None:
+            connection, _ = listener.accept()
+            connection.close()
+
+        thread = threading.Thread(target=respond)
+        thread.start()
+        assert lint_with_server(project_path / "project", checks=None) is None
+        thread.join()
@@ -0,0 +1,94 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from oida.commands.linter import run_linter
+from oida.commands.shards import merge_results, parse_shard, select_shard
+from oida.discovery import find_modules
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            """,
+        "project/first/app/services.py": """\
+            from project.second.app.models import Model
+
+            def get_model(pk):
+                return Model.objects.get(pk=pk)
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "# " + "x" * 1000,
+    }
+)
+
+
+def test_parse_shard() -> None:
+    assert parse_shard("2/3") == (2, 3)
+    with pytest.raises(ValueError):
+        parse_shard("0/3")
+    with pytest.raises(ValueError):
+        parse_shard("4/3")
+    with pytest.raises(ValueError):
+        parse_shard("a/b")
+
+
+def test_select_shard(project_path: Path) -> None:
+    modules = list(find_modules(project_path / "project"))
+    shards = [
+        {module.path for module in select_shard(modules, index, 3)}
+        for index in range(1, 4)
+    ]
+
+    # Every module is in exactly one shard
+    assert sorted(path for shard in shards for path in shard) == sorted(
+        module.path for module in modules
+    )
+    # The largest file gets a shard of its own
+    assert shards[0] == {project_path / "project/second/app/models.py"}
+    # The assignment doesn't depend on the order of the modules
+    reversed_shard = select_shard(reversed(modules), 2, 3)
+    assert {module.path for module in reversed_shard} == shards[1]
+
+
+def test_merge_results(project_path: Path) -> None:
+    expected = io.StringIO()
+    run_linter(project_path / "project", checks=None, output=expected)
+
+    result_files = []
+    for index in (1, 2):
+        result_file = project_path / f"results-{index}.json"
+        run_linter(
+            project_path / "project",
+            checks=None,
+            output=io.StringIO(),
+            shard=(index, 2),
+            result_file=result_file,
+        )
+        result_files.append(result_file)
+
+    data = json.loads(result_files[0].read_text())
+    assert data["shard"] == [1, 2]
+
+    output = io.StringIO()
+    assert merge_results(*result_files, output=output)
+    # Violations are sorted by file and position
+    assert output.getvalue().splitlines() == sorted(
+        expected.getvalue().splitlines(),
+        key=lambda line: [
+            int(part) if part.isdigit() else part for part in line.split(":")[:3]
+        ],
+    )
+
+    with pytest.raises(SystemExit, match="Missing results for shards 2/2"):
+        merge_results(result_files[0])
@@ -0,0 +1,164 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from oida import discovery
+from oida.cache import get_cache_file
+from oida.discovery import (
+    find_components,
+    find_modules,
+    get_snapshot,
+    hash_file,
+    load_component_config,
+    with_content_hashes,
+)
+from oida.snapshot import ProjectSnapshot
+from oida.store import get_content_hash
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/component/__init__.py": "",
+        "project/component/confcomponent.py": """\
+            ALLOWED_IMPORTS = {"project.other.app.models.Model"}
+            """,
+        "project/component/app/__init__.py": "",
+        "project/component/app/apps.py": "",
+        "project/component/app/models.py": "",
+    }
+)
+
+
+def age_files(path: Path) -> None:
+    """Set the mtime of everything in the project to a minute ago"""
+
+    timestamp = time.time() - 60
+    for child in path.rglob("*"):
+        os.utime(child, (timestamp, timestamp))
+    os.utime(path, (timestamp, timestamp))
+
+
+def test_listing_is_persisted(project_path: Path) -> None:
+    age_files(project_path)
+    snapshot_path = project_path / ".oida" / "index"
+    snapshot = ProjectSnapshot(project_path, snapshot_path)
+
+    listing = snapshot.listing(project_path / "project" / "component")
+    assert listing is not None
+    assert listing.dirs == {"app"}
+    assert listing.files == {"__init__.py", "confcomponent.py"}
+
+    snapshot.save()
+    loaded = ProjectSnapshot.load(project_path, snapshot_path)
+    assert loaded.listings == snapshot.listings
+
+
+def test_unwritable_snapshot_is_kept_in_memory(project_path: Path) -> None:
+    age_files(project_path)
+    # A file in place of the cache directory can't be written to
+    (project_path / ".oida").write_text("")
+    assert get_cache_file(project_path / ".oida", "index") is None
+    snapshot = ProjectSnapshot(project_path, project_path / ".oida" / "index")
+
+    assert snapshot.listing(project_path / "project")
+    snapshot.save()
+
+    assert snapshot.path is None
+    assert snapshot.listings
+
+
+def test_listing_is_revalidated(project_path: Path) -> None:
+    age_files(project_path)
+    snapshot = ProjectSnapshot(project_path, None)
+    component_path = project_path / "project" / "component"
+    assert snapshot.listing(component_path)
+
+    (component_path / "services.py").touch()
+
+    listing = snapshot.listing(component_path)
+    assert listing is not None
+    assert "services.py" in listing.files
+
+
+def test_recently_modified_entries_are_not_cached(project_path: Path) -> None:
+    snapshot = ProjectSnapshot(project_path, None)
+
+    assert snapshot.listing(project_path / "project")
+    assert not snapshot.listings
+    assert not snapshot.dirty
+
+
+def test_listing_outside_project(project_path: Path) -> None:
+    age_files(project_path)
+    snapshot = ProjectSnapshot(project_path / "project", None)
+
+    assert snapshot.listing(project_path)
+    assert snapshot.listing(project_path / "missing") is None
+    assert not snapshot.listings
+
+
+def test_file_data(project_path: Path) -> None:
+    age_files(project_path)
+    snapshot = ProjectSnapshot(project_path, None)
+    path = project_path / "project" / "component" / "confcomponent.py"
+    calls: list[Path] = []
+
+    def loader(path: Path) -> str:
+        calls.append(path)
+        return path.read_text()
+
+    assert snapshot.file_data("test", path, loader) == snapshot.file_data(
+        "test", path, loader
+    )
+    assert calls == [path]
+
+    path.write_text("ALLOWED_IMPORTS = set()\n")
+    assert snapshot.file_data("test", path, loader) == "ALLOWED_IMPORTS = set()\n"
+    assert calls == [path, path]
+
+
+def test_discovery_uses_snapshot(project_path: Path) -> None:
+    age_files(project_path)
+    component_path = project_path / "project" / "component"
+
+    assert [component.name for component in find_components(component_path)] == [
+        "component"
+    ]
+    assert load_component_config(
+        component_path / "confcomponent.py"
+    ).allowed_imports == {"project.other.app.models.Model"}
+
+    snapshot = get_snapshot(component_path)
+    assert snapshot.root == str(project_path)
+    assert str(component_path) in snapshot.listings
+    assert (
+        str(component_path / "confcomponent.py") in snapshot.files["component-config"]
+    )
+
+
+def test_content_hashes(project_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    age_files(project_path)
+    models_path = project_path / "project" / "component" / "app" / "models.py"
+
+    modules = list(with_content_hashes(find_modules(project_path / "project")))
+    assert [module.content_hash for module in modules] == [
+        get_content_hash(module.path.read_bytes()) for module in modules
+    ]
+
+    # Unchanged files are not read again
+    hashed: list[Path] = []
+
+    def recording_hash_file(path: Path) -> str:
+        hashed.append(path)
+        return hash_file(path)
+
+    monkeypatch.setattr(discovery, "hash_file", recording_hash_file)
+    models_path.write_text("# Changed\n")
+    timestamp = time.time() - 60
+    os.utime(models_path, (timestamp, timestamp))
+    modules = list(with_content_hashes(find_modules(project_path / "project")))
+    assert hashed == [models_path]
+    assert modules[-1].path == models_path
+    assert modules[-1].content_hash == get_content_hash(b"# Changed\n")
@@ -0,0 +1,140 @@
+import io
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from oida.blobs import RevisionLayout
+from oida.commands import lint_staged
+from oida.store import ResultStore, get_content_hash, get_store_dir
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": "",
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+VIOLATING_CONTENT = """\
+from project.second.app.models import Model
+
+Model.objects.get()
+"""
+
+
+def git(path: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=path, check=True, capture_output=True, text=True
+    ).stdout
+
+
+@pytest.fixture
+def repository(project_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    git(project_path, "init", "-q")
+    git(project_path, "config", "user.email", "oida@example.com")
+    git(project_path, "config", "user.name", "Oida")
+    git(project_path, "add", ".")
+    git(project_path, "commit", "-q", "-m", "First")
+    monkeypatch.chdir(project_path)
+    return project_path
+
+
+def test_revision_layout() -> None:
+    layout = RevisionLayout(
+        {
+            "pyproject.toml": "a",
+            "src/project/__init__.py": "b",
+            "src/project/first/__init__.py": "c",
+            "src/project/first/confcomponent.py": "d",
+            "src/project/first/app/__init__.py": "e",
+        }
+    )
+
+    assert layout.get_module("src/project/first/app/models.py") == (
+        "project.first.app",
+        "models",
+    )
+    assert layout.get_module("src/project/first/app/__init__.py") == (
+        "project.first.app",
+        "",
+    )
+    assert layout.get_module("src/setup.py") == (None, "setup")
+    assert layout.get_component_config("src/project/first/app/models.py") == (
+        "project.first",
+        "d",
+    )
+    assert layout.get_component_config("src/project/models.py") == ("", "")
+    assert layout.get_project_config("src/project/first/app/models.py") == "a"
+
+
+def test_lint_staged(repository: Path) -> None:
+    models = repository / "project/first/app/models.py"
+    models.write_text(VIOLATING_CONTENT)
+    git(repository, "add", str(models))
+    # Only the staged content is linted
+    models.write_text("")
+
+    output = io.StringIO()
+    assert lint_staged(checks=None, output=output)
+    assert output.getvalue() == (
+        "project/first/app/models.py:3:0: "
+        'Private attribute "project.second.app.models.Model" referenced\n'
+    )
+
+    output = io.StringIO()
+    assert not lint_staged(repository / "project/second", checks=None, output=output)
+    assert output.getvalue() == ""
+
+
+def test_lint_staged_uses_staged_config(repository: Path) -> None:
+    models = repository / "project/first/app/models.py"
+    models.write_text(VIOLATING_CONTENT)
+    config = repository / "project/first/confcomponent.py"
+    config.write_text('ALLOWED_IMPORTS = {"project.second.app.models.Model"}\n')
+    git(repository, "add", str(models), str(config))
+    config.write_text("")
+
+    assert not lint_staged(checks=None)
+
+
+def test_lint_staged_caches_results(repository: Path) -> None:
+    models = repository / "project/first/app/models.py"
+    models.write_text(VIOLATING_CONTENT)
+    git(repository, "add", str(models))
+
+    assert lint_staged(checks=None, output=io.StringIO())
+    store = ResultStore(get_store_dir(repository))
+    entry = store.load(
+        get_content_hash(VIOLATING_CONTENT.encode()), "project.first.app", "models"
+    )
+    assert entry.get_context_hashes()
+
+    # Tamper with the stored facts to check that they are used
+    entry.data["facts"]["references"] = []
+    entry.dirty = True
+    store.save(entry)
+    assert not lint_staged(checks=None)
+
+
+def test_lint_staged_syntax_error(repository: Path) -> None:
+    models = repository / "project/first/app/models.py"
+    models.write_text("def broken(:\n")
+    git(repository, "add", str(models))
+
+    with pytest.raises(SyntaxError):
+        lint_staged(checks=None, output=io.StringIO())
+
+    # The failure is not stored
+    with pytest.raises(SyntaxError):
+        lint_staged(checks=None, output=io.StringIO())
+    entry = ResultStore(get_store_dir(repository)).load(
+        get_content_hash(b"def broken(:\n"), "project.first.app", "models"
+    )
+    assert entry.get_facts() is None
@@ -0,0 +1,276 @@
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from oida.checkers import get_checkers
+from oida.discovery import find_modules, get_component_config, get_project_config
+from oida.graph import build_import_graph
+from oida.statistics.coupling import CouplingMatrix
+from oida.statistics.history import generate_history
+from oida.statistics.import_cost import ClosureSize, ImportCost
+from oida.statistics.statistics_generator import generate_statistics
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/services.py": """\
+            from project.second.services import a
+            from project.second.app.models import b
+            from project.third.services import c
+            """,
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": "from project.first.services import d",
+        "project/second/__init__.py": "",
+        "project/second/services.py": "from project.third import services",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+        "project/third/__init__.py": "",
+        "project/third/services.py": "",
+        "project/third/app/__init__.py": "",
+        "project/third/app/apps.py": "",
+        "project/third/app/models.py": "",
+    }
+)
+
+
+def test_coupling_matrix() -> None:
+    matrix = CouplingMatrix(["a", "b", "c"])
+    matrix.add(0, 1)
+    matrix.add(0, 1)
+    matrix.add(0, 2)
+    matrix.add(1, 2)
+
+    assert matrix.count(0, 1) == 2
+    assert [matrix.get_afferent_coupling(i) for i in range(3)] == [0, 1, 2]
+    assert [matrix.get_efferent_coupling(i) for i in range(3)] == [2, 1, 0]
+    assert [matrix.get_instability(i) for i in range(3)] == [1.0, 0.5, 0.0]
+
+
+def test_generate_statistics_without_coupling(project_path: Path) -> None:
+    statistics = generate_statistics(project_path / "project")
+
+    assert statistics.coupling is None
+    assert "coupling" not in json.loads(statistics.json())
+
+
+def test_generate_statistics_with_coupling(project_path: Path) -> None:
+    statistics = generate_statistics(project_path / "project", coupling=True)
+
+    assert json.loads(statistics.json())["coupling"] == [
+        {
+            "component": "project.first",
+            "afferent_coupling": 0,
+            "efferent_coupling": 2,
+            "instability": 1.0,
+            "imports": {"project.second": 2, "project.third": 1},
+        },
+        {
+            "component": "project.second",
+            "afferent_coupling": 1,
+            "efferent_coupling": 1,
+            "instability": 0.5,
+            "imports": {"project.third": 1},
+        },
+        {
+            "component": "project.third",
+            "afferent_coupling": 2,
+            "efferent_coupling": 0,
+            "instability": 0.0,
+            "imports": {},
+        },
+    ]
+
+
+def test_coupling_csv(project_path: Path) -> None:
+    statistics = generate_statistics(project_path / "project", coupling=True)
+
+    assert statistics.coupling is not None
+    assert statistics.coupling.csv().splitlines() == [
+        "component,afferent_coupling,efferent_coupling,instability,"
+        "project.first,project.second,project.third",
+        "project.first,0,2,1.000,0,2,1",
+        "project.second,1,1,0.500,0,0,1",
+        "project.third,2,0,0.000,0,0,0",
+    ]
+
+
+def test_generate_statistics_with_import_cost(project_path: Path) -> None:
+    project = project_path / "project"
+
+    statistics = generate_statistics(project, import_cost=True)
+
+    import_cost = json.loads(statistics.json())["import_cost"]
+    assert [(row["name"], row["modules"]) for row in import_cost["components"]] == [
+        ("project.first", 12),
+        ("project.second", 8),
+        ("project.third", 6),
+    ]
+    assert [row["name"] for row in import_cost["apps"]] == [
+        "project.first.app",
+        "project.second.app",
+        "project.third.app",
+    ]
+    assert import_cost["modules"][0]["name"] == "project.first.app.models"
+
+    first_size = sum(path.stat().st_size for path in project.glob("**/*.py"))
+    assert import_cost["components"][0]["bytes"] == first_size
+    assert import_cost["components"][0]["ast_nodes"] > 0
+
+
+def test_import_cost_sums_large_closures(project_path: Path) -> None:
+    project = project_path / "project"
+    for i in range(20):
+        (project / f"module_{i}.py").write_text(
+            f"from project.module_{i + 1} import x\n" + "x = 1\n" * i
+        )
+
+    import_cost = ImportCost(build_import_graph(project), ["project.module_0"])
+
+    assert import_cost.get_closure_size("project.module_0") == ClosureSize(
+        modules=21,
+        bytes=sum((project / f"module_{i}.py").stat().st_size for i in range(20)),
+        # The empty project/__init__.py has a single Module node. The others
+        # have Module, ImportFrom, alias and an Assign, Name, Store and
+        # Constant for each assignment.
+        ast_nodes=1 + sum(3 + 4 * i for i in range(20)),
+    )
+
+
+def git(path: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=path, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def count_violations(path: Path) -> int:
+    count = 0
+    for module in find_modules(path):
+        for checker_cls in get_checkers():
+            checker = checker_cls(
+                module=module.module,
+                name=module.name,
+                component_config=get_component_config(module.path.parent),
+                project_config=get_project_config(module.path.parent),
+                source_lines=module.source_lines,
+            )
+            checker.visit(module.ast)
+            count += len(checker.violations)
+    return count
+
+
+def test_generate_history(project_path: Path) -> None:
+    project = project_path / "project"
+    (project / "first/app/services.py").write_text(
+        "from project.second.app.models import b\n\nb.objects.get()\n"
+    )
+    git(project_path, "init", "-q")
+    git(project_path, "config", "user.email", "oida@example.com")
+    git(project_path, "config", "user.name", "Oida")
+    git(project_path, "add", ".")
+    git(project_path, "commit", "-q", "-m", "First")
+
+    first = generate_statistics(project)
+    first_violations = count_violations(project)
+    assert first_violations
+
+    (project / "fourth/app").mkdir(parents=True)
+    (project / "fourth/__init__.py").write_text("")
+    (project / "fourth/app/__init__.py").write_text("")
+    (project / "fourth/app/apps.py").write_text("")
+    (project / "fourth/app/models.py").write_text(
+        "from project.third.app.models import x\n\nx.y()\nx.z()\n"
+    )
+    (project / "first/confcomponent.py").write_text(
+        'ALLOWED_IMPORTS = ["project.second.app.models.b"]'
+    )
+    git(project_path, "add", ".")
+    git(project_path, "commit", "-q", "-m", "Second")
+    get_component_config.cache_clear()
+
+    history = generate_history(project, "HEAD")
+
+    assert [commit.commit for commit in history.commits] == git(
+        project_path, "rev-list", "--reverse", "HEAD"
+    ).split()
+    assert [
+        (
+            commit.components,
+            commit.components_with_public_api,
+            commit.apps,
+            commit.apps_in_components,
+            commit.violations,
+        )
+        for commit in history.commits
+    ] == [
+        (
+            first.get_number_of_components(),
+            first.get_number_of_components_with_public_api(),
+            first.get_total_number_of_apps(),
+            first.get_number_of_componentized_apps(),
+            first_violations,
+        ),
+        (4, 3, 4, 4, count_violations(project)),
+    ]
+    assert history.commits[1].violations != first_violations
+    assert history.csv().splitlines()[0] == (
+        "commit,timestamp,components,components_with_public_api,apps,"
+        "apps_in_components,violations"
+    )
+
+
+def test_generate_history_without_project(project_path: Path) -> None:
+    project = project_path / "project"
+    git(project_path, "init", "-q")
+    git(project_path, "config", "user.email", "oida@example.com")
+    git(project_path, "config", "user.name", "Oida")
+    (project_path / "README").write_text("")
+    git(project_path, "add", "README")
+    git(project_path, "commit", "-q", "-m", "First")
+
+    history = generate_history(project, "HEAD")
+
+    assert history.commits[0].components == 0
+    assert history.commits[0].violations == 0
+
+
+def test_generate_statistics_summary(project_path: Path) -> None:
+    project = project_path / "project"
+
+    statistics = generate_statistics(project)
+
+    summary = statistics.summary
+    assert [component.name for component in summary.components] == [
+        "first",
+        "second",
+        "third",
+    ]
+    assert summary.components_with_public_api == ("first", "second", "third")
+    assert summary.componentized_apps == ("app", "app", "app")
+    assert summary.uncomponentized_apps == ()
+    assert summary.componentized_apps_fraction == 1.0
+
+    first = summary.components[0]
+    assert first.size.files == 5
+    assert first.size.lines == 4
+    assert first.size.bytes == sum(
+        path.stat().st_size for path in (project / "first").glob("**/*.py")
+    )
+    assert json.loads(statistics.json())["components"]["component_sizes"]["first"] == {
+        "files": 5,
+        "lines": 4,
+        "bytes": first.size.bytes,
+    }
+
+
+@pytest.mark.project_files({"empty/__init__.py": ""})
+def test_generate_statistics_empty_project(project_path: Path) -> None:
+    statistics = generate_statistics(project_path / "empty")
+
+    assert statistics.summary.components_with_public_api_fraction == 0.0
+    assert statistics.summary.componentized_apps_fraction == 0.0
+    assert json.loads(statistics.json())["apps"]["number_of_apps"] == 0
@@ -0,0 +1,161 @@
+import io
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from oida.checkers import Code, Violation
+from oida.checkers.components import Reference
+from oida.commands.linter import run_linter
+from oida.config_generator import collect_violations_in_file
+from oida.discovery import find_modules
+from oida.facts import ModuleFacts
+from oida.store import (
+    CACHE_DIR_ENV,
+    MAX_AGE,
+    ResultStore,
+    get_content_hash,
+    get_store_dir,
+)
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/first/__init__.py": "",
+        "project/first/app/__init__.py": "",
+        "project/first/app/apps.py": "",
+        "project/first/app/models.py": """\
+            from project.second.app.models import Model
+
+            Model.objects.get()
+            """,
+        "project/second/__init__.py": "",
+        "project/second/app/__init__.py": "",
+        "project/second/app/apps.py": "",
+        "project/second/app/models.py": "",
+    }
+)
+
+
+def get_store_counts(metrics_file: Path) -> dict[str, int]:
+    return {
+        kind: int(line.rsplit(" ", 1)[1])
+        for line in metrics_file.read_text().splitlines()
+        for kind in ("hits", "misses")
+        if line.startswith(f'oida_lint_cache_{kind}_total{{cache="store"}}')
+    }
+
+
+def test_content_hash() -> None:
+    # The same as `git hash-object`
+    assert get_content_hash(b"") == "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+
+
+def test_shared_between_checkouts(
+    project_path: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "shared"))
+    checkout = tmp_path / "checkout"
+    shutil.copytree(project_path / "project", checkout / "project")
+    modules = len(list(find_modules(checkout / "project")))
+    metrics_file = tmp_path / "metrics.txt"
+
+    run_linter(
+        project_path / "project",
+        checks=["component-isolation"],
+        output=io.StringIO(),
+    )
+    assert get_store_dir(checkout) == tmp_path / "shared"
+
+    # The facts extracted in the first checkout are used in the other one,
+    # for all checks
+    output = io.StringIO()
+    assert run_linter(
+        checkout / "project", checks=None, output=output, metrics_file=metrics_file
+    )
+    assert get_store_counts(metrics_file) == {"hits": modules, "misses": 0}
+
+    expected = io.StringIO()
+    run_linter(checkout / "project", checks=None, output=expected, use_store=False)
+    assert output.getvalue() == expected.getvalue()
+
+
+def test_entries(tmp_path: Path) -> None:
+    store = ResultStore(tmp_path)
+    facts = ModuleFacts(
+        [Reference("project.other.app.models.Model", 3, 0, False)],
+        {"relative-imports": [Violation(1, 0, Code.ODA001, "Message")]},
+    )
+
+    entry = store.load("hash", "project.app", "models")
+    assert entry.get_facts() is None
+    entry.put_facts(facts)
+    store.save(entry)
+
+    assert store.load("hash", "project.app", "models").get_facts() == facts
+    assert store.load("hash", "project.app", "services").get_facts() is None
+
+
+def test_referenced_imports_from_lint_run(project_path: Path) -> None:
+    # Imports are recorded even if they are allowed by the component config
+    (project_path / "project/first/confcomponent.py").write_text(
+        'ALLOWED_IMPORTS = {"project.second.app.models.Model"}\n'
+    )
+    assert not run_linter(project_path / "project", checks=None, output=io.StringIO())
+
+    store = ResultStore(get_store_dir(project_path))
+    assert collect_violations_in_file(
+        project_path / "project/first/app/models.py", store
+    ) == {"project.second.app.models.Model"}
+    assert (store.hits, store.misses) == (1, 0)
+
+
+def test_prune(tmp_path: Path) -> None:
+    store = ResultStore(tmp_path)
+    facts = ModuleFacts([], {})
+    for name in ["used", "unused", "new"]:
+        entry = store.load("hash", "project.app", name)
+        entry.put_facts(facts)
+        store.save(entry)
+
+    old = time.time() - MAX_AGE - 60
+    for name in ["used", "unused"]:
+        os.utime(store.get_path("hash", "project.app", name), (old, old))
+
+    # Using an entry keeps it from being pruned
+    assert store.load("hash", "project.app", "used").get_facts() == facts
+    store.prune_if_due()
+
+    assert store.load("hash", "project.app", "used").get_facts() == facts
+    assert store.load("hash", "project.app", "unused").get_facts() is None
+    assert store.load("hash", "project.app", "new").get_facts() == facts
+
+    # The store is only pruned once per interval
+    os.utime(store.get_path("hash", "project.app", "new"), (old, old))
+    store.prune_if_due()
+    assert store.load("hash", "project.app", "new").get_facts() == facts
+    assert store.prune() == 0
+
+
+def test_unwritable_store(project_path: Path, tmp_path: Path) -> None:
+    # A file in place of the store directory can't be written to
+    (tmp_path / "store").write_text("")
+    store = ResultStore(tmp_path / "store")
+
+    entry = store.load("hash", "project.app", "models")
+    entry.put_facts(ModuleFacts([], {}))
+    store.save(entry)
+    store.prune_if_due()
+
+    assert not store.writable
+    assert store.load("hash", "project.app", "models").get_facts() is None
+
+
+def test_store_turned_off_in_config(project_path: Path) -> None:
+    (project_path / "pyproject.toml").write_text("[tool.oida]\nresult_store = false\n")
+
+    run_linter(project_path / "project", checks=None, output=io.StringIO())
+
+    assert not get_store_dir(project_path).exists()
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+
+from oida.commands.why import find_import_path, find_shortest_path
+from oida.graph import Edge
+
+pytestmark = pytest.mark.project_files(
+    {
+        "project/__init__.py": "",
+        "project/orders/__init__.py": "",
+        "project/orders/services.py": """\
+            from project.orders.selectors import get_order
+            from project.utils import helper
+            """,
+        "project/orders/selectors.py": "\nfrom project.catalog.models import Product",
+        "project/catalog/__init__.py": "",
+        "project/catalog/models.py": "from project.catalog.base import Base",
+        "project/catalog/base.py": "from project.users.models import User",
+        "project/utils.py": "from project.users import models",
+        "project/users/__init__.py": "",
+        "project/users/models.py": "",
+        "project/unrelated.py": "",
+    }
+)
+
+
+def test_find_shortest_path() -> None:
+    edges = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"), ("a", "x"), ("x", "e")]
+    forward: dict[str, list[tuple[str, int]]] = {}
+    backward: dict[str, list[tuple[str, int]]] = {}
+    for line, (source, target) in enumerate(edges, start=1):
+        forward.setdefault(source, []).append((target, line))
+        backward.setdefault(target, []).append((source, line))
+
+    assert find_shortest_path(forward, backward, ["a"], ["e"]) == [
+        ("a", "x", 5),
+        ("x", "e", 6),
+    ]
+    assert find_shortest_path(forward, backward, ["b"], ["d"]) == [
+        ("b", "c", 2),
+        ("c", "d", 3),
+    ]
+    assert find_shortest_path(forward, backward, ["e"], ["a"]) is None
+
+
+def test_find_import_path(project_path: Path) -> None:
+    project = project_path / "project"
+
+    import_path = find_import_path(project, "project.orders", "project.users")
+
+    assert import_path is not None
+    assert import_path.edges == [
+        Edge("project.orders.services", "project.utils", 2),
+        Edge("project.utils", "project.users.models", 1),
+    ]
+    assert str(import_path) == "\n".join(
+        [
+            f"project.orders.services -> project.utils ({project}/orders/services.py:2)",
+            f"project.utils -> project.users.models ({project}/utils.py:1)",
+        ]
+    )
+
+
+def test_find_import_path_from_project_directory(project_path: Path) -> None:
+    import_path = find_import_path(
+        project_path, "project.orders.selectors", "project.users.models"
+    )
+
+    assert import_path is not None
+    assert import_path.edges == [
+        Edge("project.orders.selectors", "project.catalog.models", 2),
+        Edge("project.catalog.models", "project.catalog.base", 1),
+        Edge("project.catalog.base", "project.users.models", 1),
+    ]
+
+
+def test_find_import_path_no_path(project_path: Path) -> None:
+    project = project_path / "project"
+
+    assert find_import_path(project, "project.users", "project.orders") is None
+
+
+def test_find_import_path_unknown_module(project_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        find_import_path(project_path / "project", "project.missing", "project")